@@ -1,20 +1,25 @@
 import random
 
 
-def gerar_cnpj(formatado=False):
+def gerar_cnpj(formatado=False, base=None):
     """
     Gera um número de CNPJ válido.
 
     Args:
         formatado (bool): Se True, retorna o CNPJ no formato XX.XXX.XXX/XXXX-XX.
                           Se False, retorna apenas os 14 dígitos.
+        base (int): Os 8 primeiros dígitos (de 0 a 99999999). Se None, são
+                    aleatórios.
 
     Returns:
         str: O número do CNPJ gerado.
     """
-    # 1. Gera os primeiros 8 dígitos aleatórios
+    # 1. Gera os primeiros 8 dígitos aleatórios (ou usa os da base)
     # 2. Adiciona os 4 dígitos do número da filial (0001 para matriz)
-    n = [random.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    if base is None:
+        n = [random.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    else:
+        n = [int(d) for d in f"{base:08d}"] + [0, 0, 0, 1]
 
     # Função interna para calcular um dígito verificador
     def calcular_dv(base, pesos):
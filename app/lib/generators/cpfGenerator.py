@@ -1,12 +1,19 @@
 import random
 
 
-def gerar_cpf(formatado=False):
+def gerar_cpf(formatado=False, base=None):
     """
     Gera um número de CPF válido.
     ... (o resto da função gerar_cpf como antes) ...
+
+    Args:
+        base (int): Os 9 primeiros dígitos (de 0 a 999999999). Se None,
+                    são aleatórios.
     """
-    n = [random.randint(0, 9) for _ in range(9)]
+    if base is None:
+        n = [random.randint(0, 9) for _ in range(9)]
+    else:
+        n = [int(d) for d in f"{base:09d}"]
 
     def calcular_dv(base):
         multiplicador_inicial = len(base) + 1
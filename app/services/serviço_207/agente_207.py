@@ -0,0 +1,272 @@
+# app/services/servico_207/agente_207.py
+
+import random
+
+from app.lib.api.ibgeAPI import buscar_codigo_municipio
+from app.lib.api.viaCepAPI import buscar_endereco_por_municipio
+from app.lib.mappers.codigoMapper import get_codigo_interno_por_ibge
+from app.lib.generators.cpfGenerator import gerar_cpf
+from app.lib.generators.cnpjGenerator import gerar_cnpj
+from app.lib.generators.inscricaoGenerator import (
+    gerar_inscricao_estadual,
+    gerar_inscricao_municipal,
+)
+from app.lib.generators.nomeGenerator import (
+    gerar_nome_aleatorio,
+    gerar_nome_empresa,
+    gerar_fantasia_empresa,
+    gerar_fantasia_pessoa_fisica,
+    remover_acentos,
+)
+from app.lib.formatters.formatters import campo_xml
+
+# Checkbox da tela → tag do bloco <Fiscal>.
+MAPA_TAGS_FISCAIS = {
+    "escriturar": "AGN_BO_ESCRITURAR",
+    "enquadraIPI": "AGN_BO_ENQUADRAIPI",
+    "enquadraICMS": "AGN_BO_ENQUADRAICMS",
+    "calculaICMSNaoEnq": "AGN_BO_CALCICMSNAOENQ",
+    "enquadraISS": "AGN_BO_ENQUADRAISS",
+    "retemIR": "AGN_BO_RETERIR",
+    "retemINSS": "AGN_BO_RETERINSS",
+    "enquadraSimples": "AGN_BO_SIMPLES",
+    "ipiSimples": "AGN_BO_IPISIMPLES",
+    "icmsSimples": "AGN_BO_ICMSSIMPLES",
+    "issSimples": "AGN_BO_ISSSIMPLES",
+    "inssSimples": "AGN_BO_INSSSIMPLES",
+    "retemISS": "AGN_BO_RETERISS",
+    "enquadraPIS": "AGN_BO_ENQUADRAPIS",
+    "enquadraCOFINS": "AGN_BO_ENQUADRACOFINS",
+    "retemCSLL": "AGN_BO_RETERCSLL",
+    "enquadraFUNRURAL": "AGN_BO_ENQUADRAFUNRURAL",
+    "enquadraINSSRURAL": "AGN_BO_ENQUADRAINSSRURAL",
+}
+
+# Tipo do agente → AGN_TAU_ST_CODIGO.
+MAPA_TIPO_AGENTE = {
+    "cliente": "C",
+    "fornecedor": "F",
+    "representante": "R",
+    "contato": "E",
+    "transportadora": "T",
+    "obrigacao": "S",
+    "colaborador": "U",
+    "outros": "O",
+    "obra": "B",
+    "sindicato": "D",
+}
+
+# Modelo de agente com os valores padrão da tela 207. As chaves
+# 'codigo_municipio' e 'endereco' vêm de `resolver_localizacao`.
+MODELO_PADRAO = {
+    "natureza": "pessoa",
+    "tipo_pessoa": "F",
+    "tipo_rural_fj": "",
+    "estado": "SP",
+    "municipio": "Itu",
+    "filial": "100",
+    "isento": False,
+    "inscricao_estadual": False,
+    "inscricao_municipal": False,
+    "fiscais": ["escriturar"],
+    "tipos_agente": ["cliente"],
+}
+
+# Quantos números de documento distintos cabem na base de cada tipo de pessoa.
+BASES_DOCUMENTO = {"F": 10**9, "J": 10**8}
+
+
+def resolver_localizacao(municipio, estado):
+    """
+    Consulta o IBGE e o ViaCEP: código interno do município e um endereço.
+
+    :return: dict com 'codigo_municipio' e 'endereco' (cep, logradouro,
+             numero e bairro), para completar um modelo de agente.
+    """
+    ibge_data = buscar_codigo_municipio(municipio, estado)
+    endereco_data = buscar_endereco_por_municipio(municipio, estado)
+    return {
+        "codigo_municipio": get_codigo_interno_por_ibge(ibge_data["codigo"]),
+        "endereco": {
+            campo: endereco_data[campo]
+            for campo in ("cep", "logradouro", "numero", "bairro")
+        },
+    }
+
+
+def completar_modelo(modelo):
+    """
+    Modelo com os padrões de MODELO_PADRAO e a localização resolvida (só
+    consulta as APIs se o modelo não trouxer 'codigo_municipio' e 'endereco').
+    """
+    completo = {**MODELO_PADRAO, **modelo}
+    if completo["natureza"] == "empresa":
+        completo["tipo_pessoa"] = "J"
+    if completo["natureza"] not in ("pessoa", "empresa"):
+        raise ValueError(f"Natureza desconhecida: {completo['natureza']}")
+    if completo["tipo_pessoa"] not in ("F", "J", "R"):
+        raise ValueError(f"Tipo de pessoa desconhecido: {completo['tipo_pessoa']}")
+    if not all([completo["municipio"], completo["estado"], completo["filial"]]):
+        raise ValueError("O modelo precisa de Estado, Município e Código da Filial.")
+    if "codigo_municipio" not in completo or "endereco" not in completo:
+        completo.update(resolver_localizacao(completo["municipio"], completo["estado"]))
+    return completo
+
+
+def inferir_tipo_logradouro(logradouro=""):
+    tipo = logradouro.split(" ")[0].lower()
+    mapa_siglas = {"rua": "R", "avenida": "AV", "travessa": "TV", "alameda": "AL"}
+    return mapa_siglas.get(tipo, tipo.upper())
+
+
+def gerar_documento(tipo_pessoa, base=None):
+    """CPF (pessoa física), CNPJ (jurídica) ou None (rural), sem máscara."""
+    if tipo_pessoa == "F":
+        return gerar_cpf(base=base)
+    if tipo_pessoa == "J":
+        return gerar_cnpj(base=base)
+    return None
+
+
+def gerar_bloco_pessoa(tipo_pessoa, documento):
+    if tipo_pessoa == "F":
+        return f"""\n  <PesFisica OPERACAO="I"><AGN_ST_CPF>{campo_xml(documento)}</AGN_ST_CPF></PesFisica>"""
+    elif tipo_pessoa == "J":
+        return f"\n  <AGN_ST_CGC>{campo_xml(documento)}</AGN_ST_CGC>"
+    return ""
+
+
+def gerar_bloco_inscricoes(isento, estadual, municipal):
+    tags = ""
+    if isento:
+        tags += "\n  <AGN_ST_INSCRESTADUAL>ISENTO</AGN_ST_INSCRESTADUAL>"
+        tags += "\n  <AGN_ST_INSCRMUNIC>ISENTO</AGN_ST_INSCRMUNIC>"
+    else:
+        if estadual:
+            tags += f"\n  <AGN_ST_INSCRESTADUAL>{gerar_inscricao_estadual()}</AGN_ST_INSCRESTADUAL>"
+        if municipal:
+            tags += f"\n  <AGN_ST_INSCRMUNIC>{gerar_inscricao_municipal()}</AGN_ST_INSCRMUNIC>"
+    return tags
+
+
+def gerar_bloco_fiscal(fiscais):
+    linhas_marcadas = [
+        f"    <{tag}>S</{tag}>"
+        for id_check, tag in MAPA_TAGS_FISCAIS.items()
+        if id_check in fiscais
+    ]
+    if not linhas_marcadas:
+        return ""
+    return f"""\n  <Fiscal OPERACAO="I">\n    <AGN_DT_INIVIGENCIA>01/01/2000</AGN_DT_INIVIGENCIA>\n{chr(10).join(linhas_marcadas)}\n  </Fiscal>"""
+
+
+def gerar_bloco_agente_id(tipos_agente):
+    return "".join(
+        [
+            f"""\n    <AgenteId OPERACAO="I"><AGN_TAU_ST_CODIGO>{campo_xml(codigo)}</AGN_TAU_ST_CODIGO></AgenteId>"""
+            for nome, codigo in MAPA_TIPO_AGENTE.items()
+            if nome in tipos_agente
+        ]
+    )
+
+
+def montar_xml_agente(modelo, nome, fantasia, documento):
+    """
+    XML <Agente> do serviço 207.
+
+    :param modelo: Modelo completo (ver `completar_modelo`).
+    :param nome: Nome do agente (o e-mail é derivado dele).
+    :param fantasia: Nome fantasia.
+    :param documento: CPF ou CNPJ, conforme o tipo de pessoa do modelo.
+    """
+    tipo_pessoa = modelo["tipo_pessoa"]
+    endereco = modelo["endereco"]
+    email = remover_acentos(nome.lower().replace(" ", ".")) + "@exemplo.com"
+    sigla_logradouro = inferir_tipo_logradouro(endereco["logradouro"])
+    bloco_pessoa = gerar_bloco_pessoa(tipo_pessoa, documento)
+    bloco_inscricoes = gerar_bloco_inscricoes(
+        modelo["isento"], modelo["inscricao_estadual"], modelo["inscricao_municipal"]
+    )
+    bloco_fiscal = gerar_bloco_fiscal(modelo["fiscais"])
+    bloco_agente_id = gerar_bloco_agente_id(modelo["tipos_agente"])
+    bloco_rural = (
+        f"\n  <AGN_CH_RURALTIPOPESSOAFJ>{campo_xml(modelo['tipo_rural_fj'])}</AGN_CH_RURALTIPOPESSOAFJ>"
+        if tipo_pessoa == "R"
+        else ""
+    )
+
+    return f"""
+<Agente OPERACAO="I">
+  <AGN_ST_NOME>{campo_xml(nome, 100)}</AGN_ST_NOME>
+  <AGN_ST_FANTASIA>{campo_xml(fantasia, 100)}</AGN_ST_FANTASIA>
+  <TPP_IN_CODIGO>{campo_xml(tipo_pessoa)}</TPP_IN_CODIGO>
+  <TAB05_IN_CODIGO>{campo_xml("1" if tipo_pessoa == "F" else "2")}</TAB05_IN_CODIGO>
+  <AGN_ST_EMAIL>{campo_xml(email, 30)}</AGN_ST_EMAIL>{bloco_inscricoes}
+  <PA_ST_SIGLA>BRA</PA_ST_SIGLA>
+  <UF_ST_SIGLA>{campo_xml(modelo["estado"])}</UF_ST_SIGLA>
+  <MUN_NO_NOME>{campo_xml(modelo["municipio"])}</MUN_NO_NOME>
+  <MUN_IN_CODIGO>{campo_xml(modelo["codigo_municipio"])}</MUN_IN_CODIGO>
+  <TPL_ST_SIGLA>{campo_xml(sigla_logradouro)}</TPL_ST_SIGLA>
+  <AGN_ST_CEP>{campo_xml(endereco["cep"])}</AGN_ST_CEP>
+  <AGN_ST_LOGRADOURO>{campo_xml(endereco["logradouro"], 50)}</AGN_ST_LOGRADOURO>
+  <AGN_ST_NUMERO>{campo_xml(str(endereco["numero"]), 10)}</AGN_ST_NUMERO>
+  <AGN_ST_BAIRRO>{campo_xml(endereco["bairro"], 30)}</AGN_ST_BAIRRO>{bloco_pessoa}{bloco_rural}
+  <Parametros OPERACAO="I">
+    <FIL_IN_CODIGO>{campo_xml(modelo["filial"])}</FIL_IN_CODIGO>
+  </Parametros>{bloco_agente_id}{bloco_fiscal}
+</Agente>
+            """.strip()
+
+
+class GeradorAgentes:
+    """
+    Gera documentos <Agente> únicos a partir de um modelo da tela 207.
+
+    Cada posição `1..quantidade` gera um agente com nome e fantasia novos e
+    um CPF/CNPJ próprio: a base do documento é `inicio + posicao - 1`, com
+    `inicio` sorteado na criação, então os documentos de uma execução nunca
+    se repetem, mesmo gerados em processos diferentes (cada um gera as suas
+    posições). A localização do modelo é resolvida uma vez só, na criação.
+    """
+
+    def __init__(self, modelo, quantidade):
+        """
+        :param modelo: dict com as chaves de MODELO_PADRAO (as que faltarem
+                       usam o padrão) e, opcionalmente, 'codigo_municipio' e
+                       'endereco' já resolvidos.
+        :param quantidade: Agentes a gerar.
+        """
+        if quantidade < 1:
+            raise ValueError("A quantidade de agentes deve ser no mínimo 1.")
+        self.modelo = completar_modelo(modelo)
+        self.quantidade = int(quantidade)
+        bases = BASES_DOCUMENTO.get(self.modelo["tipo_pessoa"])
+        self.inicio = None
+        if bases is not None:
+            if self.quantidade > bases:
+                raise ValueError("Quantidade de agentes maior que a de documentos.")
+            self.inicio = random.randrange(bases - self.quantidade + 1)
+
+    def gerar(self, posicao):
+        """`(origem, xml)` do agente da `posicao`; a origem é o CPF/CNPJ."""
+        modelo = self.modelo
+        if modelo["natureza"] == "pessoa":
+            nome = gerar_nome_aleatorio()
+            fantasia = gerar_fantasia_pessoa_fisica(nome)
+        else:
+            nome = gerar_nome_empresa()
+            fantasia = gerar_fantasia_empresa()
+        documento = None
+        if self.inicio is not None:
+            documento = gerar_documento(
+                modelo["tipo_pessoa"], self.inicio + posicao - 1
+            )
+        xml = montar_xml_agente(modelo, nome, fantasia, documento)
+        return documento or f"agente {posicao}", xml
+
+    def descricao(self):
+        natureza = "Empresa" if self.modelo["natureza"] == "empresa" else "Pessoa"
+        return (
+            f"Agentes 207 ({natureza} {self.modelo['tipo_pessoa']}, "
+            f"{self.modelo['municipio']}/{self.modelo['estado']})"
+        )
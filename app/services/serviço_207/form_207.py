@@ -5,23 +5,18 @@ from tkinter import ttk, messagebox
 import re
 
 from app.views.xmlResultado import ResultadoWindow
-from app.lib.api.ibgeAPI import buscar_codigo_municipio
-from app.lib.api.viaCepAPI import buscar_endereco_por_municipio
-from app.lib.mappers.codigoMapper import get_codigo_interno_por_ibge
-from app.lib.generators.cpfGenerator import gerar_cpf
-from app.lib.generators.cnpjGenerator import gerar_cnpj
-from app.lib.generators.inscricaoGenerator import (
-    gerar_inscricao_estadual,
-    gerar_inscricao_municipal,
+from app.services.serviço_207.agente_207 import (
+    MAPA_TAGS_FISCAIS,
+    completar_modelo,
+    gerar_documento,
+    montar_xml_agente,
 )
 from app.lib.generators.nomeGenerator import (
     gerar_nome_aleatorio,
     gerar_nome_empresa,
     gerar_fantasia_empresa,
     gerar_fantasia_pessoa_fisica,
-    remover_acentos,
 )
-from app.lib.formatters.formatters import campo_xml
 
 
 # MUDANÇA 1: A classe agora herda de ttk.Frame, não de tk.Toplevel
@@ -299,6 +294,7 @@ class Gerador207Frame(ttk.Frame):
         action_frame.columnconfigure(0, weight=1)
         action_frame.columnconfigure(1, weight=0)
         action_frame.columnconfigure(2, weight=0)
+        action_frame.columnconfigure(3, weight=0)
 
         # MUDANÇA 5: O comando do botão Voltar agora usa o controller para voltar ao menu
         btn_voltar = ttk.Button(
@@ -313,6 +309,9 @@ class Gerador207Frame(ttk.Frame):
         )
         self.btn_gerar_xml.grid(row=0, column=2, sticky="e")
 
+        self.btn_gerar_enviar = ttk.Button(action_frame, text="Gerar e Enviar (SOAP)")
+        self.btn_gerar_enviar.grid(row=0, column=3, sticky="e", padx=(10, 0))
+
     # --- Nenhuma outra mudança é necessária nos métodos restantes ---
     # (Todos os métodos de _criar_grupo_radio até _gerar_bloco_agente_id permanecem idênticos)
 
@@ -342,6 +341,7 @@ class Gerador207Frame(ttk.Frame):
         """Associa funções (métodos) aos eventos dos widgets."""
         self.btn_gerar_fantasia.config(command=self.on_gerar_nome_fantasia)
         self.btn_gerar_xml.config(command=self.on_gerar_xml)
+        self.btn_gerar_enviar.config(command=self.on_gerar_e_enviar)
         self.tipo_nome_var.trace_variable("w", self._atualizar_tipo_pessoa_ui)
         self.tipo_pessoa_var.trace_variable("w", self._atualizar_tipo_rural_ui)
         self.check_vars["checkboxIsento"].trace_variable("w", self._on_isento_change)
@@ -422,62 +422,47 @@ class Gerador207Frame(ttk.Frame):
         self.fantasia_entry.delete(0, "end")
         self.fantasia_entry.insert(0, fantasia)
 
+    def _coletar_modelo(self):
+        """Modelo de agente (ver agente_207.MODELO_PADRAO) com o estado da tela."""
+        return {
+            "natureza": self.tipo_nome_var.get(),
+            "tipo_pessoa": self.tipo_pessoa_var.get(),
+            "tipo_rural_fj": self.tipo_rural_fj_var.get(),
+            "estado": self.estado_combo.get().strip().upper(),
+            "municipio": self.municipio_entry.get().strip(),
+            "filial": self.filial_entry.get().strip(),
+            "isento": self.check_vars["checkboxIsento"].get(),
+            "inscricao_estadual": self.check_vars["checkboxInscricaoEstadual"].get(),
+            "inscricao_municipal": self.check_vars["checkboxInscricaoMunicipal"].get(),
+            "fiscais": [
+                id_check
+                for id_check in MAPA_TAGS_FISCAIS
+                if self.check_vars[id_check].get()
+            ],
+            "tipos_agente": [
+                nome for nome, var in self.tipo_agente_vars.items() if var.get()
+            ],
+        }
+
     def on_gerar_xml(self):
         """Função principal que coleta dados, chama APIs e gera o XML."""
         try:
             nome = self.nome_entry.get().strip()
             fantasia = self.fantasia_entry.get().strip()
-            tipo_pessoa = self.tipo_pessoa_var.get()
-            estado = self.estado_combo.get().strip().upper()
-            municipio = self.municipio_entry.get().strip()
-            filial_codigo = self.filial_entry.get().strip()
+            modelo = self._coletar_modelo()
 
-            if not all([municipio, estado, filial_codigo, nome]):
+            if not all([modelo["municipio"], modelo["estado"], modelo["filial"], nome]):
                 messagebox.showerror(
                     "Erro de Validação",
                     "Preencha os campos obrigatórios:\n- Nome do Agente\n- Estado\n- Município\n- Código da Filial",
                 )
                 return
 
-            ibge_data = buscar_codigo_municipio(municipio, estado)
-            endereco_data = buscar_endereco_por_municipio(municipio, estado)
-            codigo_interno = get_codigo_interno_por_ibge(ibge_data["codigo"])
-            email = remover_acentos(nome.lower().replace(" ", ".")) + "@exemplo.com"
-            sigla_logradouro = self._inferir_tipo_logradouro(
-                endereco_data["logradouro"]
-            )
-            bloco_pessoa = self._gerar_bloco_pessoa(tipo_pessoa)
-            bloco_inscricoes = self._gerar_bloco_inscricoes()
-            bloco_fiscal = self._gerar_bloco_fiscal()
-            bloco_agente_id = self._gerar_bloco_agente_id()
-            bloco_rural = (
-                f"\n  <AGN_CH_RURALTIPOPESSOAFJ>{campo_xml(self.tipo_rural_fj_var.get())}</AGN_CH_RURALTIPOPESSOAFJ>"
-                if self.tipo_pessoa_var.get() == "R"
-                else ""
+            modelo = completar_modelo(modelo)
+            xml_final = montar_xml_agente(
+                modelo, nome, fantasia, gerar_documento(modelo["tipo_pessoa"])
             )
 
-            xml_final = f"""
-<Agente OPERACAO="I">
-  <AGN_ST_NOME>{campo_xml(nome, 100)}</AGN_ST_NOME>
-  <AGN_ST_FANTASIA>{campo_xml(fantasia, 100)}</AGN_ST_FANTASIA>
-  <TPP_IN_CODIGO>{campo_xml(tipo_pessoa)}</TPP_IN_CODIGO>
-  <TAB05_IN_CODIGO>{campo_xml("1" if tipo_pessoa == "F" else "2")}</TAB05_IN_CODIGO>
-  <AGN_ST_EMAIL>{campo_xml(email, 30)}</AGN_ST_EMAIL>{bloco_inscricoes}
-  <PA_ST_SIGLA>BRA</PA_ST_SIGLA>
-  <UF_ST_SIGLA>{campo_xml(estado)}</UF_ST_SIGLA>
-  <MUN_NO_NOME>{campo_xml(municipio)}</MUN_NO_NOME>
-  <MUN_IN_CODIGO>{campo_xml(codigo_interno)}</MUN_IN_CODIGO>
-  <TPL_ST_SIGLA>{campo_xml(sigla_logradouro)}</TPL_ST_SIGLA>
-  <AGN_ST_CEP>{campo_xml(endereco_data["cep"])}</AGN_ST_CEP>
-  <AGN_ST_LOGRADOURO>{campo_xml(endereco_data["logradouro"], 50)}</AGN_ST_LOGRADOURO>
-  <AGN_ST_NUMERO>{campo_xml(str(endereco_data["numero"]), 10)}</AGN_ST_NUMERO>
-  <AGN_ST_BAIRRO>{campo_xml(endereco_data["bairro"], 30)}</AGN_ST_BAIRRO>{bloco_pessoa}{bloco_rural}
-  <Parametros OPERACAO="I">
-    <FIL_IN_CODIGO>{campo_xml(filial_codigo)}</FIL_IN_CODIGO>
-  </Parametros>{bloco_agente_id}{bloco_fiscal}
-</Agente>
-            """.strip()
-
             ResultadoWindow(parent=self, xml_string=xml_final).grab_set()
 
         except Exception as e:
@@ -485,80 +470,27 @@ class Gerador207Frame(ttk.Frame):
                 "Erro ao Gerar XML", f"Ocorreu um erro inesperado:\n\n{e}"
             )
 
-    def _inferir_tipo_logradouro(self, logradouro=""):
-        tipo = logradouro.split(" ")[0].lower()
-        mapa_siglas = {"rua": "R", "avenida": "AV", "travessa": "TV", "alameda": "AL"}
-        return mapa_siglas.get(tipo, tipo.upper())
-
-    def _gerar_bloco_pessoa(self, tipo_pessoa):
-        if tipo_pessoa == "F":
-            return f"""\n  <PesFisica OPERACAO="I"><AGN_ST_CPF>{campo_xml(gerar_cpf())}</AGN_ST_CPF></PesFisica>"""
-        elif tipo_pessoa == "J":
-            return f"\n  <AGN_ST_CGC>{campo_xml(gerar_cnpj())}</AGN_ST_CGC>"
-        return ""
-
-    def _gerar_bloco_inscricoes(self):
-        tags = ""
-        if self.check_vars["checkboxIsento"].get():
-            tags += "\n  <AGN_ST_INSCRESTADUAL>ISENTO</AGN_ST_INSCRESTADUAL>"
-            tags += "\n  <AGN_ST_INSCRMUNIC>ISENTO</AGN_ST_INSCRMUNIC>"
-        else:
-            if self.check_vars["checkboxInscricaoEstadual"].get():
-                tags += f"\n  <AGN_ST_INSCRESTADUAL>{gerar_inscricao_estadual()}</AGN_ST_INSCRESTADUAL>"
-            if self.check_vars["checkboxInscricaoMunicipal"].get():
-                tags += f"\n  <AGN_ST_INSCRMUNIC>{gerar_inscricao_municipal()}</AGN_ST_INSCRMUNIC>"
-        return tags
-
-    def _gerar_bloco_fiscal(self):
-        mapa_tags = {
-            "escriturar": "AGN_BO_ESCRITURAR",
-            "enquadraIPI": "AGN_BO_ENQUADRAIPI",
-            "enquadraICMS": "AGN_BO_ENQUADRAICMS",
-            "calculaICMSNaoEnq": "AGN_BO_CALCICMSNAOENQ",
-            "enquadraISS": "AGN_BO_ENQUADRAISS",
-            "retemIR": "AGN_BO_RETERIR",
-            "retemINSS": "AGN_BO_RETERINSS",
-            "enquadraSimples": "AGN_BO_SIMPLES",
-            "ipiSimples": "AGN_BO_IPISIMPLES",
-            "icmsSimples": "AGN_BO_ICMSSIMPLES",
-            "issSimples": "AGN_BO_ISSSIMPLES",
-            "inssSimples": "AGN_BO_INSSSIMPLES",
-            "retemISS": "AGN_BO_RETERISS",
-            "enquadraPIS": "AGN_BO_ENQUADRAPIS",
-            "enquadraCOFINS": "AGN_BO_ENQUADRACOFINS",
-            "retemCSLL": "AGN_BO_RETERCSLL",
-            "enquadraFUNRURAL": "AGN_BO_ENQUADRAFUNRURAL",
-            "enquadraINSSRURAL": "AGN_BO_ENQUADRAINSSRURAL",
-        }
-        linhas_marcadas = [
-            f"    <{tag}>S</{tag}>"
-            for id_check, tag in mapa_tags.items()
-            if self.check_vars.get(id_check) and self.check_vars[id_check].get()
-        ]
-        if not linhas_marcadas:
-            return ""
-        return f"""\n  <Fiscal OPERACAO="I">\n    <AGN_DT_INIVIGENCIA>01/01/2000</AGN_DT_INIVIGENCIA>\n{chr(10).join(linhas_marcadas)}\n  </Fiscal>"""
-
-    def _gerar_bloco_agente_id(self):
-        mapa_tipo_agente = {
-            "cliente": "C",
-            "fornecedor": "F",
-            "representante": "R",
-            "contato": "E",
-            "transportadora": "T",
-            "obrigacao": "S",
-            "colaborador": "U",
-            "outros": "O",
-            "obra": "B",
-            "sindicato": "D",
-        }
-        return "".join(
-            [
-                f"""\n    <AgenteId OPERACAO="I"><AGN_TAU_ST_CODIGO>{campo_xml(mapa_tipo_agente.get(nome, ""))}</AGN_TAU_ST_CODIGO></AgenteId>"""
-                for nome, var in self.tipo_agente_vars.items()
-                if var.get()
-            ]
-        )
+    def on_gerar_e_enviar(self):
+        """
+        Leva o modelo da tela para a Ferramenta SOAP, que gera um agente
+        novo (nome e CPF/CNPJ próprios) a cada envio.
+        """
+        try:
+            modelo = self._coletar_modelo()
+            if not all([modelo["municipio"], modelo["estado"], modelo["filial"]]):
+                messagebox.showerror(
+                    "Erro de Validação",
+                    "Preencha os campos obrigatórios:\n- Estado\n- Município\n- Código da Filial",
+                )
+                return
+            modelo = completar_modelo(modelo)
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao Gerar XML", f"Ocorreu um erro inesperado:\n\n{e}"
+            )
+            return
+        self.controller.frames["FerramentaSOAP"].usar_modelo_agentes(modelo)
+        self.controller.show_frame("FerramentaSOAP")
 
 
 # MUDANÇA 6: O bloco if __name__ == "__main__" foi removido, pois este arquivo
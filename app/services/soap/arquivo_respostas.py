@@ -0,0 +1,161 @@
+# app/services/soap/arquivo_respostas.py
+
+import os
+import struct
+import threading
+import zlib
+
+from app.services.soap.estatisticas import STATUS_RESULTADO
+
+# Pasta padrão dos arquivos de respostas (relativa, como a pasta de logs).
+PASTA_RESPOSTAS = "respostas"
+
+# Registro do índice: nº do envio, status, latência (µs), posição e tamanho
+# do bloco comprimido no .dat e CodTransacao (UTF-8, completado com zeros).
+_REGISTRO_INDICE = struct.Struct("<IBIQI24s")
+_LATENCIA_MAXIMA_US = 2**32 - 1
+
+
+class ArquivoRespostas:
+    """
+    Arquivo somente-anexação com as respostas de uma execução.
+
+    Cada resposta é comprimida sozinha (zlib) e anexada ao arquivo `.dat`;
+    o arquivo `.idx` guarda um registro de tamanho fixo por resposta. Só o
+    índice fica em memória, então qualquer resposta é lida com um seek e a
+    descompressão de um único bloco, sem carregar o arquivo todo.
+    """
+
+    def __init__(self, caminho, somente_falhas=False, nivel_compressao=1):
+        """
+        :param caminho: Caminho sem extensão; são criados `caminho.dat` e `caminho.idx`.
+                        Se já existirem, o índice é carregado e os novos envios
+                        são anexados.
+        :param somente_falhas: Guarda só os envios sem status 'sucesso'.
+        :param nivel_compressao: Nível do zlib (1 = mais rápido).
+        """
+        self.caminho = caminho
+        self.somente_falhas = somente_falhas
+        self.nivel_compressao = nivel_compressao
+        self._lock = threading.Lock()
+        self._posicoes = {}
+        self._fechado = False
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._carregar_indice()
+        self._dados = open(caminho + ".dat", "ab")
+        self._indice = open(caminho + ".idx", "ab")
+        self._leitura = open(caminho + ".dat", "rb")
+
+    def __len__(self):
+        return len(self._posicoes)
+
+    def __contains__(self, indice):
+        return indice in self._posicoes
+
+    def indices(self):
+        """Números dos envios guardados, em ordem crescente."""
+        return sorted(self._posicoes)
+
+    def registrar(self, resultado):
+        """
+        Anexa um resultado já classificado (ver MotorEnvio._receber).
+
+        Pode ser chamado de várias threads. Em erro de conexão é guardada a
+        mensagem do erro no lugar do XML.
+
+        :return: True se o resultado foi guardado.
+        """
+        if self.somente_falhas and resultado["status"] == "sucesso":
+            return False
+        texto = resultado["texto"] if resultado["erro"] is None else resultado["erro"]
+        bloco = zlib.compress((texto or "").encode("utf-8"), self.nivel_compressao)
+        latencia_us = min(int(resultado["latencia"] * 1_000_000), _LATENCIA_MAXIMA_US)
+        cod_transacao = (resultado.get("cod_transacao") or "").encode("utf-8")[:24]
+        status = STATUS_RESULTADO.index(resultado["status"])
+
+        with self._lock:
+            # Um worker atrasado pode entregar depois do fechamento.
+            if self._fechado:
+                return False
+            posicao = self._dados.tell()
+            self._dados.write(bloco)
+            self._indice.write(
+                _REGISTRO_INDICE.pack(
+                    resultado["indice"],
+                    status,
+                    latencia_us,
+                    posicao,
+                    len(bloco),
+                    cod_transacao,
+                )
+            )
+            self._posicoes[resultado["indice"]] = (
+                posicao,
+                len(bloco),
+                status,
+                latencia_us,
+                cod_transacao,
+            )
+        return True
+
+    def ler(self, indice):
+        """
+        Lê a resposta de um envio.
+
+        :return: dict com 'indice', 'status', 'latencia', 'cod_transacao' e
+                 'texto', ou None se o envio não foi guardado.
+        """
+        with self._lock:
+            posicao = self._posicoes.get(indice)
+            if posicao is None or self._fechado:
+                return None
+            offset, tamanho, status, latencia_us, cod_transacao = posicao
+            self._dados.flush()
+            self._leitura.seek(offset)
+            bloco = self._leitura.read(tamanho)
+        return {
+            "indice": indice,
+            "status": STATUS_RESULTADO[status],
+            "latencia": latencia_us / 1_000_000,
+            "cod_transacao": (
+                cod_transacao.rstrip(b"\0").decode("utf-8", "ignore") or None
+            ),
+            "texto": zlib.decompress(bloco).decode("utf-8"),
+        }
+
+    def resumo(self):
+        return {
+            "caminho": self.caminho + ".dat",
+            "respostas": len(self._posicoes),
+            "somente_falhas": self.somente_falhas,
+        }
+
+    def fechar(self):
+        with self._lock:
+            self._fechado = True
+            for arquivo in (self._dados, self._indice, self._leitura):
+                arquivo.close()
+
+    def _carregar_indice(self):
+        try:
+            with open(self.caminho + ".idx", "rb") as arquivo:
+                conteudo = arquivo.read()
+        except FileNotFoundError:
+            return
+        # Um registro incompleto no fim (execução abortada) é descartado.
+        fim = len(conteudo) - len(conteudo) % _REGISTRO_INDICE.size
+        if fim != len(conteudo):
+            with open(self.caminho + ".idx", "r+b") as arquivo:
+                arquivo.truncate(fim)
+        for campos in _REGISTRO_INDICE.iter_unpack(conteudo[:fim]):
+            indice, status, latencia_us, offset, tamanho, cod_transacao = campos
+            self._posicoes[indice] = (
+                offset,
+                tamanho,
+                status,
+                latencia_us,
+                cod_transacao,
+            )
@@ -0,0 +1,220 @@
+# app/services/soap/balanceamento.py
+
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from app.services.soap.estatisticas import HistogramaLatencia
+
+ESTRATEGIAS = ("Round-robin", "Menos pendentes", "Ponderado")
+
+
+class Endpoint:
+    """Uma instância do integrador, com seu peso e seus contadores."""
+
+    def __init__(self, url, peso=1):
+        self.url = url
+        self.peso = max(1, int(peso))
+        partes = urlsplit(url)
+        self.host = partes.hostname
+        self.porta = partes.port or (443 if partes.scheme == "https" else 80)
+
+        self.em_andamento = 0
+        self.falhas_seguidas = 0
+        self.ejetado_ate = None
+        self.ejecoes = 0
+        self.peso_corrente = 0
+        self.requisicoes = 0
+        self.erros = 0
+        self.histograma = HistogramaLatencia()
+
+    def resumo(self, duracao):
+        return {
+            "url": self.url,
+            "peso": self.peso,
+            "requisicoes": self.requisicoes,
+            "erros": self.erros,
+            "vazao_rps": round(self.requisicoes / duracao, 2) if duracao > 0 else 0.0,
+            "latencia_ms": {
+                "p50": round(self.histograma.percentil(50) * 1000, 2),
+                "p90": round(self.histograma.percentil(90) * 1000, 2),
+                "p99": round(self.histograma.percentil(99) * 1000, 2),
+            },
+            "ejecoes": self.ejecoes,
+        }
+
+    def mesclar(self, outro):
+        """Soma os contadores de outra cópia desta instância (outro processo)."""
+        self.requisicoes += outro.requisicoes
+        self.erros += outro.erros
+        self.ejecoes += outro.ejecoes
+        self.histograma.mesclar(outro.histograma)
+
+
+class BalanceadorEndpoints:
+    """
+    Distribui os envios entre várias instâncias do integrador.
+
+    Estratégias:
+        - Round-robin: uma de cada vez, em ordem.
+        - Menos pendentes: a instância com menos requisições em andamento.
+        - Ponderado: round-robin suave proporcional ao peso de cada uma.
+
+    Uma instância é ejetada (deixa de receber envios) após
+    `falhas_para_ejetar` falhas de conexão seguidas ou quando a verificação
+    de saúde (conexão TCP a cada `intervalo_verificacao` segundos) falha. Ela
+    volta após `tempo_ejecao` segundos ou, com a verificação ligada, assim
+    que a verificação passar. Se todas estiverem ejetadas, os envios seguem
+    para todas, para não parar a execução.
+    """
+
+    def __init__(
+        self,
+        endpoints,
+        estrategia="Round-robin",
+        falhas_para_ejetar=3,
+        tempo_ejecao=10.0,
+        intervalo_verificacao=0,
+    ):
+        """
+        :param endpoints: Lista de `(url, peso)`.
+        :param estrategia: Uma de ESTRATEGIAS.
+        :param falhas_para_ejetar: Falhas seguidas que ejetam (0 = nunca).
+        :param tempo_ejecao: Segundos até uma instância ejetada voltar.
+        :param intervalo_verificacao: Segundos entre as verificações de saúde
+                                      (0 = sem verificação ativa).
+        """
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Estratégia de balanceamento desconhecida: {estrategia}")
+        if not endpoints:
+            raise ValueError("Informe ao menos um endpoint.")
+        self.endpoints = [Endpoint(url, peso) for url, peso in endpoints]
+        self.estrategia = estrategia
+        self.falhas_para_ejetar = falhas_para_ejetar
+        self.tempo_ejecao = tempo_ejecao
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._proximo = 0
+        self._verificacao = None
+
+    def __getstate__(self):
+        # Para ir a outros processos (ver multiprocesso.py): sem lock nem a
+        # verificação de saúde em andamento.
+        estado = self.__dict__.copy()
+        del estado["_lock"]
+        estado["_verificacao"] = None
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def escolher(self):
+        """Reserva e retorna o Endpoint do próximo envio (ver `liberar`)."""
+        with self._lock:
+            agora = time.perf_counter()
+            disponiveis = [e for e in self.endpoints if not self._ejetado(e, agora)]
+            candidatos = disponiveis or self.endpoints
+
+            if self.estrategia == "Menos pendentes":
+                # Empates são desfeitos em rodízio, para não favorecer a primeira.
+                self._proximo += 1
+                deslocamento = self._proximo % len(candidatos)
+                ordem = candidatos[deslocamento:] + candidatos[:deslocamento]
+                endpoint = min(ordem, key=lambda e: e.em_andamento)
+            elif self.estrategia == "Ponderado":
+                total = sum(e.peso for e in candidatos)
+                for e in candidatos:
+                    e.peso_corrente += e.peso
+                endpoint = max(candidatos, key=lambda e: e.peso_corrente)
+                endpoint.peso_corrente -= total
+            else:
+                endpoint = candidatos[self._proximo % len(candidatos)]
+                self._proximo += 1
+
+            endpoint.em_andamento += 1
+            return endpoint
+
+    def liberar(self, endpoint, sucesso, duracao=None):
+        """
+        Devolve o Endpoint reservado por `escolher`.
+
+        :param sucesso: False em falha de conexão, timeout ou HTTP 5xx.
+        :param duracao: Tempo da requisição, em segundos (None se não houve resposta).
+        """
+        with self._lock:
+            endpoint.em_andamento -= 1
+            endpoint.requisicoes += 1
+            if duracao is not None:
+                endpoint.histograma.registrar(duracao)
+            if sucesso:
+                endpoint.falhas_seguidas = 0
+                return
+            endpoint.erros += 1
+            endpoint.falhas_seguidas += 1
+            if (
+                self.falhas_para_ejetar
+                and endpoint.falhas_seguidas >= self.falhas_para_ejetar
+                and endpoint.ejetado_ate is None
+            ):
+                self._ejetar(endpoint)
+
+    def iniciar_verificacao(self, deve_interromper, timeout=2.0):
+        """
+        Abre uma conexão TCP com cada instância a cada `intervalo_verificacao`
+        segundos, numa thread daemon que para com `deve_interromper` ou com
+        `parar_verificacao`. Não faz nada se a verificação estiver desligada.
+        """
+        if not self.intervalo_verificacao:
+            return
+        parar = threading.Event()
+
+        def verificar():
+            while not (parar.is_set() or deve_interromper.is_set()):
+                for endpoint in self.endpoints:
+                    saudavel = self._responde(endpoint, timeout)
+                    with self._lock:
+                        if saudavel:
+                            endpoint.ejetado_ate = None
+                            endpoint.falhas_seguidas = 0
+                        elif endpoint.ejetado_ate is None:
+                            self._ejetar(endpoint)
+                if parar.wait(self.intervalo_verificacao):
+                    return
+
+        self._verificacao = parar
+        threading.Thread(target=verificar, daemon=True).start()
+
+    def parar_verificacao(self):
+        if self._verificacao is not None:
+            self._verificacao.set()
+
+    def resumo(self, duracao):
+        with self._lock:
+            return [endpoint.resumo(duracao) for endpoint in self.endpoints]
+
+    def _ejetado(self, endpoint, agora):
+        if endpoint.ejetado_ate is None:
+            return False
+        if agora >= endpoint.ejetado_ate:
+            endpoint.ejetado_ate = None
+            endpoint.falhas_seguidas = 0
+            return False
+        return True
+
+    def _ejetar(self, endpoint):
+        endpoint.ejecoes += 1
+        endpoint.ejetado_ate = time.perf_counter() + self.tempo_ejecao
+
+    @staticmethod
+    def _responde(endpoint, timeout):
+        try:
+            with socket.create_connection((endpoint.host, endpoint.porta), timeout):
+                return True
+        except OSError:
+            return False
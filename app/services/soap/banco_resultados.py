@@ -0,0 +1,364 @@
+# app/services/soap/banco_resultados.py
+
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+from app.services.soap.estatisticas import STATUS_RESULTADO
+
+# Banco padrão (relativo, como as pastas de logs e do histórico).
+ARQUIVO_BANCO = "resultados.db"
+
+# Filtro de status que junta todos os que não são sucesso.
+STATUS_FALHAS = "falhas"
+
+# Linhas acumuladas antes de cada transação de inserção.
+TAMANHO_LOTE_GRAVACAO = 5000
+# Espera máxima de uma linha na memória antes de ser gravada (s).
+INTERVALO_GRAVACAO = 0.5
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    rotulo TEXT NOT NULL DEFAULT '',
+    descricao TEXT NOT NULL DEFAULT '',
+    id_historico TEXT,
+    resultados INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS mensagens (
+    hash INTEGER PRIMARY KEY,
+    texto TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resultados (
+    execucao INTEGER NOT NULL,
+    envio INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    cod_transacao TEXT,
+    hash_mensagem INTEGER,
+    latencia_ms REAL NOT NULL,
+    tentativas INTEGER NOT NULL,
+    endpoint TEXT,
+    origem TEXT,
+    PRIMARY KEY (execucao, envio)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_resultados_status
+    ON resultados (execucao, status, hash_mensagem);
+CREATE INDEX IF NOT EXISTS idx_resultados_mensagem
+    ON resultados (hash_mensagem, status);
+CREATE INDEX IF NOT EXISTS idx_resultados_cod_transacao
+    ON resultados (cod_transacao);
+"""
+
+# Sinal de fim para a thread de gravação.
+_FIM = object()
+
+
+def hash_mensagem(texto):
+    """
+    Hash de 64 bits (com sinal, como o INTEGER do SQLite) de uma mensagem.
+
+    Mensagens iguais têm o mesmo hash em qualquer processo ou execução; o
+    texto fica uma vez só na tabela `mensagens`.
+    """
+    if texto is None:
+        return None
+    digest = hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _conectar(caminho):
+    conexao = sqlite3.connect(caminho)
+    conexao.row_factory = sqlite3.Row
+    # Em WAL as consultas da tela não esperam a gravação (nem o contrário).
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    return conexao
+
+
+class BancoResultados:
+    """
+    Banco SQLite com o resultado interpretado de cada envio de cada execução.
+
+    Cada linha guarda execução, nº do envio, status, CodTransacao, o hash da
+    mensagem (o texto fica na tabela `mensagens`), latência, tentativas,
+    endpoint e origem. Os índices por execução/status/mensagem e por
+    CodTransacao deixam consultas como "todas as falhas com a mensagem X na
+    execução Y" instantâneas mesmo com milhões de linhas.
+
+    A gravação de uma execução é feita por um GravadorResultados (ver
+    `nova_execucao`); as consultas abrem uma conexão própria, então podem
+    rodar durante a gravação.
+    """
+
+    def __init__(self, caminho=ARQUIVO_BANCO):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with self._conexao() as conexao:
+            conexao.executescript(_ESQUEMA)
+
+    def nova_execucao(self, rotulo="", descricao=""):
+        """Registra uma execução e retorna o GravadorResultados dela."""
+        with self._conexao() as conexao:
+            cursor = conexao.execute(
+                "INSERT INTO execucoes (data, rotulo, descricao) VALUES (?, ?, ?)",
+                (datetime.now().isoformat(timespec="seconds"), rotulo, descricao),
+            )
+            id_execucao = cursor.lastrowid
+        return GravadorResultados(self.caminho, id_execucao)
+
+    def listar_execucoes(self):
+        """Execuções gravadas, da mais recente para a mais antiga."""
+        with self._conexao() as conexao:
+            return [
+                dict(linha)
+                for linha in conexao.execute("SELECT * FROM execucoes ORDER BY id DESC")
+            ]
+
+    def consultar(
+        self,
+        execucao=None,
+        status=None,
+        mensagem=None,
+        contem=None,
+        cod_transacao=None,
+        limite=1000,
+    ):
+        """
+        Resultados que atendem a todos os filtros informados, na ordem dos envios.
+
+        :param execucao: Id da execução (ver `listar_execucoes`).
+        :param status: Um de STATUS_RESULTADO ou STATUS_FALHAS.
+        :param mensagem: Mensagem exata (comparada pelo hash, pelo índice).
+        :param contem: Trecho da mensagem; procurado só entre as mensagens
+                       distintas, que são poucas.
+        :param cod_transacao: CodTransacao exato.
+        :param limite: Máximo de linhas retornadas (None = todas).
+        :return: Lista de dicts com as colunas de `resultados` e 'mensagem'.
+        """
+        with self._conexao() as conexao:
+            onde, argumentos = self._filtros(
+                conexao, execucao, status, mensagem, contem, cod_transacao
+            )
+            sql = (
+                "SELECT r.*, m.texto AS mensagem FROM resultados r "
+                "LEFT JOIN mensagens m ON m.hash = r.hash_mensagem"
+                f"{onde} ORDER BY r.execucao, r.envio"
+            )
+            if limite is not None:
+                sql += " LIMIT ?"
+                argumentos.append(limite)
+            return [dict(linha) for linha in conexao.execute(sql, argumentos)]
+
+    def contar(
+        self, execucao=None, status=None, mensagem=None, contem=None, cod_transacao=None
+    ):
+        """Quantos resultados atendem aos filtros (os mesmos de `consultar`)."""
+        with self._conexao() as conexao:
+            onde, argumentos = self._filtros(
+                conexao, execucao, status, mensagem, contem, cod_transacao
+            )
+            return conexao.execute(
+                f"SELECT COUNT(*) FROM resultados r{onde}", argumentos
+            ).fetchone()[0]
+
+    def mensagens(self, execucao=None, status=None, limite=50):
+        """
+        Mensagens mais frequentes (com a contagem) entre os resultados da
+        execução e do status informados; usado para escolher o filtro.
+        """
+        with self._conexao() as conexao:
+            onde, argumentos = self._filtros(conexao, execucao, status)
+            sql = (
+                "SELECT m.texto AS mensagem, t.quantidade FROM ("
+                "SELECT r.hash_mensagem, COUNT(*) AS quantidade FROM resultados r"
+                f"{onde} GROUP BY r.hash_mensagem) t "
+                "JOIN mensagens m ON m.hash = t.hash_mensagem "
+                "ORDER BY t.quantidade DESC LIMIT ?"
+            )
+            return [
+                dict(linha) for linha in conexao.execute(sql, [*argumentos, limite])
+            ]
+
+    def _conexao(self):
+        return _ConexaoTemporaria(self.caminho)
+
+    @staticmethod
+    def _filtros(
+        conexao,
+        execucao=None,
+        status=None,
+        mensagem=None,
+        contem=None,
+        cod_transacao=None,
+    ):
+        condicoes = []
+        argumentos = []
+        if execucao is not None:
+            condicoes.append("r.execucao = ?")
+            argumentos.append(int(execucao))
+        if status == STATUS_FALHAS:
+            falhas = [s for s in STATUS_RESULTADO if s != "sucesso"]
+            condicoes.append(f"r.status IN ({', '.join('?' * len(falhas))})")
+            argumentos.extend(falhas)
+        elif status is not None:
+            condicoes.append("r.status = ?")
+            argumentos.append(status)
+        if mensagem is not None:
+            condicoes.append("r.hash_mensagem = ?")
+            argumentos.append(hash_mensagem(mensagem))
+        if contem:
+            hashes = [
+                linha[0]
+                for linha in conexao.execute(
+                    "SELECT hash FROM mensagens WHERE instr(texto, ?) > 0", (contem,)
+                )
+            ]
+            # Nenhuma mensagem com o trecho: IN () vazio não casa nada.
+            condicoes.append(f"r.hash_mensagem IN ({', '.join('?' * len(hashes))})")
+            argumentos.extend(hashes)
+        if cod_transacao is not None:
+            condicoes.append("r.cod_transacao = ?")
+            argumentos.append(cod_transacao)
+        if not condicoes:
+            return "", argumentos
+        return " WHERE " + " AND ".join(condicoes), argumentos
+
+
+class _ConexaoTemporaria:
+    """Conexão aberta num `with` e fechada na saída (commit se não houve erro)."""
+
+    def __init__(self, caminho):
+        self.conexao = _conectar(caminho)
+
+    def __enter__(self):
+        return self.conexao
+
+    def __exit__(self, tipo, *_):
+        try:
+            if tipo is None:
+                self.conexao.commit()
+        finally:
+            self.conexao.close()
+
+
+class GravadorResultados:
+    """
+    Grava no BancoResultados os resultados de uma execução.
+
+    `registrar` só enfileira o lote (é chamado pelo motor, de qualquer
+    thread); uma thread própria converte os resultados em linhas e as grava
+    em transações de até TAMANHO_LOTE_GRAVACAO linhas, com `executemany`.
+    Quem cria é quem fecha (`fechar` grava o que faltou).
+    """
+
+    def __init__(
+        self,
+        caminho,
+        id_execucao,
+        tamanho_lote=TAMANHO_LOTE_GRAVACAO,
+        intervalo=INTERVALO_GRAVACAO,
+    ):
+        self.caminho = caminho
+        self.id = id_execucao
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.gravados = 0
+        self.erro = None
+        self._fila = queue.Queue()
+        self._fechado = False
+        self._thread = threading.Thread(target=self._gravar, daemon=True)
+        self._thread.start()
+
+    def registrar(self, lote):
+        """Enfileira um lote de resultados já classificados (ver MotorEnvio)."""
+        if not self._fechado:
+            self._fila.put(lote)
+
+    def fechar(self, id_historico=None):
+        """
+        Grava os lotes pendentes e encerra a thread de gravação.
+
+        :param id_historico: Id da execução no HistoricoExecucoes, guardado
+                             junto da execução no banco.
+        """
+        if self._fechado:
+            return
+        self._fechado = True
+        self._fila.put(_FIM)
+        self._thread.join()
+        with _ConexaoTemporaria(self.caminho) as conexao:
+            conexao.execute(
+                "UPDATE execucoes SET id_historico = ?, resultados = ? WHERE id = ?",
+                (id_historico, self.gravados, self.id),
+            )
+
+    def resumo(self):
+        # Os lotes ainda na fila só são contados em `gravados` depois de `fechar`.
+        return {"caminho": self.caminho, "execucao": self.id, "erro": self.erro}
+
+    def _gravar(self):
+        conexao = _conectar(self.caminho)
+        mensagens_gravadas = set()
+        linhas = []
+        mensagens = []
+        try:
+            while True:
+                try:
+                    lote = self._fila.get(timeout=self.intervalo)
+                except queue.Empty:
+                    lote = None
+                if lote is not None and lote is not _FIM:
+                    for resultado in lote:
+                        linha, mensagem = self._linha(resultado)
+                        linhas.append(linha)
+                        if mensagem is not None and linha[4] not in mensagens_gravadas:
+                            mensagens_gravadas.add(linha[4])
+                            mensagens.append((linha[4], mensagem))
+                    if len(linhas) < self.tamanho_lote:
+                        continue
+                if linhas and self.erro is None:
+                    self._inserir(conexao, linhas, mensagens)
+                linhas = []
+                mensagens = []
+                if lote is _FIM:
+                    break
+        finally:
+            conexao.close()
+
+    def _inserir(self, conexao, linhas, mensagens):
+        try:
+            with conexao:
+                conexao.executemany(
+                    "INSERT OR IGNORE INTO mensagens (hash, texto) VALUES (?, ?)",
+                    mensagens,
+                )
+                conexao.executemany(
+                    "INSERT OR REPLACE INTO resultados VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    linhas,
+                )
+            self.gravados += len(linhas)
+        except sqlite3.Error as e:
+            # Disco cheio ou banco travado: a execução segue sem o banco.
+            self.erro = str(e)
+
+    def _linha(self, resultado):
+        mensagem = resultado["erro"] or resultado["mensagem"]
+        linha = (
+            self.id,
+            resultado["indice"],
+            resultado["status"],
+            resultado["cod_transacao"],
+            hash_mensagem(mensagem),
+            round(resultado["latencia"] * 1000, 3),
+            resultado["tentativas"],
+            resultado["endpoint"],
+            None if resultado["origem"] is None else str(resultado["origem"]),
+        )
+        return linha, mensagem
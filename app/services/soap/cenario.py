@@ -0,0 +1,314 @@
+# app/services/soap/cenario.py
+
+import json
+import os
+
+from app.services.soap.consulta_transacoes import ListaTransacoes
+from app.services.soap.corpus import CorpusPayloads
+from app.services.soap.envelope import ModeloEnvelope
+from app.services.soap.motor_envio import validar_parametros
+from app.services.serviço_207.agente_207 import GeradorAgentes
+
+# Origens possíveis dos payloads de um serviço do cenário.
+ORIGENS_SERVICO = ("payload", "corpus", "transacoes", "agentes")
+# Campos dos parâmetros que o cenário pode definir para todos os serviços.
+CAMPOS_PADRAO = ("usu_codigo", "sistema", "obs")
+
+
+class ServicoCenario:
+    """
+    Um serviço (pPRO_IN_ID) do cenário: parâmetros, origem dos payloads e
+    peso ou taxa na mistura.
+
+    `registros()` percorre a origem sem fim (um corpus ou uma lista de
+    transações recomeça ao chegar ao fim) e só lê o necessário para saber
+    o próximo registro; `montar` gera o envelope de um registro. Assim
+    cada processo avança a origem em todas as posições, mas só monta as
+    suas.
+    """
+
+    def __init__(self, dados, padroes, pasta_base):
+        """
+        :param dados: dict do serviço no arquivo do cenário.
+        :param padroes: Parâmetros comuns do cenário (ver CAMPOS_PADRAO).
+        :param pasta_base: Pasta dos caminhos relativos (a do arquivo).
+        """
+        if not isinstance(dados, dict) or not dados.get("pro_id"):
+            raise ValueError("Cada serviço do cenário precisa de 'pro_id'.")
+        self.nome = str(dados.get("nome") or dados["pro_id"])
+        # `"agentes": {}` (modelo padrão) também conta como origem.
+        origens = [
+            origem
+            for origem in ORIGENS_SERVICO
+            if dados.get(origem) not in (None, "", False)
+        ]
+        if len(origens) > 1:
+            raise ValueError(
+                f"Serviço '{self.nome}': use só uma origem de payloads "
+                f"({', '.join(ORIGENS_SERVICO)})."
+            )
+        self.origem = origens[0] if origens else None
+        self.peso = dados.get("peso")
+        self.taxa = dados.get("taxa")
+        for campo in ("peso", "taxa"):
+            valor = dados.get(campo)
+            if valor is not None and (
+                not isinstance(valor, (int, float)) or valor <= 0
+            ):
+                raise ValueError(
+                    f"Serviço '{self.nome}': '{campo}' deve ser um número positivo."
+                )
+
+        def caminho(chave):
+            return os.path.join(pasta_base, dados[chave])
+
+        payload = ""
+        self.corpus = self.transacoes = self.modelo_agentes = None
+        self.gerador = None
+        try:
+            if self.origem == "payload":
+                with open(caminho("payload"), encoding="utf-8") as arquivo:
+                    payload = arquivo.read().strip()
+            elif self.origem == "corpus":
+                self.corpus = CorpusPayloads(
+                    caminho("corpus"), dados.get("formato_corpus")
+                )
+            elif self.origem == "transacoes":
+                self.transacoes = ListaTransacoes(caminho("transacoes"))
+            elif self.origem == "agentes":
+                self.modelo_agentes = dados["agentes"]
+                if not isinstance(self.modelo_agentes, dict):
+                    # `"agentes": true` usa o modelo padrão da tela 207.
+                    self.modelo_agentes = {}
+        except OSError as e:
+            raise ValueError(f"Serviço '{self.nome}': {e}")
+
+        self.parametros = {
+            **{campo: padroes.get(campo, "") for campo in CAMPOS_PADRAO},
+            **{campo: dados[campo] for campo in CAMPOS_PADRAO if campo in dados},
+            "pro_id": str(dados["pro_id"]),
+            "payload": payload,
+            "transacao": str(dados.get("transacao", "0")),
+        }
+        try:
+            validar_parametros(
+                self.parametros,
+                com_corpus=self.origem in ("corpus", "agentes"),
+                com_transacoes=self.origem == "transacoes",
+            )
+        except ValueError as e:
+            raise ValueError(f"Serviço '{self.nome}': {e}")
+        self.modelo_envelope = ModeloEnvelope(self.parametros)
+
+    def registros(self):
+        """
+        Gera, sem fim, o registro de cada envio do serviço: None (payload
+        dos parâmetros), `(origem, payload)` do corpus, `(codigo, codigo)`
+        da lista de transações ou a posição do agente a gerar.
+        """
+        if self.origem == "agentes":
+            posicao = 0
+            while True:
+                posicao += 1
+                yield posicao
+        lista = self.corpus if self.origem == "corpus" else self.transacoes
+        if lista is None:
+            while True:
+                yield None
+        while True:
+            vazio = True
+            for registro in lista:
+                vazio = False
+                yield registro
+            if vazio:
+                raise ValueError(f"Serviço '{self.nome}': a origem está vazia.")
+
+    def montar(self, indice, registro):
+        """`(origem, corpo)` do envio `indice` a partir de um registro."""
+        if self.origem == "agentes":
+            if self.gerador is None:
+                raise ValueError(f"Serviço '{self.nome}': geração não preparada.")
+            if registro > self.gerador.quantidade:
+                raise ValueError(f"Serviço '{self.nome}': agentes esgotados.")
+            try:
+                origem, xml = self.gerador.gerar(registro)
+            except Exception as e:
+                # Como na FilaGeracao: a falha encerra a execução como erro_corpus.
+                raise ValueError(
+                    f"Serviço '{self.nome}': falha ao gerar o envio {indice}: "
+                    f"{str(e) or type(e).__name__}"
+                )
+            return origem, self.modelo_envelope.montar(indice, xml)
+        if registro is None:
+            return None, self.modelo_envelope.montar(indice)
+        origem, payload = registro
+        if self.origem == "transacoes":
+            return origem, self.modelo_envelope.montar(indice, transacao=payload)
+        return origem, self.modelo_envelope.montar(indice, payload)
+
+    def resumo(self):
+        resumo = {
+            "pro_id": self.parametros["pro_id"],
+            "usu_codigo": self.parametros["usu_codigo"],
+            "sistema": self.parametros["sistema"],
+            "origem": self.origem or "parâmetros",
+        }
+        if self.corpus is not None:
+            resumo["corpus"] = self.corpus.resumo()
+        if self.transacoes is not None:
+            resumo["transacoes"] = self.transacoes.resumo()
+        if self.gerador is not None:
+            resumo["agentes"] = self.gerador.descricao()
+        return resumo
+
+
+class CenarioCarga:
+    """
+    Mistura de serviços de uma execução, lida de um arquivo JSON:
+
+        {
+          "nome": "produção",
+          "usu_codigo": "0001", "sistema": "001",
+          "servicos": [
+            {"nome": "agentes", "pro_id": "0207", "peso": 6, "agentes": {}},
+            {"nome": "pedidos", "pro_id": "0305", "peso": 3,
+             "corpus": "pedidos.jsonl"},
+            {"nome": "consultas", "pro_id": "0207", "peso": 1,
+             "transacoes": "codigos.txt"}
+          ]
+        }
+
+    Cada serviço tem 'pro_id' e, opcionalmente, 'nome', 'usu_codigo',
+    'sistema' e 'obs' (os do cenário valem como padrão) e uma origem dos
+    payloads: 'payload' (arquivo com o XML fixo), 'corpus' (com
+    'formato_corpus' opcional), 'transacoes' (consulta em lote) ou 'agentes'
+    (modelo da tela 207; um agente novo por envio). Sem origem, o envio usa
+    só os parâmetros ('transacao' do serviço). Os caminhos são relativos ao
+    arquivo do cenário.
+
+    A mistura é dada por 'peso' em todos os serviços (cada um recebe a sua
+    fração dos envios, com a carga da execução) ou por 'taxa' em todos
+    (req/s de cada um; a execução vira carga aberta à soma das taxas). Os
+    envios são intercalados por round-robin suave ponderado (o mesmo do
+    balanceamento "Ponderado"): cada serviço recebe a sua parte espalhada
+    pela execução, sem rajadas de um serviço só.
+    """
+
+    def __init__(self, dados, caminho=None):
+        """
+        :param dados: Conteúdo do arquivo do cenário.
+        :param caminho: Arquivo de onde veio (base dos caminhos relativos).
+        """
+        if not isinstance(dados, dict) or not dados.get("servicos"):
+            raise ValueError("O cenário precisa de uma lista 'servicos'.")
+        self.caminho = caminho
+        self.nome = dados.get("nome") or (
+            os.path.basename(caminho) if caminho else "cenário"
+        )
+        pasta_base = os.path.dirname(os.path.abspath(caminho)) if caminho else "."
+        padroes = {"usu_codigo": "0001", "sistema": "001", "obs": ""}
+        padroes.update(
+            {campo: dados[campo] for campo in CAMPOS_PADRAO if campo in dados}
+        )
+        self.servicos = [
+            ServicoCenario(servico, padroes, pasta_base)
+            for servico in dados["servicos"]
+        ]
+        nomes = [servico.nome for servico in self.servicos]
+        repetidos = sorted({nome for nome in nomes if nomes.count(nome) > 1})
+        if repetidos:
+            raise ValueError(
+                f"Nomes de serviço repetidos no cenário: {', '.join(repetidos)} "
+                "(use 'nome' para diferenciá-los)."
+            )
+        com_taxa = [servico.taxa is not None for servico in self.servicos]
+        com_peso = [servico.peso is not None for servico in self.servicos]
+        if all(com_taxa) and not any(com_peso):
+            self.por_taxa = True
+        elif not any(com_taxa):
+            self.por_taxa = False
+            for servico in self.servicos:
+                servico.peso = servico.peso or 1
+        else:
+            raise ValueError(
+                "No cenário, informe 'taxa' em todos os serviços ou em nenhum "
+                "(e, então, 'peso')."
+            )
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Lê o cenário de um arquivo JSON; ValueError se for inválido."""
+        try:
+            with open(caminho, encoding="utf-8-sig") as arquivo:
+                dados = json.load(arquivo)
+        except OSError as e:
+            raise ValueError(f"Não foi possível ler o cenário: {e}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Cenário inválido ({caminho}): {e}")
+        return cls(dados, caminho)
+
+    def taxa_total(self):
+        """Soma das taxas (req/s) dos serviços; None num cenário por peso."""
+        if not self.por_taxa:
+            return None
+        return sum(servico.taxa for servico in self.servicos)
+
+    def fracoes(self):
+        """Fração esperada dos envios de cada serviço, pelo nome."""
+        pesos = {
+            servico.nome: servico.taxa if self.por_taxa else servico.peso
+            for servico in self.servicos
+        }
+        total = sum(pesos.values())
+        return {nome: peso / total for nome, peso in pesos.items()}
+
+    def usa_agentes(self):
+        return any(servico.origem == "agentes" for servico in self.servicos)
+
+    def preparar(self, repeticoes):
+        """
+        Prepara a geração dos serviços de agentes para até `repeticoes`
+        envios. Chamado uma vez, antes da execução (e antes de dividi-la em
+        processos), para que todos gerem a partir da mesma base de
+        documentos. Pode consultar as APIs de localização (ver
+        agente_207.completar_modelo).
+        """
+        for servico in self.servicos:
+            if servico.origem == "agentes":
+                servico.gerador = GeradorAgentes(servico.modelo_agentes, repeticoes)
+
+    def sequencia(self):
+        """
+        Gera, sem fim, o serviço de cada envio, por round-robin suave
+        ponderado: o serviço com o maior peso corrente é escolhido e perde o
+        total dos pesos. A sequência é determinística, igual em todos os
+        processos.
+        """
+        pesos = [
+            servico.taxa if self.por_taxa else servico.peso for servico in self.servicos
+        ]
+        total = sum(pesos)
+        correntes = [0.0] * len(self.servicos)
+        while True:
+            for posicao, peso in enumerate(pesos):
+                correntes[posicao] += peso
+            escolhido = max(range(len(pesos)), key=correntes.__getitem__)
+            correntes[escolhido] -= total
+            yield self.servicos[escolhido]
+
+    def resumo(self):
+        fracoes = self.fracoes()
+        return {
+            "nome": self.nome,
+            "caminho": self.caminho,
+            "mistura": "taxa" if self.por_taxa else "peso",
+            "servicos": {
+                servico.nome: {
+                    **servico.resumo(),
+                    "peso": servico.peso,
+                    "taxa": servico.taxa,
+                    "fracao_esperada": round(fracoes[servico.nome], 4),
+                }
+                for servico in self.servicos
+            },
+        }
@@ -0,0 +1,243 @@
+# app/services/soap/concorrencia_adaptativa.py
+
+import math
+import threading
+import time
+
+ALGORITMOS_CONCORRENCIA = ("AIMD", "Gradiente")
+
+# Amostras mínimas de uma janela de ajuste (a janela cresce com o limite).
+MINIMO_AMOSTRAS = 10
+# Redução multiplicativa em erro ou acima do teto de latência.
+FATOR_REDUCAO = 0.9
+# Gradiente: folga aceita entre a latência recente e a de referência.
+TOLERANCIA_GRADIENTE = 1.5
+# Gradiente: peso do novo limite calculado sobre o atual.
+SUAVIZACAO_GRADIENTE = 0.2
+# Gradiente: janelas na média móvel da latência de referência.
+JANELAS_REFERENCIA = 600
+# Fração final da execução usada para o limite em que o controle estabilizou.
+FRACAO_ESTAVEL = 1 / 3
+
+
+class LimiteAdaptativo:
+    """
+    Limite de envios simultâneos ajustado durante a execução pela latência.
+
+    Os envios pedem vaga com `adquirir` e devolvem com `liberar`, que informa
+    o tempo de serviço. A cada janela de respostas (~uma volta do limite
+    atual) o limite é recalculado:
+
+        - AIMD: +1 se a janela usou o limite; x0,9 se houve erro de conexão
+          ou se o p90 da janela passou do teto de latência.
+        - Gradiente (como o Gradient2 do concurrency-limits): o limite é
+          multiplicado pela razão entre a latência de referência (média
+          longa) e a da janela, entre 0,5 e 1, mais uma folga de
+          sqrt(limite) para descobrir capacidade; mudanças são suavizadas.
+          Pela lei de Little, se a latência sobe com a vazão parada, os
+          envios a mais só estão na fila do integrador, e o limite cai.
+
+    O limite nunca passa de `maximo` (os 'Envios Simultâneos') nem fica
+    abaixo de 1, e só cresce quando ao menos metade dele está em uso.
+    """
+
+    def __init__(self, algoritmo="Gradiente", latencia_maxima=None, inicial=None):
+        """
+        :param algoritmo: Um de ALGORITMOS_CONCORRENCIA.
+        :param latencia_maxima: Teto para o p90 da latência, em segundos
+                                (None = sem teto).
+        :param inicial: Limite no início (None = o menor entre 10 e o máximo).
+        """
+        if algoritmo not in ALGORITMOS_CONCORRENCIA:
+            raise ValueError(f"Algoritmo de concorrência desconhecido: {algoritmo}")
+        if latencia_maxima is not None and latencia_maxima <= 0:
+            raise ValueError("O teto de latência deve ser positivo.")
+        self.algoritmo = algoritmo
+        self.latencia_maxima = latencia_maxima
+        self.inicial = inicial
+        self._condicao = threading.Condition()
+        self._resumos_processos = []
+        self.iniciar(1)
+
+    def __getstate__(self):
+        # Para ir a outros processos (ver multiprocesso.py); a Condition não é copiável.
+        estado = self.__dict__.copy()
+        del estado["_condicao"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._condicao = threading.Condition()
+
+    def iniciar(self, maximo):
+        """Zera o controle para uma execução com até `maximo` envios simultâneos."""
+        with self._condicao:
+            self.maximo = max(1, int(maximo))
+            inicial = self.inicial if self.inicial else min(10, self.maximo)
+            self.limite = float(min(max(1, inicial), self.maximo))
+            self.em_andamento = 0
+            self.ajustes = 0
+            self.reducoes_teto = 0
+            self.reducoes_erro = 0
+            self._latencias = []
+            self._erros = 0
+            self._pico = 0
+            self._referencia = None
+            self._janelas = 0
+            self._inicio = time.perf_counter()
+            self._historico = [(0.0, self.limite)]
+
+    def adquirir(self, espera=0.0):
+        """
+        Reserva uma vaga, esperando até `espera` segundos por ela.
+
+        :return: True se a vaga foi reservada (devolva com `liberar`).
+        """
+        with self._condicao:
+            if not self._condicao.wait_for(self._tem_vaga, espera):
+                return False
+            self.em_andamento += 1
+            self._pico = max(self._pico, self.em_andamento)
+            return True
+
+    def liberar(self, latencia, sucesso):
+        """
+        Devolve a vaga de um envio.
+
+        :param latencia: Tempo de serviço do envio, em segundos.
+        :param sucesso: False em erro de conexão/timeout (sem resposta).
+        """
+        with self._condicao:
+            self.em_andamento -= 1
+            if sucesso:
+                self._latencias.append(latencia)
+            else:
+                self._erros += 1
+            if len(self._latencias) + self._erros >= max(
+                MINIMO_AMOSTRAS, int(self.limite)
+            ):
+                self._ajustar()
+            self._condicao.notify(max(1, self.vagas_livres()))
+
+    def vagas_livres(self):
+        return max(0, int(self.limite) - self.em_andamento)
+
+    def atual(self):
+        return int(self.limite)
+
+    def mesclar(self, resumo):
+        """Junta o resumo do limite de um processo filho (ver multiprocesso.py)."""
+        self._resumos_processos.append(resumo)
+
+    def resumo(self):
+        if self._resumos_processos:
+            # Com vários processos, os limites de cada um se somam.
+            total = {
+                "algoritmo": self.algoritmo,
+                "latencia_maxima_ms": self._latencia_maxima_ms(),
+                "processos": len(self._resumos_processos),
+            }
+            for campo in (
+                "limite_final",
+                "limite_estavel",
+                "ajustes",
+                "reducoes_teto",
+                "reducoes_erro",
+            ):
+                total[campo] = round(
+                    sum(resumo[campo] for resumo in self._resumos_processos), 1
+                )
+            return total
+        with self._condicao:
+            return {
+                "algoritmo": self.algoritmo,
+                "latencia_maxima_ms": self._latencia_maxima_ms(),
+                "processos": 1,
+                "limite_final": int(self.limite),
+                "limite_estavel": round(self._limite_estavel(), 1),
+                "ajustes": self.ajustes,
+                "reducoes_teto": self.reducoes_teto,
+                "reducoes_erro": self.reducoes_erro,
+            }
+
+    def _tem_vaga(self):
+        return self.em_andamento < int(self.limite)
+
+    def _latencia_maxima_ms(self):
+        if self.latencia_maxima is None:
+            return None
+        return round(self.latencia_maxima * 1000, 1)
+
+    def _ajustar(self):
+        latencias = sorted(self._latencias)
+        erros = self._erros
+        usado = self._pico >= self.limite / 2
+        self._latencias = []
+        self._erros = 0
+        self._pico = self.em_andamento
+
+        p90 = latencias[int(len(latencias) * 0.9) - 1] if latencias else None
+        acima_teto = (
+            self.latencia_maxima is not None
+            and p90 is not None
+            and p90 > self.latencia_maxima
+        )
+
+        if self.algoritmo == "AIMD":
+            novo = self.limite + 1 if usado else self.limite
+            if erros or acima_teto:
+                novo = self.limite * FATOR_REDUCAO
+        elif not latencias:
+            novo = self.limite * FATOR_REDUCAO
+        else:
+            novo = self._limite_gradiente(sum(latencias) / len(latencias), p90, usado)
+            if erros:
+                novo = min(novo, self.limite * FATOR_REDUCAO)
+
+        if acima_teto:
+            self.reducoes_teto += 1
+        elif erros:
+            self.reducoes_erro += 1
+        novo = min(self.maximo, max(1.0, novo))
+        if int(novo) != int(self.limite):
+            self.ajustes += 1
+            self._historico.append((time.perf_counter() - self._inicio, novo))
+        self.limite = novo
+
+    def _limite_gradiente(self, media, p90, usado):
+        # Referência: média móvel longa das médias de cada janela (as 10
+        # primeiras entram com peso igual, para não depender só da primeira).
+        self._janelas += 1
+        if self._referencia is None:
+            self._referencia = media
+        else:
+            peso = 1 / (self._janelas if self._janelas <= 10 else JANELAS_REFERENCIA)
+            self._referencia += (media - self._referencia) * peso
+        # Latência caiu muito (ex.: o integrador esvaziou a fila): a
+        # referência acompanha, senão o limite cresceria sem freio.
+        if self._referencia / media > 2:
+            self._referencia *= 0.95
+
+        gradiente = max(0.5, min(1.0, TOLERANCIA_GRADIENTE * self._referencia / media))
+        folga = math.sqrt(self.limite)
+        if self.latencia_maxima is not None and p90 > self.latencia_maxima:
+            gradiente = max(0.5, min(gradiente, self.latencia_maxima / p90))
+            folga = 0.0
+        if not usado and gradiente >= 1:
+            return self.limite
+        novo = self.limite * gradiente + folga
+        return self.limite * (1 - SUAVIZACAO_GRADIENTE) + novo * SUAVIZACAO_GRADIENTE
+
+    def _limite_estavel(self):
+        """Média do limite, ponderada pelo tempo, no último terço da execução."""
+        agora = time.perf_counter() - self._inicio
+        if agora <= 0:
+            return self.limite
+        desde = agora * (1 - FRACAO_ESTAVEL)
+        soma = 0.0
+        pontos = self._historico + [(agora, self.limite)]
+        for (instante, limite), (proximo, _) in zip(pontos, pontos[1:]):
+            inicio = max(instante, desde)
+            if proximo > inicio:
+                soma += int(limite) * (proximo - inicio)
+        return soma / (agora - desde)
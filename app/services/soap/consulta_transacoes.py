@@ -0,0 +1,149 @@
+# app/services/soap/consulta_transacoes.py
+
+import csv
+import os
+import threading
+
+# Colunas da tabela de consultas (e do CSV exportado).
+COLUNAS_CONSULTA = ("codigo", "erro", "mensagem", "status", "latencia_ms")
+
+
+def _ler_codigo(linha, numero, nome):
+    """Código da transação de uma linha (primeiro campo; ';', ',' ou tab)."""
+    campo = linha
+    for separador in (";", ",", "\t"):
+        campo = campo.split(separador, 1)[0]
+    campo = campo.strip().strip('"')
+    if not campo.isdigit() or campo == "0":
+        raise ValueError(
+            f"Linha {numero} de {nome} inválida: esperado um código de transação "
+            f"numérico diferente de 0, encontrado '{campo}'."
+        )
+    return campo
+
+
+class ListaTransacoes:
+    """
+    Códigos de transação a consultar, um por envio (pTransacao com pXML vazio).
+
+    Iterar gera `(codigo, codigo)`, no mesmo formato `(origem, payload)` do
+    CorpusPayloads, então o MotorEnvio percorre a lista da mesma forma, sob
+    demanda. Códigos repetidos são consultados uma vez só.
+
+    Origem dos códigos:
+        - Arquivo texto/CSV: um código por linha (o primeiro campo da linha);
+          linhas vazias ou começando com '#' são ignoradas, assim como uma
+          primeira linha de cabeçalho.
+        - Lista de códigos já lida (ex.: colada na tela).
+    """
+
+    def __init__(self, caminho=None, codigos=None):
+        """
+        :param caminho: Arquivo com os códigos.
+        :param codigos: Lista de códigos, no lugar do arquivo.
+        """
+        if (caminho is None) == (codigos is None):
+            raise ValueError("Informe o arquivo ou a lista de códigos de transação.")
+        if caminho is not None and not os.path.isfile(caminho):
+            raise ValueError(f"Arquivo de transações não encontrado: {caminho}")
+        self.caminho = caminho
+        self.codigos = None
+        if codigos is not None:
+            self.codigos = [
+                _ler_codigo(codigo, numero, "a lista")
+                for numero, codigo in enumerate(codigos, 1)
+                if codigo.strip()
+            ]
+            if not self.codigos:
+                raise ValueError("A lista de códigos de transação está vazia.")
+
+    def __iter__(self):
+        vistos = set()
+        for codigo in self._ler():
+            if codigo not in vistos:
+                vistos.add(codigo)
+                yield codigo, codigo
+
+    def resumo(self):
+        if self.caminho is not None:
+            return {"caminho": self.caminho, "formato": "Transações"}
+        return {"caminho": None, "formato": "Transações", "codigos": len(self.codigos)}
+
+    def _ler(self):
+        if self.codigos is not None:
+            yield from self.codigos
+            return
+        nome = os.path.basename(self.caminho)
+        with open(self.caminho, encoding="utf-8-sig") as arquivo:
+            for numero, linha in enumerate(arquivo, 1):
+                if not linha.strip() or linha.lstrip().startswith("#"):
+                    continue
+                try:
+                    yield _ler_codigo(linha, numero, nome)
+                except ValueError:
+                    if numero == 1:
+                        continue  # Cabeçalho.
+                    raise
+
+
+class TabelaConsultas:
+    """
+    Resultado de uma consulta em lote: código da transação → Erro/Mensagem.
+
+    `registrar` recebe os lotes do MotorEnvio (o `ao_resultados`), de
+    qualquer thread; as linhas saem na ordem dos envios, ou seja, na ordem
+    da lista de códigos.
+    """
+
+    def __init__(self):
+        self._linhas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, lote):
+        with self._lock:
+            for resultado in lote:
+                self._linhas[resultado["indice"]] = self._linha(resultado)
+
+    def linhas(self):
+        """Dicts com COLUNAS_CONSULTA, na ordem da lista de códigos."""
+        with self._lock:
+            return [self._linhas[indice] for indice in sorted(self._linhas)]
+
+    def contagens(self):
+        """Quantos códigos voltaram com Erro=false, Erro=true e sem resposta."""
+        contagens = {"false": 0, "true": 0, "": 0}
+        for linha in self.linhas():
+            contagens[linha["erro"]] += 1
+        return {
+            "sem_erro": contagens["false"],
+            "com_erro": contagens["true"],
+            "sem_resposta": contagens[""],
+        }
+
+    def salvar_csv(self, caminho):
+        with open(caminho, "w", encoding="utf-8", newline="") as arquivo:
+            escritor = csv.DictWriter(
+                arquivo, fieldnames=COLUNAS_CONSULTA, delimiter=";"
+            )
+            escritor.writeheader()
+            escritor.writerows(self.linhas())
+
+    @staticmethod
+    def _linha(resultado):
+        # 'erro' é o campo Erro do retorno; vazio quando não houve retorno.
+        if resultado["resposta"] == "completa":
+            erro = "true" if resultado["status"] == "erro_servico" else "false"
+        else:
+            erro = ""
+        mensagem = resultado["mensagem"]
+        if resultado["erro"] is not None:
+            mensagem = f"Erro de conexão: {resultado['erro']}"
+        elif resultado["resposta"] == "invalida":
+            mensagem = "Resposta inválida (XML não reconhecido)."
+        return {
+            "codigo": resultado["origem"],
+            "erro": erro,
+            "mensagem": mensagem or "",
+            "status": resultado["status"],
+            "latencia_ms": f"{resultado['latencia'] * 1000:.1f}",
+        }
@@ -0,0 +1,168 @@
+# app/services/soap/corpus.py
+
+import json
+import os
+import re
+
+FORMATOS_CORPUS = ("Pasta", "JSONL", "XML")
+
+# Tamanho dos blocos lidos de um arquivo XML com vários documentos.
+TAMANHO_BLOCO_LEITURA = 64 * 1024
+
+# Uma construção XML completa: comentário, CDATA, instrução de processamento,
+# declaração (<!DOCTYPE ...>) ou tag (aceita '>' dentro de atributos). Uma
+# construção cortada no fim do buffer não casa com nenhuma alternativa.
+_CONSTRUCAO = re.compile(
+    r"<!--.*?-->"
+    r"|<!\[CDATA\[.*?\]\]>"
+    r"|<\?.*?\?>"
+    r"|<!(?!--|\[CDATA\[)[^>]*>"
+    r"""|</?[^!?/](?:[^>"']|"[^"]*"|'[^']*')*>""",
+    re.S,
+)
+
+
+def detectar_formato(caminho):
+    """Pasta, JSONL (extensão .jsonl) ou XML com vários documentos."""
+    if os.path.isdir(caminho):
+        return "Pasta"
+    if caminho.lower().endswith(".jsonl"):
+        return "JSONL"
+    return "XML"
+
+
+class CorpusPayloads:
+    """
+    Conjunto de payloads (pXML) lido do disco sob demanda, um por envio.
+
+    Iterar gera `(origem, payload)`, onde `origem` identifica o registro de
+    onde veio o payload (nome do arquivo, linha do JSONL ou posição do
+    documento no XML). Nada é lido antes de ser pedido e nada fica guardado
+    depois de gerado, então o consumo de memória não depende do tamanho do
+    corpus.
+
+    Formatos:
+        - Pasta: cada arquivo regular (não oculto) é um payload.
+        - JSONL: cada linha é uma string JSON com o payload ou um objeto
+          com 'payload' e, opcionalmente, 'id' (usado como origem).
+        - XML: arquivo com vários documentos XML em sequência; declarações
+          `<?xml ...?>` e comentários entre eles são ignorados.
+    """
+
+    def __init__(self, caminho, formato=None):
+        """
+        :param caminho: Pasta ou arquivo do corpus.
+        :param formato: Um de FORMATOS_CORPUS; None para detectar pelo caminho.
+        """
+        formato = formato or detectar_formato(caminho)
+        if formato not in FORMATOS_CORPUS:
+            raise ValueError(f"Formato de corpus desconhecido: {formato}")
+        if not os.path.exists(caminho):
+            raise ValueError(f"Corpus não encontrado: {caminho}")
+        self.caminho = caminho
+        self.formato = formato
+
+    def __iter__(self):
+        if self.formato == "Pasta":
+            return self._ler_pasta()
+        if self.formato == "JSONL":
+            return self._ler_jsonl()
+        return self._ler_xml()
+
+    def resumo(self):
+        return {"caminho": self.caminho, "formato": self.formato}
+
+    def _ler_pasta(self):
+        # scandir não monta a lista da pasta inteira; a ordem é a do sistema.
+        with os.scandir(self.caminho) as entradas:
+            for entrada in entradas:
+                if entrada.name.startswith(".") or not entrada.is_file():
+                    continue
+                with open(entrada.path, encoding="utf-8") as arquivo:
+                    yield entrada.name, arquivo.read().strip()
+
+    def _ler_jsonl(self):
+        nome = os.path.basename(self.caminho)
+        with open(self.caminho, encoding="utf-8") as arquivo:
+            for numero, linha in enumerate(arquivo, 1):
+                if not linha.strip():
+                    continue
+                try:
+                    registro = json.loads(linha)
+                    if isinstance(registro, str):
+                        yield f"{nome}:{numero}", registro
+                    else:
+                        origem = registro.get("id") or f"{nome}:{numero}"
+                        yield str(origem), registro["payload"]
+                except (ValueError, KeyError, AttributeError) as e:
+                    raise ValueError(
+                        f"Linha {numero} de {nome} inválida: esperado uma string "
+                        f"ou um objeto com 'payload' ({e})."
+                    ) from e
+
+    def _ler_xml(self):
+        nome = os.path.basename(self.caminho)
+        with open(self.caminho, encoding="utf-8") as arquivo:
+            for numero, documento in enumerate(_separar_documentos(arquivo), 1):
+                yield f"{nome}#{numero}", documento
+
+
+def _separar_documentos(arquivo):
+    """
+    Gera o texto original de cada elemento raiz de um arquivo com vários
+    documentos XML, lendo em blocos e sem montar a árvore.
+    """
+    buffer = ""
+    pos = 0
+    profundidade = 0
+    inicio_documento = 0
+    fim_arquivo = False
+
+    while True:
+        abertura = buffer.find("<", pos)
+        encontrada = None
+        if abertura != -1:
+            encontrada = _CONSTRUCAO.match(buffer, abertura)
+
+        if encontrada is None:
+            if fim_arquivo:
+                if profundidade > 0:
+                    raise ValueError("Documento XML incompleto no fim do corpus.")
+                if abertura != -1:
+                    raise ValueError("Construção XML malformada no fim do corpus.")
+                return
+            # Só o documento em andamento (ou a construção incompleta) é mantido.
+            if profundidade > 0:
+                corte = inicio_documento
+            elif abertura != -1:
+                corte = abertura
+            else:
+                corte = len(buffer)
+            if abertura != -1:
+                pos = abertura
+            buffer = buffer[corte:]
+            pos = max(0, pos - corte)
+            inicio_documento -= corte
+            bloco = arquivo.read(TAMANHO_BLOCO_LEITURA)
+            fim_arquivo = not bloco
+            buffer += bloco
+            continue
+
+        fim = encontrada.end()
+        construcao = encontrada.group()
+        pos = fim
+        if construcao.startswith(("<!", "<?")):
+            continue
+        if construcao.startswith("</"):
+            profundidade -= 1
+            if profundidade < 0:
+                raise ValueError(f"Tag de fechamento sem abertura: {construcao}")
+            if profundidade == 0:
+                yield buffer[inicio_documento:fim]
+        elif construcao.endswith("/>"):
+            if profundidade == 0:
+                yield construcao
+        else:
+            if profundidade == 0:
+                inicio_documento = abertura
+            profundidade += 1
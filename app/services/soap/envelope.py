@@ -0,0 +1,129 @@
+# app/services/soap/envelope.py
+
+from html import escape
+
+# Cabeçalhos HTTP fixos da ação IntegraXMLString do MegaIntegradorService.
+CABECALHOS_SOAP = {
+    "Content-Type": "text/xml; charset=utf-8",
+    "SOAPAction": "urn:MegaIntegradorLibrary-MegaIntegradorService#IntegraXMLString",
+}
+
+# Abaixo deste tamanho é mais barato juntar as partes do que enviá-las separadas.
+LIMITE_JUNTAR_PARTES = 64 * 1024
+
+
+def envolver_cdata(texto):
+    """
+    Coloca o texto em uma seção CDATA.
+
+    Um ']]>' dentro do texto encerraria a seção antes da hora, então a seção
+    é dividida nesse ponto: ']]' fica em uma seção e '>' começa a próxima.
+    """
+    return "<![CDATA[" + texto.replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+
+class CorpoEnvelope:
+    """
+    Corpo HTTP de um envio, formado por partes `bytes` já codificadas.
+
+    Tem `__len__` (o requests usa como Content-Length) e `__iter__` (as partes
+    são enviadas uma a uma), então o payload nunca é copiado para um buffer
+    novo a cada envio.
+    """
+
+    __slots__ = ("partes", "_tamanho")
+
+    def __init__(self, partes):
+        self.partes = partes
+        self._tamanho = sum(len(parte) for parte in partes)
+
+    def __len__(self):
+        return self._tamanho
+
+    def __iter__(self):
+        return iter(self.partes)
+
+    def __bytes__(self):
+        return b"".join(self.partes)
+
+
+class ModeloEnvelope:
+    """
+    Envelope SOAP pré-compilado para uma execução.
+
+    Tudo o que não muda entre envios (namespaces, parâmetros e o payload em
+    CDATA) é renderizado, sem a indentação, e codificado em UTF-8 uma única
+    vez. A cada envio só o 'pObs' é gerado e encaixado entre o prefixo e o
+    sufixo; com Obs fixa o corpo inteiro é reaproveitado. Em campanhas com
+    corpus, o payload de cada envio é encaixado da mesma forma; em consultas
+    em lote, o pTransacao.
+    """
+
+    def __init__(self, parametros):
+        """
+        :param parametros: dict com 'pro_id', 'usu_codigo', 'payload', 'obs',
+                           'transacao' e 'sistema'.
+        """
+        self.obs = parametros["obs"]
+        self._cabeca = (
+            '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"'
+            ' xmlns:tns="http://tempuri.org/"><soap:Body><tns:IntegraXMLString>'
+            f"<pPRO_IN_ID>{escape(parametros['pro_id'])}</pPRO_IN_ID>"
+            f"<pUSU_IN_CODIGO>{escape(parametros['usu_codigo'])}</pUSU_IN_CODIGO>"
+            "<pXML>"
+        ).encode("utf-8")
+        self._pos_xml = "</pXML><pXMLHeader></pXMLHeader><pObs>".encode("utf-8")
+        self._prefixo = (
+            self._cabeca
+            + envolver_cdata(parametros["payload"]).encode("utf-8")
+            + self._pos_xml
+        )
+        self._pos_obs = "</pObs><pEnviaRecebe>R</pEnviaRecebe><pTransacao>".encode(
+            "utf-8"
+        )
+        self._fim = (
+            "</pTransacao>"
+            f"<pSistema>{escape(parametros['sistema'])}</pSistema>"
+            "</tns:IntegraXMLString></soap:Body></soap:Envelope>"
+        ).encode("utf-8")
+        self._sufixo = (
+            self._pos_obs + escape(parametros["transacao"]).encode("utf-8") + self._fim
+        )
+        self._grande = len(self._prefixo) + len(self._sufixo) >= LIMITE_JUNTAR_PARTES
+        self._corpo_fixo = (
+            self._montar_corpo(escape(self.obs).encode("utf-8")) if self.obs else None
+        )
+
+    def montar(self, indice, payload=None, transacao=None):
+        """
+        Retorna o CorpoEnvelope do envio `indice`.
+
+        :param payload: pXML deste envio; None usa o payload dos parâmetros.
+        :param transacao: pTransacao deste envio (consulta de uma transação);
+                          None usa a transação dos parâmetros.
+        """
+        if payload is None and transacao is None and self._corpo_fixo is not None:
+            return self._corpo_fixo
+        if self.obs:
+            obs = escape(self.obs).encode("utf-8")
+        else:
+            obs = f"Envio #{indice} pela ferramenta".encode("utf-8")
+        if payload is None and transacao is None:
+            return self._montar_corpo(obs)
+
+        sufixo = self._sufixo
+        if transacao is not None:
+            sufixo = self._pos_obs + escape(transacao).encode("utf-8") + self._fim
+        if payload is None:
+            partes = (self._prefixo, obs, sufixo)
+        else:
+            xml = envolver_cdata(payload).encode("utf-8")
+            partes = (self._cabeca, xml, self._pos_xml, obs, sufixo)
+        if sum(len(parte) for parte in partes) >= LIMITE_JUNTAR_PARTES:
+            return CorpoEnvelope(partes)
+        return CorpoEnvelope((b"".join(partes),))
+
+    def _montar_corpo(self, obs):
+        if self._grande:
+            return CorpoEnvelope((self._prefixo, obs, self._sufixo))
+        return CorpoEnvelope((self._prefixo + obs + self._sufixo,))
@@ -0,0 +1,473 @@
+# app/services/soap/estatisticas.py
+
+import threading
+import time
+from collections import deque
+
+STATUS_RESULTADO = ("sucesso", "erro_servico", "erro_conexao")
+PERCENTIS_RELATORIO = (50, 90, 99, 99.9)
+
+# Fases de uma requisição HTTP, na ordem em que acontecem. DNS, conexão e TLS
+# só existem quando uma conexão nova é aberta; 'fila' é a espera por uma
+# conexão livre do pool e 'espera' vai do fim do envio ao fim dos cabeçalhos
+# da resposta (o tempo do integrador, ou TTFB).
+FASES_HTTP = ("preparo", "fila", "dns", "conexao", "tls", "envio", "espera", "download")
+ROTULOS_FASES = {
+    "preparo": "Preparo no cliente",
+    "fila": "Fila do pool",
+    "dns": "DNS",
+    "conexao": "Conexão TCP",
+    "tls": "TLS",
+    "envio": "Envio",
+    "espera": "Espera (TTFB)",
+    "download": "Download",
+}
+# Leitura da fase que mais pesou no tempo total das requisições.
+DIAGNOSTICO_FASES = {
+    "preparo": "CPU da própria ferramenta: use mais 'Processos' ou o motor Asyncio",
+    "fila": "envios esperando conexão: aumente o 'Pool de Conexões'",
+    "dns": "resolução de nomes lenta",
+    "conexao": "abertura de conexões (rede lenta ou poucas conexões reutilizadas)",
+    "tls": "handshakes TLS (poucas conexões reutilizadas?)",
+    "envio": "rede lenta ou mensagens grandes no envio",
+    "espera": "tempo de processamento do integrador",
+    "download": "rede lenta ou respostas grandes",
+}
+
+
+class HistogramaLatencia:
+    """
+    Histograma de latências com buckets logarítmicos (no estilo HDR).
+
+    Os valores são guardados em microssegundos: até 2^bits_precisao µs cada
+    valor tem o seu próprio bucket; acima disso cada potência de 2 é dividida
+    em 2^(bits_precisao - 1) buckets, o que mantém o erro relativo abaixo de
+    1% com o padrão de 7 bits. O número de buckets é fixo (~1.700 para até
+    1 hora), então a memória não depende da quantidade de envios.
+    """
+
+    def __init__(self, bits_precisao=7, maximo_segundos=3600):
+        self.bits_precisao = bits_precisao
+        self.maximo_segundos = maximo_segundos
+        self._sub = 1 << bits_precisao
+        self._meio = self._sub >> 1
+        self._limite_us = int(maximo_segundos * 1_000_000)
+        self.buckets = [0] * (self._indice(self._limite_us) + 1)
+        self.total = 0
+        self.soma_us = 0
+        self.minimo_us = None
+        self.maximo_us = 0
+
+    def _indice(self, valor_us):
+        if valor_us < self._sub:
+            return valor_us
+        expoente = valor_us.bit_length() - self.bits_precisao
+        mantissa = valor_us >> expoente
+        return self._sub + (expoente - 1) * self._meio + (mantissa - self._meio)
+
+    def _valor_do_indice(self, indice):
+        """Ponto médio do intervalo de valores coberto pelo bucket."""
+        if indice < self._sub:
+            return indice
+        expoente, resto = divmod(indice - self._sub, self._meio)
+        expoente += 1
+        inicio = (self._meio + resto) << expoente
+        return inicio + ((1 << expoente) >> 1)
+
+    def registrar(self, segundos):
+        valor_us = max(0, int(segundos * 1_000_000))
+        self.buckets[self._indice(min(valor_us, self._limite_us))] += 1
+        self.total += 1
+        self.soma_us += valor_us
+        self.maximo_us = max(self.maximo_us, valor_us)
+        if self.minimo_us is None or valor_us < self.minimo_us:
+            self.minimo_us = valor_us
+
+    def mesclar(self, outro):
+        """Soma outro histograma (de mesma precisão) a este."""
+        for indice, quantidade in enumerate(outro.buckets):
+            self.buckets[indice] += quantidade
+        self.total += outro.total
+        self.soma_us += outro.soma_us
+        self.maximo_us = max(self.maximo_us, outro.maximo_us)
+        if outro.minimo_us is not None and (
+            self.minimo_us is None or outro.minimo_us < self.minimo_us
+        ):
+            self.minimo_us = outro.minimo_us
+
+    def exportar(self):
+        """Dict serializável em JSON, só com os buckets não vazios."""
+        return {
+            "bits_precisao": self.bits_precisao,
+            "maximo_segundos": self.maximo_segundos,
+            "buckets": [[i, n] for i, n in enumerate(self.buckets) if n],
+            "soma_us": self.soma_us,
+            "minimo_us": self.minimo_us,
+            "maximo_us": self.maximo_us,
+        }
+
+    @classmethod
+    def importar(cls, dados):
+        """Reconstrói um histograma salvo com `exportar`."""
+        histograma = cls(dados["bits_precisao"], dados["maximo_segundos"])
+        for indice, quantidade in dados["buckets"]:
+            histograma.buckets[indice] = quantidade
+            histograma.total += quantidade
+        histograma.soma_us = dados["soma_us"]
+        histograma.minimo_us = dados["minimo_us"]
+        histograma.maximo_us = dados["maximo_us"]
+        return histograma
+
+    def percentil(self, p):
+        """Latência (em segundos) abaixo da qual estão `p`% dos registros."""
+        if self.total == 0:
+            return 0.0
+        alvo = max(1, -(-self.total * p // 100))
+        acumulado = 0
+        for indice, quantidade in enumerate(self.buckets):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                valor_us = min(self._valor_do_indice(indice), self.maximo_us)
+                return valor_us / 1_000_000
+        return self.maximo_us / 1_000_000
+
+    def media(self):
+        return self.soma_us / self.total / 1_000_000 if self.total else 0.0
+
+    def maximo(self):
+        return self.maximo_us / 1_000_000
+
+
+class CronometroFases:
+    """
+    Cronometra as fases de uma requisição: cada `marcar` atribui à fase o
+    tempo desde a marca anterior (ou desde a criação), somando se a mesma
+    fase for marcada de novo.
+    """
+
+    def __init__(self):
+        self.fases = {}
+        self._marco = time.perf_counter()
+
+    def marcar(self, fase):
+        agora = time.perf_counter()
+        self.fases[fase] = self.fases.get(fase, 0.0) + agora - self._marco
+        self._marco = agora
+
+
+class EstatisticasFases:
+    """
+    Histograma de cada fase HTTP (FASES_HTTP) das requisições de uma execução.
+
+    Cada fase conta só as requisições em que aconteceu (DNS, conexão e TLS
+    só nas conexões novas, fila só quando o pool estava esgotado); a parcela
+    de cada uma no tempo somado de todas mostra para onde o tempo foi.
+    """
+
+    def __init__(self):
+        self.histogramas = {fase: HistogramaLatencia() for fase in FASES_HTTP}
+
+    def registrar(self, fases):
+        """:param fases: dict fase → segundos de uma requisição."""
+        for fase, segundos in fases.items():
+            self.histogramas[fase].registrar(segundos)
+
+    def mesclar(self, outro):
+        for fase, histograma in outro.histogramas.items():
+            self.histogramas[fase].mesclar(histograma)
+
+    def resumo(self):
+        """dict fase → requisições, média, p50, p99 (ms) e parcela do tempo (%)."""
+        total_us = sum(h.soma_us for h in self.histogramas.values()) or 1
+        return {
+            fase: {
+                "requisicoes": histograma.total,
+                "media_ms": round(histograma.media() * 1000, 2),
+                "p50_ms": round(histograma.percentil(50) * 1000, 2),
+                "p99_ms": round(histograma.percentil(99) * 1000, 2),
+                "parcela_pct": round(histograma.soma_us / total_us * 100, 1),
+            }
+            for fase, histograma in self.histogramas.items()
+            if histograma.total
+        }
+
+
+class EstatisticasExecucao:
+    """Contadores por status e histogramas de latência de uma execução."""
+
+    def __init__(self):
+        self.histograma = HistogramaLatencia()
+        self.fases = EstatisticasFases()
+        self.contagens = dict.fromkeys(STATUS_RESULTADO, 0)
+        self.atraso_maximo = 0.0
+        self.novas_tentativas = 0
+        self.envios_com_nova_tentativa = 0
+
+    def registrar(self, status, latencia=None, atraso=0.0, tentativas=0, fases=None):
+        """
+        :param status: 'sucesso', 'erro_servico' ou 'erro_conexao'.
+        :param latencia: Em segundos; None quando não houve resposta.
+        :param atraso: Atraso de despacho em relação ao instante previsto (s).
+        :param tentativas: Novas tentativas feitas até o resultado final.
+        :param fases: dict fase → segundos da requisição que respondeu.
+        """
+        self.contagens[status] += 1
+        if tentativas:
+            self.novas_tentativas += tentativas
+            self.envios_com_nova_tentativa += 1
+        self.atraso_maximo = max(self.atraso_maximo, atraso)
+        if latencia is not None:
+            self.histograma.registrar(latencia)
+        if fases:
+            self.fases.registrar(fases)
+
+    def mesclar(self, outro):
+        """Soma os contadores e os histogramas de outra EstatisticasExecucao."""
+        for status, quantidade in outro.contagens.items():
+            self.contagens[status] += quantidade
+        self.histograma.mesclar(outro.histograma)
+        self.fases.mesclar(outro.fases)
+        self.atraso_maximo = max(self.atraso_maximo, outro.atraso_maximo)
+        self.novas_tentativas += outro.novas_tentativas
+        self.envios_com_nova_tentativa += outro.envios_com_nova_tentativa
+
+    def resumo(self, duracao):
+        """
+        Resumo da execução em um dict simples (serializável em JSON).
+
+        'envios' e 'vazao_rps' contam cada envio uma vez, com ou sem novas
+        tentativas; as requisições HTTP extras aparecem à parte.
+        """
+        total = sum(self.contagens.values())
+        return {
+            "envios": total,
+            "duracao_s": round(duracao, 3),
+            "vazao_rps": round(total / duracao, 2) if duracao > 0 else 0.0,
+            "contagens": dict(self.contagens),
+            "latencia_ms": {
+                **{
+                    f"p{p:g}": round(self.histograma.percentil(p) * 1000, 2)
+                    for p in PERCENTIS_RELATORIO
+                },
+                "media": round(self.histograma.media() * 1000, 2),
+                "max": round(self.histograma.maximo() * 1000, 2),
+            },
+            "atraso_despacho_max_ms": round(self.atraso_maximo * 1000, 2),
+            "novas_tentativas": self.novas_tentativas,
+            "envios_com_nova_tentativa": self.envios_com_nova_tentativa,
+            "requisicoes_http": total + self.novas_tentativas,
+            "fases_http": self.fases.resumo(),
+        }
+
+
+class MedidorAoVivo:
+    """
+    Números da execução em andamento para o painel da tela.
+
+    Os resultados entram por lote (um lock por lote, não por envio) num
+    intervalo corrente; `amostrar`, chamado algumas vezes por segundo, fecha
+    o intervalo e calcula vazão, p95 e taxa de erro dos últimos `janela`
+    segundos, somando os intervalos que cabem nela.
+    """
+
+    def __init__(self, janela=1.0):
+        self.janela = janela
+        self._lock = threading.Lock()
+        self._intervalos = deque()
+        self._abrir_intervalo(time.perf_counter())
+
+    def _abrir_intervalo(self, agora):
+        self._inicio = agora
+        self._concluidos = 0
+        self._erros = 0
+        self._histograma = HistogramaLatencia()
+
+    def registrar(self, lote):
+        """Conta um lote de resultados já classificados (ver MotorEnvio._receber)."""
+        with self._lock:
+            for resultado in lote:
+                self._concluidos += 1
+                if resultado["status"] != "sucesso":
+                    self._erros += 1
+                if resultado["erro"] is None:
+                    self._histograma.registrar(resultado["latencia"])
+
+    def amostrar(self):
+        """
+        :return: dict com 'vazao_rps', 'p95_ms' e 'taxa_erro_pct' da janela.
+        """
+        agora = time.perf_counter()
+        with self._lock:
+            self._intervalos.append(
+                (
+                    agora,
+                    agora - self._inicio,
+                    self._concluidos,
+                    self._erros,
+                    self._histograma,
+                )
+            )
+            self._abrir_intervalo(agora)
+        while self._intervalos and agora - self._intervalos[0][0] > self.janela:
+            self._intervalos.popleft()
+
+        duracao = concluidos = erros = 0
+        histograma = HistogramaLatencia()
+        for (
+            _,
+            duracao_intervalo,
+            concluidos_intervalo,
+            erros_intervalo,
+            parcial,
+        ) in self._intervalos:
+            duracao += duracao_intervalo
+            concluidos += concluidos_intervalo
+            erros += erros_intervalo
+            histograma.mesclar(parcial)
+        return {
+            "vazao_rps": concluidos / duracao if duracao > 0 else 0.0,
+            "p95_ms": histograma.percentil(95) * 1000,
+            "taxa_erro_pct": erros / concluidos * 100 if concluidos else 0.0,
+        }
+
+
+def formatar_resumo(resumo):
+    """Linhas de texto do resumo, para o log da tela."""
+    contagens = resumo["contagens"]
+    latencia = resumo["latencia_ms"]
+    percentis = " | ".join(
+        f"p{p:g} {latencia[f'p{p:g}']:.1f}" for p in PERCENTIS_RELATORIO
+    )
+    linhas = [
+        "--- Resumo da Execução ---",
+        f"Envios: {resumo['envios']} em {resumo['duracao_s']:.1f} s "
+        f"({resumo['vazao_rps']:.1f} req/s)",
+        f"Sucesso: {contagens['sucesso']} | Erro de serviço: "
+        f"{contagens['erro_servico']} | Erro de conexão: {contagens['erro_conexao']}",
+        f"Latência (ms): {percentis} | máx {latencia['max']:.1f}",
+    ]
+    if resumo.get("processos", 1) > 1:
+        linhas.append(
+            f"Processos: {resumo['processos']} (estatísticas mescladas de todos)"
+        )
+    for erro in resumo.get("erros_processos") or ():
+        linhas.append(f"Falha em processo de envio: {erro}")
+    if resumo.get("carga_aberta"):
+        linhas.append(
+            f"Carga aberta: maior atraso de despacho "
+            f"{resumo['atraso_despacho_max_ms']:.0f} ms (incluído nas latências)."
+        )
+    if resumo.get("novas_tentativas"):
+        linhas.append(
+            f"Novas tentativas: {resumo['novas_tentativas']} "
+            f"(em {resumo['envios_com_nova_tentativa']} envios) | "
+            f"requisições HTTP: {resumo['requisicoes_http']}"
+        )
+    if resumo.get("disjuntor") and resumo["disjuntor"]["aberturas"]:
+        linhas.append(
+            f"Disjuntor: aberto {resumo['disjuntor']['aberturas']} vez(es), "
+            f"{resumo['disjuntor']['tempo_aberto_s']:.1f} s sem enviar."
+        )
+    if resumo.get("concorrencia_adaptativa"):
+        adaptativa = resumo["concorrencia_adaptativa"]
+        teto = ""
+        if adaptativa["latencia_maxima_ms"] is not None:
+            teto = f", teto p90 {adaptativa['latencia_maxima_ms']:g} ms"
+        linhas.append(
+            f"Concorrência adaptativa ({adaptativa['algoritmo']}{teto}): "
+            f"estabilizou em ~{adaptativa['limite_estavel']:g} simultâneos "
+            f"(final {adaptativa['limite_final']:g}; {adaptativa['ajustes']:g} "
+            f"ajustes, {adaptativa['reducoes_teto']:g} reduções por latência, "
+            f"{adaptativa['reducoes_erro']:g} por erro)"
+        )
+    if resumo.get("endpoints"):
+        linhas.append(f"Balanceamento ({resumo['balanceamento']}) por instância:")
+        for endpoint in resumo["endpoints"]:
+            latencia_endpoint = endpoint["latencia_ms"]
+            linhas.append(
+                f"  {endpoint['url']}: {endpoint['requisicoes']} req "
+                f"({endpoint['vazao_rps']:.1f} req/s) | erros {endpoint['erros']} | "
+                f"p50 {latencia_endpoint['p50']:.1f} | p99 {latencia_endpoint['p99']:.1f} ms"
+                f" | ejeções {endpoint['ejecoes']}"
+            )
+    if resumo.get("cenario"):
+        cenario = resumo["cenario"]
+        linhas.append(
+            f"Cenário '{cenario['nome']}' (mistura por {cenario['mistura']}):"
+        )
+        for nome, servico in cenario["servicos"].items():
+            latencia_servico = servico["latencia_ms"]
+            erros = (
+                servico["contagens"]["erro_servico"]
+                + servico["contagens"]["erro_conexao"]
+            )
+            linhas.append(
+                f"  {nome} ({servico['pro_id']}): {servico['envios']} envios, "
+                f"{servico['vazao_rps']:.1f} req/s, "
+                f"{servico['fracao_real'] * 100:.1f}% (esperado "
+                f"{servico['fracao_esperada'] * 100:.1f}%) | p50 "
+                f"{latencia_servico['p50']:.1f} | p99 "
+                f"{latencia_servico['p99']:.1f} ms | erros {erros}"
+            )
+    if resumo.get("fases_http"):
+        fases = resumo["fases_http"]
+        linhas.append("Fases HTTP (média | p99 ms | parcela do tempo):")
+        for fase, numeros in fases.items():
+            linhas.append(
+                f"  {ROTULOS_FASES[fase]}: {numeros['media_ms']:.1f} | "
+                f"{numeros['p99_ms']:.1f} | {numeros['parcela_pct']:.1f}% "
+                f"({numeros['requisicoes']} req)"
+            )
+        maior = max(fases, key=lambda fase: fases[fase]["parcela_pct"])
+        linhas.append(
+            f"  Maior parcela: {ROTULOS_FASES[maior]} -> {DIAGNOSTICO_FASES[maior]}"
+        )
+    if resumo.get("conexoes"):
+        linhas.append(
+            f"Conexões TCP abertas: {resumo['conexoes']['conexoes_abertas']} | "
+            f"reutilizadas: {resumo['conexoes']['conexoes_reutilizadas']}"
+        )
+    if resumo.get("corpus") and resumo["corpus"].get("geracao"):
+        geracao = resumo["corpus"]["geracao"]
+        linhas.append(
+            f"Gerados: {resumo['corpus']['caminho']} | {geracao['gerados']} "
+            f"documentos, geração a {geracao['vazao_geracao']:.1f} docs/s "
+            f"({geracao['tempo_geracao_s']:.1f} s gerando) | envio a "
+            f"{resumo['vazao_rps']:.1f} req/s"
+        )
+        gargalo = (
+            "a geração limitou os envios"
+            if geracao["espera_fila_vazia_s"] > geracao["espera_fila_cheia_s"]
+            else "os envios limitaram a geração"
+        )
+        linhas.append(
+            f"  Fila de geração (até {geracao['capacidade_fila']}, pico "
+            f"{geracao['pico_fila']}): envios esperaram "
+            f"{geracao['espera_fila_vazia_s']:.1f} s por documentos, gerador "
+            f"esperou {geracao['espera_fila_cheia_s']:.1f} s com a fila cheia "
+            f"-> {gargalo}"
+        )
+    elif resumo.get("corpus"):
+        linhas.append(
+            f"Corpus: {resumo['corpus']['caminho']} ({resumo['corpus']['formato']})"
+        )
+    if resumo.get("transacoes"):
+        origem = resumo["transacoes"]["caminho"] or (
+            f"{resumo['transacoes']['codigos']} códigos informados"
+        )
+        linhas.append(f"Consulta de transações em lote: {origem}")
+    if resumo.get("erro_corpus"):
+        linhas.append(f"Leitura do corpus interrompida: {resumo['erro_corpus']}")
+    if resumo.get("arquivo_respostas"):
+        arquivo = resumo["arquivo_respostas"]
+        linhas.append(
+            f"Respostas arquivadas: {arquivo['respostas']} em {arquivo['caminho']}"
+        )
+    if resumo.get("banco_resultados"):
+        banco = resumo["banco_resultados"]
+        linhas.append(
+            f"Resultados no banco: execução {banco['execucao']} em {banco['caminho']}"
+        )
+        if banco["erro"]:
+            linhas.append(f"Gravação no banco interrompida: {banco['erro']}")
+    return linhas
@@ -1,14 +1,47 @@
 # app/services/soap/form_ferramentasoap.py
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
+import math
+import os
+import sqlite3
 import threading
-import time
-import requests
-import xml.etree.ElementTree as ET
+from datetime import datetime
 from html import escape
-from xml.dom import minidom
-import xml.parsers.expat
+
+from app.services.soap.arquivo_respostas import PASTA_RESPOSTAS, ArquivoRespostas
+from app.services.soap.balanceamento import ESTRATEGIAS, BalanceadorEndpoints
+from app.services.soap.banco_resultados import ARQUIVO_BANCO, BancoResultados
+from app.services.soap.cenario import CenarioCarga
+from app.services.soap.concorrencia_adaptativa import (
+    ALGORITMOS_CONCORRENCIA,
+    LimiteAdaptativo,
+)
+from app.services.soap.consulta_transacoes import ListaTransacoes, TabelaConsultas
+from app.services.soap.corpus import FORMATOS_CORPUS, CorpusPayloads
+from app.services.soap.estatisticas import formatar_resumo
+from app.services.soap.formatacao_xml import formatar_resposta
+from app.services.soap.historico_execucoes import HistoricoExecucoes
+from app.services.soap.motor_envio import (
+    MotorEnvio,
+    construir_endpoints,
+    validar_parametros,
+)
+from app.services.soap.perfis_carga import PerfilConstante, criar_perfil
+from app.services.soap.pipeline_geracao import CAPACIDADE_FILA_PADRAO, FilaGeracao
+from app.services.soap.resiliencia import DisjuntorCircuito
+from app.services.soap.saturacao import BuscaSaturacao, formatar_relatorio_saturacao
+from app.services.serviço_207.agente_207 import GeradorAgentes
+from app.views.comparacaoExecucoes import ComparacaoExecucoesWindow
+from app.views.consultaTransacoes import ConsultaTransacoesWindow
+from app.views.logVirtual import LogVirtual
+from app.views.painelAoVivo import PainelAoVivo
+from app.views.relatorioSaturacao import RelatorioSaturacaoWindow
+from app.views.resultadosBanco import ResultadosBancoWindow
+from app.views.visualizadorXml import VisualizadorXmlWindow
+
+# Máximo de caracteres de uma resposta inválida copiados para o log.
+LIMITE_TRECHO_LOG = 2000
 
 
 class FerramentaSOAPFrame(ttk.Frame):
@@ -19,7 +52,13 @@ class FerramentaSOAPFrame(ttk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.deve_interromper = threading.Event()
+        self.motor_envio = None
+        self.arquivo_respostas = None
+        self.tabela_consultas = None
+        self.busca_saturacao = None
+        # Modelo de agente vindo da tela 207 ('Gerar e Enviar'), ou None.
+        self.modelo_agentes = None
+        self._ultimo_indice = 0
         self._criar_widgets()
 
     def _criar_widgets(self):
@@ -42,12 +81,13 @@ class FerramentaSOAPFrame(ttk.Frame):
         )
         title_bar.grid(row=0, column=0, sticky="ew", pady=(0, 5))
 
-        # --- Configuração e Parâmetros (sem alterações) ---
-        config_frame = ttk.LabelFrame(
-            main_frame, text="Configuração do Envio", padding="10"
-        )
-        config_frame.grid(row=1, column=0, sticky="ew", pady=5)
+        # --- Configuração e Parâmetros ---
+        # Abas para que novas opções não roubem altura da área de logs.
+        self.config_notebook = ttk.Notebook(main_frame)
+        self.config_notebook.grid(row=1, column=0, sticky="ew", pady=5)
+        config_frame = ttk.Frame(self.config_notebook, padding="10")
         config_frame.columnconfigure(4, weight=1)
+        self.config_notebook.add(config_frame, text="Configuração do Envio")
         ttk.Label(config_frame, text="Computador/URL Integrador:").grid(
             row=0, column=0, sticky="w", padx=5, pady=5
         )
@@ -66,6 +106,362 @@ class FerramentaSOAPFrame(ttk.Frame):
         self.repetitions_entry = ttk.Entry(config_frame, width=10)
         self.repetitions_entry.insert(0, "1")
         self.repetitions_entry.grid(row=1, column=1, sticky="w", padx=5)
+        ttk.Label(config_frame, text="Envios Simultâneos:").grid(
+            row=1, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.concorrencia_entry = ttk.Entry(config_frame, width=10)
+        self.concorrencia_entry.insert(0, "1")
+        self.concorrencia_entry.grid(row=1, column=3, sticky="w", padx=5)
+        ttk.Label(config_frame, text="Motor de Envio:").grid(
+            row=2, column=0, sticky="w", padx=5, pady=5
+        )
+        self.motor_combo = ttk.Combobox(
+            config_frame, values=["Threads", "Asyncio"], state="readonly", width=10
+        )
+        self.motor_combo.set("Threads")
+        self.motor_combo.grid(row=2, column=1, sticky="w", padx=5)
+        ttk.Label(config_frame, text="Arquivar Respostas:").grid(
+            row=2, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.arquivar_combo = ttk.Combobox(
+            config_frame,
+            values=["Não", "Todas", "Somente falhas"],
+            state="readonly",
+            width=14,
+        )
+        self.arquivar_combo.set("Não")
+        self.arquivar_combo.grid(row=2, column=3, sticky="w", padx=5)
+        ttk.Label(config_frame, text="Processos:").grid(
+            row=3, column=0, sticky="w", padx=5, pady=5
+        )
+        self.processos_entry = ttk.Entry(config_frame, width=10)
+        self.processos_entry.insert(0, "1")
+        self.processos_entry.grid(row=3, column=1, sticky="w", padx=5)
+        ttk.Label(
+            config_frame,
+            text="(divide envios, simultâneos e taxa entre processos; até 1 por núcleo)",
+            foreground="gray",
+        ).grid(row=3, column=2, columnspan=3, sticky="w", padx=5)
+        ttk.Label(config_frame, text="Rótulo da Execução:").grid(
+            row=4, column=0, sticky="w", padx=5, pady=5
+        )
+        self.rotulo_entry = ttk.Entry(config_frame, width=40)
+        self.rotulo_entry.grid(row=4, column=1, sticky="w", padx=5)
+        ttk.Label(
+            config_frame,
+            text="(ex.: versão do integrador; identifica a execução no histórico)",
+            foreground="gray",
+        ).grid(row=4, column=2, columnspan=3, sticky="w", padx=5)
+        ttk.Label(config_frame, text="Banco de Resultados:").grid(
+            row=5, column=0, sticky="w", padx=5, pady=5
+        )
+        self.banco_combo = ttk.Combobox(
+            config_frame, values=["Sim", "Não"], state="readonly", width=10
+        )
+        self.banco_combo.set("Sim")
+        self.banco_combo.grid(row=5, column=1, sticky="w", padx=5)
+        ttk.Label(
+            config_frame,
+            text=f"(grava cada resultado em {ARQUIVO_BANCO}; ver 'Consultar Resultados')",
+            foreground="gray",
+        ).grid(row=5, column=2, columnspan=3, sticky="w", padx=5)
+        ttk.Label(config_frame, text="Concorrência Adaptativa:").grid(
+            row=6, column=0, sticky="w", padx=5, pady=5
+        )
+        self.adaptativa_combo = ttk.Combobox(
+            config_frame,
+            values=["Não", *ALGORITMOS_CONCORRENCIA],
+            state="readonly",
+            width=10,
+        )
+        self.adaptativa_combo.set("Não")
+        self.adaptativa_combo.grid(row=6, column=1, sticky="w", padx=5)
+        ttk.Label(config_frame, text="Teto de Latência (ms):").grid(
+            row=6, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.latencia_maxima_entry = ttk.Entry(config_frame, width=10)
+        self.latencia_maxima_entry.grid(row=6, column=3, sticky="w", padx=5)
+        ttk.Label(
+            config_frame,
+            text="(ajusta os simultâneos pela latência; 'Envios Simultâneos' vira o "
+            "máximo e o teto, opcional, vale para o p90)",
+            foreground="gray",
+        ).grid(row=7, column=0, columnspan=5, sticky="w", padx=5)
+
+        conexao_frame = ttk.Frame(self.config_notebook, padding="10")
+        self.config_notebook.add(conexao_frame, text="Conexão")
+        ttk.Label(conexao_frame, text="Pool de Conexões:").grid(
+            row=0, column=0, sticky="w", padx=5, pady=5
+        )
+        self.pool_entry = ttk.Entry(conexao_frame, width=10)
+        self.pool_entry.grid(row=0, column=1, sticky="w", padx=5)
+        ttk.Label(
+            conexao_frame,
+            text="(vazio = igual aos envios simultâneos)",
+            foreground="gray",
+        ).grid(row=0, column=2, columnspan=2, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Timeout Conexão (s):").grid(
+            row=1, column=0, sticky="w", padx=5, pady=5
+        )
+        self.timeout_conexao_entry = ttk.Entry(conexao_frame, width=10)
+        self.timeout_conexao_entry.insert(0, "5")
+        self.timeout_conexao_entry.grid(row=1, column=1, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Timeout Leitura (s):").grid(
+            row=1, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.timeout_leitura_entry = ttk.Entry(conexao_frame, width=10)
+        self.timeout_leitura_entry.insert(0, "30")
+        self.timeout_leitura_entry.grid(row=1, column=3, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Novas Tentativas:").grid(
+            row=2, column=0, sticky="w", padx=5, pady=5
+        )
+        self.tentativas_entry = ttk.Entry(conexao_frame, width=10)
+        self.tentativas_entry.insert(0, "0")
+        self.tentativas_entry.grid(row=2, column=1, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Espera Inicial (s):").grid(
+            row=2, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.backoff_entry = ttk.Entry(conexao_frame, width=10)
+        self.backoff_entry.insert(0, "0.2")
+        self.backoff_entry.grid(row=2, column=3, sticky="w", padx=5)
+        ttk.Label(
+            conexao_frame,
+            text="(falhas de conexão, timeouts e HTTP 5xx; espera dobra a cada tentativa)",
+            foreground="gray",
+        ).grid(row=3, column=0, columnspan=6, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Disjuntor (% erros):").grid(
+            row=4, column=0, sticky="w", padx=5, pady=5
+        )
+        self.disjuntor_erros_entry = ttk.Entry(conexao_frame, width=10)
+        self.disjuntor_erros_entry.insert(0, "50")
+        self.disjuntor_erros_entry.grid(row=4, column=1, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Janela (envios):").grid(
+            row=4, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.disjuntor_janela_entry = ttk.Entry(conexao_frame, width=10)
+        self.disjuntor_janela_entry.insert(0, "20")
+        self.disjuntor_janela_entry.grid(row=4, column=3, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Pausa (s):").grid(
+            row=4, column=4, sticky="w", padx=(10, 5), pady=5
+        )
+        self.disjuntor_pausa_entry = ttk.Entry(conexao_frame, width=10)
+        self.disjuntor_pausa_entry.insert(0, "5")
+        self.disjuntor_pausa_entry.grid(row=4, column=5, sticky="w", padx=5)
+        ttk.Label(
+            conexao_frame,
+            text="(0% = desligado; aberto, pausa os envios e testa com uma sonda)",
+            foreground="gray",
+        ).grid(row=5, column=0, columnspan=6, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Balanceamento:").grid(
+            row=6, column=0, sticky="w", padx=5, pady=5
+        )
+        self.balanceamento_combo = ttk.Combobox(
+            conexao_frame, values=list(ESTRATEGIAS), state="readonly", width=16
+        )
+        self.balanceamento_combo.set("Round-robin")
+        self.balanceamento_combo.grid(row=6, column=1, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Falhas p/ Ejetar:").grid(
+            row=6, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.falhas_ejecao_entry = ttk.Entry(conexao_frame, width=10)
+        self.falhas_ejecao_entry.insert(0, "3")
+        self.falhas_ejecao_entry.grid(row=6, column=3, sticky="w", padx=5)
+        ttk.Label(conexao_frame, text="Verificação (s):").grid(
+            row=6, column=4, sticky="w", padx=(10, 5), pady=5
+        )
+        self.verificacao_saude_entry = ttk.Entry(conexao_frame, width=10)
+        self.verificacao_saude_entry.insert(0, "0")
+        self.verificacao_saude_entry.grid(row=6, column=5, sticky="w", padx=5)
+        ttk.Label(
+            conexao_frame,
+            text=(
+                "(vários integradores: separe por vírgula em 'Computador/URL', "
+                "ex.: int01, int02:8111*2; verificação 0 = desligada)"
+            ),
+            foreground="gray",
+        ).grid(row=7, column=0, columnspan=6, sticky="w", padx=5)
+
+        carga_frame = ttk.Frame(self.config_notebook, padding="10")
+        self.config_notebook.add(carga_frame, text="Carga")
+        ttk.Label(carga_frame, text="Perfil de Carga:").grid(
+            row=0, column=0, sticky="w", padx=5, pady=5
+        )
+        self.perfil_combo = ttk.Combobox(
+            carga_frame,
+            values=["Fechada", "Constante", "Rampa", "Degraus", "Pico"],
+            state="readonly",
+            width=12,
+        )
+        self.perfil_combo.set("Fechada")
+        self.perfil_combo.grid(row=0, column=1, sticky="w", padx=5)
+        ttk.Label(
+            carga_frame,
+            text="(Fechada = próximo envio só quando uma vaga libera)",
+            foreground="gray",
+        ).grid(row=0, column=2, columnspan=4, sticky="w", padx=5)
+        ttk.Label(carga_frame, text="Taxa Base (req/s):").grid(
+            row=1, column=0, sticky="w", padx=5, pady=5
+        )
+        self.taxa_base_entry = ttk.Entry(carga_frame, width=10)
+        self.taxa_base_entry.insert(0, "10")
+        self.taxa_base_entry.grid(row=1, column=1, sticky="w", padx=5)
+        ttk.Label(carga_frame, text="Taxa Alvo/Pico (req/s):").grid(
+            row=1, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.taxa_alvo_entry = ttk.Entry(carga_frame, width=10)
+        self.taxa_alvo_entry.insert(0, "50")
+        self.taxa_alvo_entry.grid(row=1, column=3, sticky="w", padx=5)
+        ttk.Label(carga_frame, text="Nº de Degraus:").grid(
+            row=1, column=4, sticky="w", padx=(10, 5), pady=5
+        )
+        self.num_degraus_entry = ttk.Entry(carga_frame, width=10)
+        self.num_degraus_entry.insert(0, "5")
+        self.num_degraus_entry.grid(row=1, column=5, sticky="w", padx=5)
+        ttk.Label(carga_frame, text="Duração (s):").grid(
+            row=2, column=0, sticky="w", padx=5, pady=5
+        )
+        self.duracao_perfil_entry = ttk.Entry(carga_frame, width=10)
+        self.duracao_perfil_entry.insert(0, "30")
+        self.duracao_perfil_entry.grid(row=2, column=1, sticky="w", padx=5)
+        ttk.Label(carga_frame, text="Início do Pico (s):").grid(
+            row=2, column=2, sticky="w", padx=(10, 5), pady=5
+        )
+        self.inicio_pico_entry = ttk.Entry(carga_frame, width=10)
+        self.inicio_pico_entry.insert(0, "10")
+        self.inicio_pico_entry.grid(row=2, column=3, sticky="w", padx=5)
+        ttk.Label(carga_frame, text="SLO p99 (ms):").grid(
+            row=3, column=0, sticky="w", padx=5, pady=(10, 5)
+        )
+        self.slo_p99_entry = ttk.Entry(carga_frame, width=10)
+        self.slo_p99_entry.insert(0, "1000")
+        self.slo_p99_entry.grid(row=3, column=1, sticky="w", padx=5, pady=(10, 5))
+        ttk.Label(carga_frame, text="Fator por Estágio:").grid(
+            row=3, column=2, sticky="w", padx=(10, 5), pady=(10, 5)
+        )
+        self.fator_estagio_entry = ttk.Entry(carga_frame, width=10)
+        self.fator_estagio_entry.insert(0, "1.5")
+        self.fator_estagio_entry.grid(row=3, column=3, sticky="w", padx=5, pady=(10, 5))
+        ttk.Label(carga_frame, text="Erros Aceitos (%):").grid(
+            row=3, column=4, sticky="w", padx=(10, 5), pady=(10, 5)
+        )
+        self.erros_aceitos_entry = ttk.Entry(carga_frame, width=10)
+        self.erros_aceitos_entry.insert(0, "0")
+        self.erros_aceitos_entry.grid(row=3, column=5, sticky="w", padx=5, pady=(10, 5))
+        ttk.Label(carga_frame, text="Máx. de Estágios:").grid(
+            row=4, column=0, sticky="w", padx=5, pady=5
+        )
+        self.max_estagios_entry = ttk.Entry(carga_frame, width=10)
+        self.max_estagios_entry.insert(0, "10")
+        self.max_estagios_entry.grid(row=4, column=1, sticky="w", padx=5)
+        ttk.Label(
+            carga_frame,
+            text=(
+                "('Buscar Vazão Máxima': estágios de taxa constante a partir da "
+                "Taxa Base, cada um pela Duração, até o p99 passar do SLO ou "
+                "surgirem erros)"
+            ),
+            foreground="gray",
+        ).grid(row=5, column=0, columnspan=6, sticky="w", padx=5)
+
+        campanha_frame = ttk.Frame(self.config_notebook, padding="10")
+        campanha_frame.columnconfigure(1, weight=1)
+        self.config_notebook.add(campanha_frame, text="Campanha")
+        ttk.Label(campanha_frame, text="Corpus de Payloads:").grid(
+            row=0, column=0, sticky="w", padx=5, pady=5
+        )
+        self.corpus_entry = ttk.Entry(campanha_frame, width=50)
+        self.corpus_entry.grid(row=0, column=1, sticky="ew", padx=5)
+        ttk.Button(
+            campanha_frame,
+            text="Arquivo...",
+            command=lambda: self._selecionar_corpus(pasta=False),
+        ).grid(row=0, column=2, padx=5)
+        ttk.Button(
+            campanha_frame,
+            text="Pasta...",
+            command=lambda: self._selecionar_corpus(pasta=True),
+        ).grid(row=0, column=3, padx=5)
+        ttk.Label(campanha_frame, text="Formato:").grid(
+            row=1, column=0, sticky="w", padx=5, pady=5
+        )
+        self.formato_corpus_combo = ttk.Combobox(
+            campanha_frame,
+            values=["Automático", *FORMATOS_CORPUS],
+            state="readonly",
+            width=12,
+        )
+        self.formato_corpus_combo.set("Automático")
+        self.formato_corpus_combo.grid(row=1, column=1, sticky="w", padx=5)
+        ttk.Label(
+            campanha_frame,
+            text=(
+                "(vazio = repete o 'XML Envio'; com corpus, cada registro é um envio "
+                "e o 'Número de Envios' limita a campanha, 0 = todos)"
+            ),
+            foreground="gray",
+        ).grid(row=2, column=0, columnspan=4, sticky="w", padx=5)
+        ttk.Label(campanha_frame, text="Transações a Consultar:").grid(
+            row=3, column=0, sticky="w", padx=5, pady=(10, 5)
+        )
+        self.transacoes_entry = ttk.Entry(campanha_frame, width=50)
+        self.transacoes_entry.grid(row=3, column=1, sticky="ew", padx=5, pady=(10, 5))
+        ttk.Button(
+            campanha_frame, text="Arquivo...", command=self._selecionar_transacoes
+        ).grid(row=3, column=2, padx=5, pady=(10, 5))
+        ttk.Label(
+            campanha_frame,
+            text=(
+                "(um código por linha: cada código é consultado com pXML vazio, "
+                "'Envios Simultâneos' por vez, e o resultado abre numa tabela; o "
+                "'Número de Envios' limita a consulta, 0 = todos)"
+            ),
+            foreground="gray",
+        ).grid(row=4, column=0, columnspan=4, sticky="w", padx=5)
+        ttk.Label(campanha_frame, text="Agentes Gerados:").grid(
+            row=5, column=0, sticky="w", padx=5, pady=(10, 5)
+        )
+        self.agentes_label = ttk.Label(campanha_frame, text="Não")
+        self.agentes_label.grid(row=5, column=1, sticky="w", padx=5, pady=(10, 5))
+        self.remover_agentes_btn = ttk.Button(
+            campanha_frame,
+            text="Remover",
+            command=lambda: self.usar_modelo_agentes(None),
+            state="disabled",
+        )
+        self.remover_agentes_btn.grid(row=5, column=2, padx=5, pady=(10, 5))
+        ttk.Label(campanha_frame, text="Fila de Geração:").grid(
+            row=6, column=0, sticky="w", padx=5, pady=5
+        )
+        self.fila_geracao_entry = ttk.Entry(campanha_frame, width=10)
+        self.fila_geracao_entry.insert(0, str(CAPACIDADE_FILA_PADRAO))
+        self.fila_geracao_entry.grid(row=6, column=1, sticky="w", padx=5)
+        ttk.Label(
+            campanha_frame,
+            text=(
+                "(use 'Gerar e Enviar' na tela 207: cada envio leva um agente novo, "
+                "gerado enquanto os anteriores são enviados; a fila limita quantos "
+                "ficam prontos à frente)"
+            ),
+            foreground="gray",
+        ).grid(row=7, column=0, columnspan=4, sticky="w", padx=5)
+        ttk.Label(campanha_frame, text="Cenário de Serviços:").grid(
+            row=8, column=0, sticky="w", padx=5, pady=(10, 5)
+        )
+        self.cenario_entry = ttk.Entry(campanha_frame, width=50)
+        self.cenario_entry.grid(row=8, column=1, sticky="ew", padx=5, pady=(10, 5))
+        ttk.Button(
+            campanha_frame, text="Arquivo...", command=self._selecionar_cenario
+        ).grid(row=8, column=2, padx=5, pady=(10, 5))
+        ttk.Label(
+            campanha_frame,
+            text=(
+                "(JSON com vários serviços intercalados, cada um com os seus "
+                "parâmetros, payloads e peso ou taxa; substitui os 'Parâmetros da "
+                "Requisição'. Com taxas, a carga é aberta pela 'Duração' da aba "
+                "'Carga')"
+            ),
+            foreground="gray",
+        ).grid(row=9, column=0, columnspan=4, sticky="w", padx=5)
 
         params_frame = ttk.LabelFrame(
             main_frame, text="Parâmetros da Requisição", padding="10"
@@ -132,7 +528,7 @@ class FerramentaSOAPFrame(ttk.Frame):
         # --- Progresso e Logs ---
         log_frame_text = "Progresso e Logs ( arraste a barra acima para redimensionar )"
         log_frame = ttk.LabelFrame(paned_window, text=log_frame_text, padding="10")
-        log_frame.rowconfigure(1, weight=1)
+        log_frame.rowconfigure(2, weight=1)
         log_frame.columnconfigure(0, weight=1)
         paned_window.add(log_frame, weight=3)
 
@@ -142,10 +538,16 @@ class FerramentaSOAPFrame(ttk.Frame):
             row=0, column=0, sticky="ew", pady=(0, 2)
         )  # Adicionado um pequeno pady no bottom
 
-        self.log_text = scrolledtext.ScrolledText(
-            log_frame, height=10, font=("Consolas", 10), state="disabled", wrap=tk.WORD
+        # Atualizado pelo _atualizar_progresso, nunca por envio.
+        self.painel = PainelAoVivo(log_frame)
+        self.painel.grid(row=1, column=0, sticky="w", pady=(0, 4))
+
+        # Log com inserção em lote: aguenta milhares de envios sem travar a tela.
+        self.log_view = LogVirtual(
+            log_frame, height=10, font=("Consolas", 10), wrap=tk.WORD
         )
-        self.log_text.grid(row=1, column=0, sticky="nsew")
+        self.log_view.grid(row=2, column=0, sticky="nsew")
+        self.log_text = self.log_view.text
 
         self.log_text.tag_config(
             "sucesso", foreground="green", font=("Consolas", 10, "bold")
@@ -171,6 +573,12 @@ class FerramentaSOAPFrame(ttk.Frame):
             style="Accent.TButton",
         )
         self.start_btn.pack(side="left", padx=(0, 10))
+        self.saturacao_btn = ttk.Button(
+            botoes_frame,
+            text="Buscar Vazão Máxima",
+            command=lambda: self._on_start_click(saturacao=True),
+        )
+        self.saturacao_btn.pack(side="left", padx=(0, 10))
         self.stop_btn = ttk.Button(
             botoes_frame,
             text="Interromper",
@@ -184,7 +592,19 @@ class FerramentaSOAPFrame(ttk.Frame):
             command=self._on_view_xml_click,
             state="disabled",
         )
-        self.view_xml_btn.pack(side="left", padx=(0, 10))
+        self.view_xml_btn.pack(side="left", padx=(0, 5))
+        ttk.Label(botoes_frame, text="Envio nº:").pack(side="left")
+        vcmd_envio = (self.register(self._validate_numeric_input), "%P", 9)
+        self.envio_xml_entry = ttk.Entry(
+            botoes_frame, width=8, validate="key", validatecommand=vcmd_envio
+        )
+        self.envio_xml_entry.pack(side="left", padx=(5, 10))
+        self.full_log_btn = ttk.Button(
+            botoes_frame,
+            text="Mostrar Log Completo",
+            command=lambda: self.log_view.mostrar_tudo("Log Completo da Integração"),
+        )
+        self.full_log_btn.pack(side="left", padx=(0, 10))
         self.last_response_text = ""
 
         # --- Botão Voltar ---
@@ -196,6 +616,18 @@ class FerramentaSOAPFrame(ttk.Frame):
             command=lambda: self.controller.show_frame("MenuPrincipal"),
         )
         self.back_btn.pack(side="right")
+        self.comparar_btn = ttk.Button(
+            bottom_frame,
+            text="Comparar Execuções",
+            command=lambda: ComparacaoExecucoesWindow(self, HistoricoExecucoes()),
+        )
+        self.comparar_btn.pack(side="left")
+        self.resultados_btn = ttk.Button(
+            bottom_frame,
+            text="Consultar Resultados",
+            command=self._on_resultados_click,
+        )
+        self.resultados_btn.pack(side="left", padx=(5, 0))
 
     # --- O restante do código permanece exatamente o mesmo ---
 
@@ -211,254 +643,673 @@ class FerramentaSOAPFrame(ttk.Frame):
             return True
         return False
 
-    def _construir_url_final(self):
-        url_base = self.url_base_entry.get().strip()
-        port = self.port_entry.get().strip()
-        if not url_base.lower().startswith(("http://", "https://")):
-            url_base = "http://" + url_base
-        url_base = url_base.rstrip("/")
-        full_url = f"{url_base}:{port}/SOAP?service=MegaIntegradorService"
-        return full_url
+    def _construir_endpoints(self):
+        return construir_endpoints(self.url_base_entry.get(), self.port_entry.get())
 
-    def _on_start_click(self):
+    def _on_start_click(self, saturacao=False):
+        """
+        Valida a tela e inicia a execução; com `saturacao`, inicia a busca
+        de saturação com a mesma configuração (ver BuscaSaturacao).
+        """
         try:
             self.repetitions = int(self.repetitions_entry.get())
+            self.concorrencia = int(self.concorrencia_entry.get())
+            self.processos = int(self.processos_entry.get())
             self.pro_id = self.pro_id_entry.get().strip()
             self.usu_codigo = self.usu_codigo_entry.get().strip()
             self.obs = self.obs_entry.get().strip()
             self.transacao = self.transacao_entry.get().strip() or "0"
             self.sistema = self.sistema_entry.get().strip()
             self.payload_template = self.payload_text.get("1.0", "end-1c").strip()
+            self.motor = self.motor_combo.get()
+            self.corpus_path = self.corpus_entry.get().strip()
+            self.transacoes_path = self.transacoes_entry.get().strip()
+            self.cenario_path = self.cenario_entry.get().strip()
+            self.rotulo = self.rotulo_entry.get().strip()
         except ValueError:
             messagebox.showerror(
-                "Erro de Validação", "O 'Número de Envios' deve ser um inteiro."
+                "Erro de Validação",
+                "O 'Número de Envios', os 'Envios Simultâneos' e os 'Processos' "
+                "devem ser inteiros.",
             )
             return
 
-        if not all([self.pro_id, self.usu_codigo, self.transacao, self.sistema]):
+        try:
+            pool = self.pool_entry.get().strip()
+            config_conexao = {
+                "tamanho_pool": int(pool) if pool else self.concorrencia,
+                "timeout_conexao": float(self.timeout_conexao_entry.get()),
+                "timeout_leitura": float(self.timeout_leitura_entry.get()),
+            }
+            tentativas = int(self.tentativas_entry.get())
+            falhas_ejecao = int(self.falhas_ejecao_entry.get())
+            verificacao_saude = float(self.verificacao_saude_entry.get())
+            backoff_base = float(self.backoff_entry.get())
+            disjuntor = None
+            if float(self.disjuntor_erros_entry.get()) > 0:
+                disjuntor = DisjuntorCircuito(
+                    float(self.disjuntor_erros_entry.get()) / 100,
+                    int(self.disjuntor_janela_entry.get()),
+                    float(self.disjuntor_pausa_entry.get()),
+                )
+        except ValueError:
             messagebox.showerror(
                 "Erro de Validação",
-                "Todos os campos de parâmetros, exceto 'Obs', são obrigatórios.",
+                "Os campos da aba 'Conexão' devem ser numéricos.",
             )
             return
 
-        if self.pro_id == "0000":
+        try:
+            perfil = None
+            nome_perfil = self.perfil_combo.get()
+            if nome_perfil != "Fechada":
+                perfil = criar_perfil(
+                    nome_perfil,
+                    float(self.taxa_base_entry.get()),
+                    float(self.taxa_alvo_entry.get()),
+                    float(self.duracao_perfil_entry.get()),
+                    float(self.inicio_pico_entry.get()),
+                    int(self.num_degraus_entry.get()),
+                )
+        except ValueError as e:
             messagebox.showerror(
-                "Erro de Validação", "O 'Cód. Serviço' deve ser diferente de 0000."
+                "Erro de Validação", f"Perfil de carga inválido (aba 'Carga'):\n{e}"
             )
             return
 
-        if self.payload_template and self.transacao != "0":
+        if self.concorrencia < 1:
             messagebox.showerror(
-                "Conflito de Parâmetros",
-                "Se o 'XML Envio' for preenchido, o 'Cód. Transação' deve ser 0.",
+                "Erro de Validação", "Os 'Envios Simultâneos' devem ser no mínimo 1."
             )
             return
-
-        if self.transacao != "0" and self.payload_template:
+        if not 1 <= self.processos <= self.concorrencia:
             messagebox.showerror(
-                "Conflito de Parâmetros",
-                "Se o 'Cód. Transação' for preenchido, o 'XML Envio' deve estar vazio.",
+                "Erro de Validação",
+                "Os 'Processos' devem ser de 1 até o número de 'Envios Simultâneos'.",
             )
             return
 
+        limite_adaptativo = None
+        if self.adaptativa_combo.get() != "Não":
+            try:
+                teto = self.latencia_maxima_entry.get().strip()
+                limite_adaptativo = LimiteAdaptativo(
+                    self.adaptativa_combo.get(),
+                    float(teto) / 1000 if teto else None,
+                )
+            except ValueError:
+                messagebox.showerror(
+                    "Erro de Validação",
+                    "O 'Teto de Latência (ms)' deve ser um número positivo.",
+                )
+                return
+
+        config_saturacao = None
+        if saturacao:
+            if nome_perfil != "Fechada" or limite_adaptativo is not None:
+                messagebox.showerror(
+                    "Erro de Validação",
+                    "A busca de saturação define a própria carga: use o 'Perfil de "
+                    "Carga' Fechada e a 'Concorrência Adaptativa' Não.",
+                )
+                return
+            try:
+                config_saturacao = {
+                    "taxa_inicial": float(self.taxa_base_entry.get()),
+                    "slo_p99_ms": float(self.slo_p99_entry.get()),
+                    "fator": float(self.fator_estagio_entry.get()),
+                    "duracao_estagio": float(self.duracao_perfil_entry.get()),
+                    "erros_aceitos": float(self.erros_aceitos_entry.get()) / 100,
+                    "max_estagios": int(self.max_estagios_entry.get()),
+                }
+                # Só valida; a busca é criada com os motores, mais abaixo.
+                BuscaSaturacao(None, **config_saturacao)
+            except ValueError as e:
+                messagebox.showerror(
+                    "Erro de Validação",
+                    f"Busca de saturação inválida (aba 'Carga'):\n{e}",
+                )
+                return
+
+        parametros = {
+            "pro_id": self.pro_id,
+            "usu_codigo": self.usu_codigo,
+            "payload": self.payload_template,
+            "obs": self.obs,
+            "transacao": self.transacao,
+            "sistema": self.sistema,
+        }
+        try:
+            endpoints = self._construir_endpoints()
+            corpus = None
+            cenario = None
+            if self.cenario_path:
+                if (
+                    self.payload_template
+                    or self.corpus_path
+                    or self.transacoes_path
+                    or self.modelo_agentes is not None
+                ):
+                    raise ValueError(
+                        "Com um cenário de serviços (aba 'Campanha'), deixe o 'XML "
+                        "Envio', o corpus, as transações e os agentes gerados vazios."
+                    )
+                if saturacao:
+                    raise ValueError(
+                        "A busca de saturação não usa cenários de serviços."
+                    )
+                cenario = CenarioCarga.carregar(self.cenario_path)
+                if cenario.por_taxa:
+                    if nome_perfil != "Fechada":
+                        raise ValueError(
+                            "O cenário define a taxa de cada serviço: use o 'Perfil "
+                            "de Carga' Fechada."
+                        )
+                    perfil = PerfilConstante(cenario.taxa_total())
+                    self.repetitions = max(
+                        1,
+                        math.ceil(
+                            cenario.taxa_total()
+                            * float(self.duracao_perfil_entry.get())
+                        ),
+                    )
+                elif self.repetitions < 1:
+                    raise ValueError("O 'Número de Envios' deve ser no mínimo 1.")
+                if cenario.usa_agentes():
+                    try:
+                        cenario.preparar(self.repetitions)
+                    except Exception as e:
+                        # Inclui as falhas das consultas ao IBGE e ao ViaCEP.
+                        raise ValueError(
+                            f"Não foi possível preparar a geração de agentes: {e}"
+                        ) from None
+            elif self.modelo_agentes is not None:
+                if self.payload_template or self.corpus_path or self.transacoes_path:
+                    raise ValueError(
+                        "Com agentes gerados (aba 'Campanha'), deixe o 'XML Envio', "
+                        "o corpus e as transações vazios."
+                    )
+                if saturacao:
+                    # Cada estágio recomeçaria a geração: os agentes se repetiriam.
+                    raise ValueError("A busca de saturação não gera agentes.")
+                if self.repetitions < 1:
+                    raise ValueError("O 'Número de Envios' deve ser no mínimo 1.")
+                try:
+                    capacidade = int(self.fila_geracao_entry.get())
+                except ValueError:
+                    raise ValueError(
+                        "A 'Fila de Geração' (aba 'Campanha') deve ser um inteiro."
+                    ) from None
+                gerador = GeradorAgentes(self.modelo_agentes, self.repetitions)
+                corpus = FilaGeracao(
+                    gerador.gerar, self.repetitions, capacidade, gerador.descricao()
+                )
+            elif self.corpus_path:
+                if self.payload_template:
+                    raise ValueError(
+                        "Com um corpus de payloads (aba 'Campanha'), deixe o "
+                        "'XML Envio' vazio."
+                    )
+                formato = self.formato_corpus_combo.get()
+                corpus = CorpusPayloads(
+                    self.corpus_path, None if formato == "Automático" else formato
+                )
+            transacoes = None
+            if self.transacoes_path:
+                if corpus is not None:
+                    raise ValueError(
+                        "Use o corpus de payloads ou as transações a consultar "
+                        "(aba 'Campanha'), não os dois."
+                    )
+                if saturacao:
+                    raise ValueError(
+                        "A busca de saturação não consulta transações (aba "
+                        "'Campanha')."
+                    )
+                transacoes = ListaTransacoes(self.transacoes_path)
+            elif corpus is None and self.repetitions < 1 and not saturacao:
+                raise ValueError("O 'Número de Envios' deve ser no mínimo 1.")
+            if cenario is None:
+                validar_parametros(
+                    parametros,
+                    com_corpus=corpus is not None,
+                    com_transacoes=transacoes is not None,
+                )
+            else:
+                # Os parâmetros de cada serviço vêm do cenário.
+                parametros = {}
+        except ValueError as e:
+            messagebox.showerror("Erro de Validação", str(e))
+            return
+
         self.start_btn.config(state="disabled")
+        self.saturacao_btn.config(state="disabled")
         self.stop_btn.config(state="normal")
         self.view_xml_btn.config(state="disabled")
         self.back_btn.config(state="disabled")
         self.last_response_text = ""
-        self.deve_interromper.clear()
+        self._ultimo_indice = 0
+
+        if self.arquivo_respostas is not None:
+            self.arquivo_respostas.fechar()
+            self.arquivo_respostas = None
+        # Na busca de saturação, cada estágio numera os envios desde 1: as
+        # respostas não são arquivadas nem gravadas no banco.
+        if self.arquivar_combo.get() != "Não" and not saturacao:
+            self.arquivo_respostas = ArquivoRespostas(
+                os.path.join(
+                    PASTA_RESPOSTAS, f"execucao_{datetime.now():%Y%m%d_%H%M%S}"
+                ),
+                somente_falhas=self.arquivar_combo.get() == "Somente falhas",
+            )
+
+        balanceador = None
+        if len(endpoints) > 1:
+            balanceador = BalanceadorEndpoints(
+                endpoints,
+                self.balanceamento_combo.get(),
+                falhas_ejecao,
+                intervalo_verificacao=verificacao_saude,
+            )
+
+        gravador_resultados = None
+        if self.banco_combo.get() == "Sim" and not saturacao:
+            try:
+                gravador_resultados = BancoResultados().nova_execucao(
+                    self.rotulo,
+                    f"{self.motor}, {self.concorrencia} simultâneos, "
+                    f"{self.processos} processo(s)",
+                )
+            except sqlite3.Error as e:
+                messagebox.showwarning(
+                    "Banco de Resultados",
+                    f"Os resultados não serão gravados no banco:\n{e}",
+                )
 
-        self.log_text.configure(state="normal")
-        self.log_text.delete("1.0", "end")
-        self.log_text.insert("1.0", "Tentando comunicar...\n", "info")
-        self.log_text.configure(state="disabled")
+        # Widgets são lidos aqui, na thread da UI; o motor não conhece a tela.
+        def criar_motor(perfil, repeticoes):
+            return MotorEnvio(
+                endpoints[0][0],
+                parametros,
+                repeticoes,
+                concorrencia=self.concorrencia,
+                motor=self.motor,
+                perfil=perfil,
+                config_conexao=config_conexao,
+                tentativas=tentativas,
+                arquivo_respostas=self.arquivo_respostas,
+                corpus=corpus,
+                backoff_base=backoff_base,
+                disjuntor=disjuntor,
+                balanceador=balanceador,
+                processos=self.processos,
+                transacoes=transacoes,
+                gravador_resultados=gravador_resultados,
+                limite_adaptativo=limite_adaptativo,
+                cenario=cenario,
+            )
+
+        self.tabela_consultas = TabelaConsultas() if transacoes is not None else None
+        self.log_view.limpar()
+        self.painel.limpar()
+        self.progress_label.config(text="Tentando comunicar...")
+
+        if config_saturacao is not None:
+
+            def criar_motor_estagio(perfil, repeticoes):
+                # Na thread da busca, a cada estágio: a tela passa a seguir
+                # o motor novo (progresso, painel e log).
+                self.motor_envio = criar_motor(perfil, repeticoes)
+                self.after(0, self._atualizar_progresso, self.motor_envio)
+                return self.motor_envio
+
+            self.busca_saturacao = BuscaSaturacao(
+                criar_motor_estagio, **config_saturacao
+            )
+            self.worker_thread = threading.Thread(
+                target=self._iniciar_busca_saturacao,
+                args=(self.busca_saturacao,),
+                daemon=True,
+            )
+            self.worker_thread.start()
+            return
 
+        self.busca_saturacao = None
+        self.motor_envio = criar_motor(perfil, self.repetitions)
         self.worker_thread = threading.Thread(
-            target=self._iniciar_processo, daemon=True
+            target=self._iniciar_processo, args=(self.motor_envio,), daemon=True
         )
         self.worker_thread.start()
+        self._atualizar_progresso(self.motor_envio)
 
     def _on_stop_click(self):
         if self.worker_thread and self.worker_thread.is_alive():
-            self.deve_interromper.set()
+            if self.busca_saturacao is not None:
+                self.busca_saturacao.interromper()
+            else:
+                self.motor_envio.interromper()
             self._atualizar_log("Interrupção solicitada...", tags="info")
             self.stop_btn.config(state="disabled")
 
-    def _iniciar_processo(self):
-        primeira_resposta = True
-        for i in range(1, self.repetitions + 1):
-            if self.deve_interromper.is_set():
-                self.after(
-                    0,
-                    lambda: self._atualizar_log(
-                        "Processo interrompido pelo usuário.", tags="info"
-                    ),
-                )
-                break
-
-            self.after(
-                0,
-                lambda i=i: self.progress_label.config(
-                    text=f"Enviando {i} de {self.repetitions}..."
-                ),
+    def _iniciar_processo(self, motor_envio):
+        """
+        Executa na thread de trabalho. Uma falha inesperada (ex.: ao iniciar
+        os processos ou gravar as respostas) vai para o log, e a tela sempre
+        volta a aceitar uma nova execução.
+        """
+        final_message = "Processo encerrado com erro!"
+        try:
+            resumo = motor_envio.executar(
+                lambda lote: self._receber_lote(lote, motor_envio)
             )
 
-            obs_final = self.obs or f"Envio #{i} pela ferramenta"
-            envelope_soap = f"""
-            <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/" xmlns:tns="http://tempuri.org/">
-                <soap:Body>
-                    <tns:IntegraXMLString>
-                        <pPRO_IN_ID>{self.pro_id}</pPRO_IN_ID>
-                        <pUSU_IN_CODIGO>{self.usu_codigo}</pUSU_IN_CODIGO>
-                        <pXML><![CDATA[{self.payload_template}]]></pXML>
-                        <pXMLHeader></pXMLHeader>
-                        <pObs>{escape(obs_final )}</pObs>
-                        <pEnviaRecebe>R</pEnviaRecebe>
-                        <pTransacao>{self.transacao}</pTransacao>
-                        <pSistema>{self.sistema}</pSistema>
-                    </tns:IntegraXMLString>
-                </soap:Body>
-            </soap:Envelope>
-            """
-
+            if resumo["interrompido"]:
+                self._atualizar_log("Processo interrompido pelo usuário.", tags="info")
+            for linha in formatar_resumo(resumo):
+                self._atualizar_log(linha, ("info",))
+            id_execucao = None
             try:
-                headers = {
-                    "Content-Type": "text/xml; charset=utf-8",
-                    "SOAPAction": "urn:MegaIntegradorLibrary-MegaIntegradorService#IntegraXMLString",
-                }
-                service_url = self._construir_url_final()
-                response = requests.post(
-                    service_url,
-                    data=envelope_soap.encode("utf-8"),
-                    headers=headers,
-                    timeout=30,
+                id_execucao = HistoricoExecucoes().salvar(
+                    resumo, motor_envio.estatisticas.histograma, self.rotulo
+                )
+                self._atualizar_log(
+                    f"Execução salva no histórico: {id_execucao} "
+                    "(use 'Comparar Execuções')",
+                    ("info",),
                 )
-                response.raise_for_status()
-
-                if primeira_resposta:
-                    self.after(0, self._limpar_log_inicial)
-                    primeira_resposta = False
-
-                self.after(0, self._processar_resposta_servico, i, response.text)
-
-            except requests.exceptions.RequestException as e:
-                if primeira_resposta:
-                    self.after(0, self._limpar_log_inicial)
-                    primeira_resposta = False
-                error_message = f"Erro de conexão: {e}"
-                self.after(
-                    0,
-                    self._atualizar_log,
-                    f"[{i}] FALHA: {error_message}",
+            except OSError as e:
+                self._atualizar_log(
+                    f"Não foi possível salvar a execução no histórico: {e}",
                     ("erro_conexao",),
                 )
-                break
-            time.sleep(0.1)
-
-        final_message = (
-            "Processo concluído!"
-            if not self.deve_interromper.is_set()
-            else "Processo interrompido!"
-        )
-        self.after(0, lambda: self.progress_label.config(text=final_message))
-        self.after(0, self._reset_ui)
+            gravador = motor_envio.gravador_resultados
+            if gravador is not None:
+                gravador.fechar(id_execucao)
+                if gravador.erro:
+                    self._atualizar_log(
+                        f"Gravação no banco interrompida: {gravador.erro}",
+                        ("erro_conexao",),
+                    )
+                self._atualizar_log(
+                    f"{gravador.gravados} resultados gravados no banco "
+                    f"(execução {gravador.id}; use 'Consultar Resultados')",
+                    ("info",),
+                )
+            final_message = (
+                "Processo concluído!"
+                if not resumo["interrompido"]
+                else "Processo interrompido!"
+            )
+        except Exception as e:
+            self._atualizar_log(
+                f"Falha inesperada na execução: {str(e) or type(e).__name__}",
+                ("erro_conexao",),
+            )
+        finally:
+            gravador = motor_envio.gravador_resultados
+            if gravador is not None:
+                try:
+                    gravador.fechar()
+                except sqlite3.Error as e:
+                    self._atualizar_log(
+                        f"Não foi possível fechar o banco de resultados: {e}",
+                        ("erro_conexao",),
+                    )
+            self.after(0, self._finalizar_processo, final_message)
 
-    def _limpar_log_inicial(self):
-        self.log_text.configure(state="normal")
-        self.log_text.delete("1.0", "end")
-        self.log_text.configure(state="disabled")
+    def _iniciar_busca_saturacao(self, busca):
+        def ao_estagio(estagio):
+            latencia = estagio["latencia_ms"]
+            self._atualizar_log(
+                f"Estágio {estagio['estagio']} concluído: "
+                f"{estagio['vazao_rps']:.1f} req/s (oferecidos "
+                f"{estagio['taxa_oferecida']:g}) | p99 {latencia['p99']:.1f} ms | "
+                f"erros {estagio['taxa_erro'] * 100:.2f}%",
+                ("info",),
+            )
 
-    def _processar_resposta_servico(self, index, response_text):
-        self.last_response_text = response_text
-        self.view_xml_btn.config(state="normal")
+        final_message = "Busca de saturação encerrada com erro!"
         try:
-            root = ET.fromstring(response_text)
-            result_text = root.find(".//{http://tempuri.org/}Result").text
-            if result_text is None:
-                self._atualizar_log(
-                    f"[{index}] SUCESSO: Comunicação realizada, mas o servidor retornou uma resposta vazia.",
-                    tags="sucesso",
-                )
-                return
+            relatorio = busca.executar(
+                ao_estagio, lambda lote: self._receber_lote(lote, busca.motor_atual)
+            )
+            if relatorio["parada"] == "interrompido":
+                self._atualizar_log("Busca interrompida pelo usuário.", tags="info")
+            for linha in formatar_relatorio_saturacao(relatorio):
+                self._atualizar_log(linha, ("info",))
+            final_message = (
+                "Busca de saturação concluída!"
+                if relatorio["parada"] != "interrompido"
+                else "Busca de saturação interrompida!"
+            )
+        except Exception as e:
+            # Como em _iniciar_processo: a tela sempre volta ao estado inicial.
+            self._atualizar_log(
+                f"Falha inesperada na busca: {str(e) or type(e).__name__}",
+                ("erro_conexao",),
+            )
+        finally:
+            self.after(0, self._finalizar_processo, final_message)
 
-            inner_root = ET.fromstring(result_text)
-            erro_element = inner_root.find("Erro")
-            is_erro = erro_element is not None and erro_element.text.lower() == "true"
+    def _finalizar_processo(self, final_message):
+        self.log_view.descarregar()
+        self.progress_label.config(text=final_message)
+        self._reset_ui()
+        if self.tabela_consultas is not None:
+            ConsultaTransacoesWindow(self, self.tabela_consultas)
+        if self.busca_saturacao is not None and self.busca_saturacao.estagios:
+            RelatorioSaturacaoWindow(self, self.busca_saturacao.relatorio())
 
-            if is_erro:
-                self._atualizar_log(
-                    f"[{index}] Comunicação realizada com sucesso. Retorno com falhas.",
-                    tags="erro_servico",
+    def _receber_lote(self, lote, motor_envio):
+        """
+        Chamado pelo motor, fora da thread da UI, a cada envio ou lote.
+
+        As linhas vão direto para o buffer do LogVirtual; nenhum `after` é
+        agendado por resultado.
+        """
+        if motor_envio.deve_interromper.is_set():
+            return
+        if self.tabela_consultas is not None:
+            self.tabela_consultas.registrar(lote)
+        for resultado in lote:
+            if resultado["erro"] is not None:
+                tentativas = (
+                    f" (após {resultado['tentativas']} novas tentativas)"
+                    if resultado["tentativas"]
+                    else ""
                 )
-            else:
                 self._atualizar_log(
-                    f"[{index}] SUCESSO: Comunicação realizada com sucesso.",
-                    tags="sucesso",
+                    f"[{self._rotulo(resultado)}] FALHA: Erro de conexão: "
+                    f"{resultado['erro']}{tentativas}",
+                    ("erro_conexao",),
                 )
+            else:
+                self._processar_resposta_servico(resultado)
+        self._ultimo_indice = lote[-1]["indice"]
 
-            msg_element = inner_root.find("Mensagem")
-            cod_element = inner_root.find("CodTransacao")
-            mensagem = (
-                msg_element.text
-                if msg_element is not None and msg_element.text is not None
-                else "N/A"
+    def _atualizar_progresso(self, motor_envio):
+        """Atualiza o rótulo de progresso e o painel algumas vezes por segundo."""
+        if motor_envio is not self.motor_envio or not self.worker_thread.is_alive():
+            return
+        self.painel.adicionar_amostra(motor_envio.amostrar())
+        if motor_envio.disjuntor is not None and motor_envio.disjuntor.esta_aberto():
+            self.progress_label.config(
+                text="Disjuntor aberto: envios pausados até a sonda responder..."
+            )
+        elif self.busca_saturacao is not None:
+            busca = self.busca_saturacao
+            self.progress_label.config(
+                text=f"Busca de saturação: estágio {busca.estagio_atual} "
+                f"({busca.taxa_atual:g} req/s)..."
             )
-            cod_transacao = cod_element.text if cod_element is not None else "N/A"
-            resumo = (
-                f"\n  Mensagem: {mensagem}\n  Código da Transação: {cod_transacao}\n"
+        elif self._ultimo_indice:
+            total = f" de {self.repetitions}" if self.repetitions else ""
+            limite = motor_envio.limite_atual()
+            simultaneos = f" ({limite} simultâneos)" if limite is not None else ""
+            self.progress_label.config(
+                text=f"Enviando {self._ultimo_indice}{total}...{simultaneos}"
             )
-            self._atualizar_log(escape(resumo), tags="response")
+        if self.last_response_text:
+            self.view_xml_btn.config(state="normal")
+        self.after(200, self._atualizar_progresso, motor_envio)
 
-        except (ET.ParseError, AttributeError):
+    def _processar_resposta_servico(self, resultado):
+        """Registra no log uma resposta já interpretada pelo motor."""
+        index = self._rotulo(resultado)
+        self.last_response_text = resultado["texto"]
+
+        if resultado["resposta"] == "invalida":
             self._atualizar_log(
                 f"[{index}] ERRO: Não foi possível parsear o XML de resposta.",
                 tags="erro_conexao",
             )
-            self._atualizar_log(escape(response_text), tags="response")
+            trecho = resultado["texto"][:LIMITE_TRECHO_LOG]
+            if len(resultado["texto"]) > LIMITE_TRECHO_LOG:
+                trecho += " [...] (use 'Visualizar XML de Retorno')"
+            self._atualizar_log(escape(trecho), tags="response")
+            return
+
+        if resultado["resposta"] == "vazia":
+            self._atualizar_log(
+                f"[{index}] SUCESSO: Comunicação realizada, mas o servidor retornou uma resposta vazia.",
+                tags="sucesso",
+            )
+            return
+
+        if resultado["status"] == "erro_servico":
+            self._atualizar_log(
+                f"[{index}] Comunicação realizada com sucesso. Retorno com falhas.",
+                tags="erro_servico",
+            )
+        else:
+            self._atualizar_log(
+                f"[{index}] SUCESSO: Comunicação realizada com sucesso.",
+                tags="sucesso",
+            )
+
+        mensagem = resultado["mensagem"] or "N/A"
+        cod_transacao = resultado["cod_transacao"] or "N/A"
+        resumo = f"\n  Mensagem: {mensagem}\n  Código da Transação: {cod_transacao}\n"
+        self._atualizar_log(escape(resumo), tags="response")
+
+    def _rotulo(self, resultado):
+        """
+        Número do envio e, em campanhas, o serviço do cenário e o registro do
+        corpus de origem.
+        """
+        partes = [resultado["servico"], resultado["origem"]]
+        if any(partes):
+            return " | ".join([str(resultado["indice"]), *filter(None, partes)])
+        return resultado["indice"]
+
+    def usar_modelo_agentes(self, modelo):
+        """
+        Passa a gerar um agente 207 por envio a partir de `modelo` (ver
+        agente_207.completar_modelo); None volta ao 'XML Envio' ou ao corpus.
+        """
+        self.modelo_agentes = modelo
+        if modelo is None:
+            self.agentes_label.config(text="Não")
+            self.remover_agentes_btn.config(state="disabled")
+            return
+        natureza = "Empresa" if modelo["natureza"] == "empresa" else "Pessoa"
+        self.agentes_label.config(
+            text=f"Agentes 207 ({natureza} {modelo['tipo_pessoa']}, "
+            f"{modelo['municipio']}/{modelo['estado']}, filial {modelo['filial']})"
+        )
+        self.remover_agentes_btn.config(state="normal")
+        self.config_notebook.select(self.agentes_label.master)
+
+    def _selecionar_corpus(self, pasta):
+        if pasta:
+            caminho = filedialog.askdirectory(title="Pasta com os payloads")
+        else:
+            caminho = filedialog.askopenfilename(
+                title="Arquivo de payloads",
+                filetypes=[
+                    ("JSONL ou XML", "*.jsonl *.xml"),
+                    ("Todos os arquivos", "*.*"),
+                ],
+            )
+        if caminho:
+            self.corpus_entry.delete(0, "end")
+            self.corpus_entry.insert(0, caminho)
+
+    def _selecionar_cenario(self):
+        caminho = filedialog.askopenfilename(
+            title="Cenário de serviços",
+            filetypes=[("JSON", "*.json"), ("Todos os arquivos", "*.*")],
+        )
+        if caminho:
+            self.cenario_entry.delete(0, "end")
+            self.cenario_entry.insert(0, caminho)
 
-    def _format_xml(self, xml_string):
+    def _on_resultados_click(self):
         try:
-            dom = minidom.parseString(xml_string)
-            return dom.toprettyxml(indent="    ")
-        except (xml.parsers.expat.ExpatError, TypeError):
-            return xml_string
+            ResultadosBancoWindow(self, BancoResultados())
+        except sqlite3.Error as e:
+            messagebox.showerror("Erro", f"Não foi possível abrir o banco:\n{e}")
+
+    def _selecionar_transacoes(self):
+        caminho = filedialog.askopenfilename(
+            title="Códigos de transação",
+            filetypes=[
+                ("Texto ou CSV", "*.txt *.csv"),
+                ("Todos os arquivos", "*.*"),
+            ],
+        )
+        if caminho:
+            self.transacoes_entry.delete(0, "end")
+            self.transacoes_entry.insert(0, caminho)
 
     def _on_view_xml_click(self):
-        if not self.last_response_text:
+        numero = self.envio_xml_entry.get().strip()
+        if numero:
+            registro = self._ler_resposta_arquivada(int(numero))
+            if registro is None:
+                return
+            texto = registro["texto"]
+            titulo = (
+                f"Envio #{registro['indice']} - {registro['status']} - "
+                f"{registro['latencia'] * 1000:.1f} ms - "
+                f"CodTransacao: {registro['cod_transacao'] or 'N/A'}"
+            )
+        elif not self.last_response_text:
             messagebox.showinfo(
                 "Nenhuma Resposta", "Nenhuma resposta foi recebida ainda."
             )
             return
-        modal = tk.Toplevel(self)
-        modal.title("XML de Retorno Completo")
-        modal.geometry("800x600")
-        modal.transient(self)
-        modal.grab_set()
-        text_widget = scrolledtext.ScrolledText(
-            modal, font=("Consolas", 10), wrap=tk.WORD
-        )
-        text_widget.pack(fill="both", expand=True, padx=10, pady=10)
+        else:
+            texto = self.last_response_text
+            titulo = "XML de Retorno Completo"
 
-        try:
-            root = ET.fromstring(self.last_response_text)
-            result_text = root.find(".//{http://tempuri.org/}Result").text
-            formatted_xml = self._format_xml(result_text or "")
-        except (ET.ParseError, AttributeError):
-            formatted_xml = self._format_xml(self.last_response_text)
+        VisualizadorXmlWindow(self, titulo, texto, preparar=formatar_resposta)
 
-        text_widget.insert("1.0", formatted_xml)
-        text_widget.configure(state="disabled")
-        close_btn = ttk.Button(modal, text="Fechar", command=modal.destroy)
-        close_btn.pack(pady=10)
+    def _ler_resposta_arquivada(self, indice):
+        """Busca um envio no arquivo de respostas, avisando o usuário se não houver."""
+        if self.arquivo_respostas is None:
+            messagebox.showinfo(
+                "Arquivo de Respostas",
+                "Ative 'Arquivar Respostas' antes da execução para consultar "
+                "envios anteriores ao último.",
+            )
+            return None
+        registro = self.arquivo_respostas.ler(indice)
+        if registro is None:
+            messagebox.showinfo(
+                "Arquivo de Respostas",
+                f"O envio {indice} não está no arquivo de respostas.",
+            )
+        return registro
 
     def _reset_ui(self):
+        if self.last_response_text or self.arquivo_respostas:
+            self.view_xml_btn.config(state="normal")
         self.start_btn.config(state="normal")
+        self.saturacao_btn.config(state="normal")
         self.stop_btn.config(state="disabled")
         self.back_btn.config(state="normal")
 
     def _atualizar_log(self, message, tags=None):
-        self.log_text.configure(state="normal")
-        self.log_text.insert("end", message + "\n", tags)
-        self.log_text.configure(state="disabled")
-        self.log_text.see("end")
+        """Pode ser chamado de qualquer thread (ver LogVirtual.adicionar)."""
+        self.log_view.adicionar(message, tags)
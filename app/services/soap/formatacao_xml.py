@@ -0,0 +1,68 @@
+# app/services/soap/formatacao_xml.py
+
+import xml.etree.ElementTree as ET
+
+try:
+    from lxml import etree
+except ImportError:  # Sem lxml, o ElementTree formata (mais devagar).
+    etree = None
+
+from app.services.soap.motor_envio import TAG_RESULT
+
+
+def _analisar(texto):
+    """Elemento raiz do documento, pelo lxml quando disponível."""
+    if etree is not None:
+        parser = etree.XMLParser(
+            remove_blank_text=True,
+            huge_tree=True,
+            resolve_entities=False,
+            no_network=True,
+        )
+        return etree.fromstring(texto.encode("utf-8"), parser)
+    return ET.fromstring(texto)
+
+
+def _erros_analise():
+    if etree is not None:
+        return (etree.XMLSyntaxError, ValueError)
+    return (ET.ParseError, ValueError)
+
+
+def extrair_retorno(texto):
+    """
+    Texto do elemento Result de um envelope de resposta (o XML de retorno
+    do integrador); se não houver Result, o próprio texto.
+    """
+    try:
+        raiz = _analisar(texto)
+    except _erros_analise():
+        return texto
+    result = raiz.find(f".//{TAG_RESULT}")
+    if result is None:
+        return texto
+    return result.text or ""
+
+
+def formatar_xml(texto, indentacao="    "):
+    """
+    Indenta um documento XML, um elemento por linha.
+
+    Com lxml o documento é lido e escrito em C, sem a árvore DOM do minidom,
+    o que importa nas respostas de vários megabytes. Texto que não é XML
+    válido volta sem alteração.
+    """
+    try:
+        raiz = _analisar(texto)
+    except _erros_analise():
+        return texto
+    if etree is not None:
+        etree.indent(raiz, space=indentacao)
+        return etree.tostring(raiz, encoding="unicode")
+    ET.indent(raiz, space=indentacao)
+    return ET.tostring(raiz, encoding="unicode")
+
+
+def formatar_resposta(texto):
+    """XML de retorno de uma resposta, já indentado (ver `extrair_retorno`)."""
+    return formatar_xml(extrair_retorno(texto))
@@ -0,0 +1,316 @@
+# app/services/soap/historico_execucoes.py
+
+import json
+import math
+import os
+from datetime import datetime
+
+from app.services.soap.estatisticas import HistogramaLatencia
+
+# Pasta padrão do histórico (relativa, como a pasta de logs).
+PASTA_HISTORICO = "execucoes"
+
+# Configurações que, diferentes entre duas execuções, tornam a comparação suspeita.
+CAMPOS_CONFIGURACAO = ("url", "motor", "concorrencia", "processos", "carga_aberta")
+PARAMETROS_CONFIGURACAO = ("pro_id", "transacao", "sistema")
+
+
+class HistoricoExecucoes:
+    """
+    Resumos de execuções salvos em disco, um arquivo JSON por execução.
+
+    Além do resumo (configuração, vazão, percentis e contagens por status),
+    cada registro guarda o histograma de latências, para que duas execuções
+    possam ser comparadas com um teste estatístico e não só pelos percentis.
+    """
+
+    def __init__(self, pasta=PASTA_HISTORICO):
+        self.pasta = pasta
+
+    def salvar(self, resumo, histograma, rotulo=""):
+        """
+        Grava uma execução.
+
+        :param resumo: Resumo do MotorEnvio (ver MotorEnvio.resumo).
+        :param histograma: HistogramaLatencia da execução.
+        :param rotulo: Texto livre para identificar a execução (ex.: versão
+                       do integrador).
+        :return: O id da execução salva.
+        """
+        os.makedirs(self.pasta, exist_ok=True)
+        agora = datetime.now()
+        base = f"{agora:%Y%m%d_%H%M%S}"
+        id_execucao = base
+        sufixo = 1
+        while os.path.exists(self._caminho(id_execucao)):
+            sufixo += 1
+            id_execucao = f"{base}_{sufixo}"
+
+        registro = {
+            "id": id_execucao,
+            "data": agora.isoformat(timespec="seconds"),
+            "rotulo": rotulo,
+            "resumo": resumo,
+            "histograma": histograma.exportar(),
+        }
+        with open(self._caminho(id_execucao), "w", encoding="utf-8") as arquivo:
+            json.dump(registro, arquivo, ensure_ascii=False)
+        return id_execucao
+
+    def carregar(self, referencia):
+        """
+        Lê uma execução pelo id ou pelo caminho do arquivo JSON.
+
+        Raises:
+            ValueError: Se a execução não existir.
+        """
+        caminho = referencia
+        if not os.path.isfile(caminho):
+            caminho = self._caminho(referencia)
+        try:
+            with open(caminho, encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+        except FileNotFoundError:
+            raise ValueError(f"Execução não encontrada: {referencia}") from None
+
+    def listar(self):
+        """Execuções salvas, da mais antiga para a mais recente."""
+        if not os.path.isdir(self.pasta):
+            return []
+        execucoes = []
+        for nome in sorted(os.listdir(self.pasta)):
+            if nome.endswith(".json"):
+                execucoes.append(self.carregar(os.path.join(self.pasta, nome)))
+        return execucoes
+
+    def _caminho(self, id_execucao):
+        return os.path.join(self.pasta, f"execucao_{id_execucao}.json")
+
+
+def descrever_execucao(registro):
+    """Uma linha com o id, o rótulo e os números principais de uma execução."""
+    resumo = registro["resumo"]
+    rotulo = f" [{registro['rotulo']}]" if registro.get("rotulo") else ""
+    return (
+        f"{registro['id']}{rotulo} - {resumo['envios']} envios, "
+        f"{resumo['vazao_rps']:.1f} req/s, p99 {resumo['latencia_ms']['p99']:.1f} ms"
+    )
+
+
+def _p_valor(z):
+    """p-valor bicaudal de uma estatística z (normal padrão)."""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def _teste_mann_whitney(base, candidata):
+    """
+    Teste de Mann-Whitney entre dois histogramas de mesma precisão.
+
+    Os buckets já estão em ordem de latência, então os postos saem de uma
+    única passada; valores do mesmo bucket contam como empate.
+
+    :return: (z, p-valor); z > 0 quando a candidata tende a ser mais lenta.
+    """
+    n1, n2 = base.total, candidata.total
+    if not n1 or not n2:
+        return 0.0, 1.0
+    u = 0.0
+    abaixo_base = 0
+    empates = 0
+    for qtd_base, qtd_candidata in zip(base.buckets, candidata.buckets):
+        if qtd_candidata:
+            u += qtd_candidata * (abaixo_base + qtd_base / 2)
+        t = qtd_base + qtd_candidata
+        empates += t**3 - t
+        abaixo_base += qtd_base
+    n = n1 + n2
+    variancia = n1 * n2 / 12 * ((n + 1) - empates / (n * (n - 1)))
+    if variancia <= 0:
+        return 0.0, 1.0
+    z = (u - n1 * n2 / 2) / math.sqrt(variancia)
+    return z, _p_valor(z)
+
+
+def _teste_taxas(n1, t1, n2, t2):
+    """Teste z de duas taxas de Poisson (n eventos em t segundos)."""
+    if t1 <= 0 or t2 <= 0 or not (n1 or n2):
+        return 0.0, 1.0
+    erro_padrao = math.sqrt(n1 / t1**2 + n2 / t2**2)
+    z = (n2 / t2 - n1 / t1) / erro_padrao
+    return z, _p_valor(z)
+
+
+def _teste_proporcoes(x1, n1, x2, n2):
+    """Teste z de duas proporções (x sucessos em n tentativas)."""
+    if not n1 or not n2:
+        return 0.0, 1.0
+    combinada = (x1 + x2) / (n1 + n2)
+    erro_padrao = math.sqrt(combinada * (1 - combinada) * (1 / n1 + 1 / n2))
+    if erro_padrao == 0:
+        return 0.0, 1.0
+    z = (x2 / n2 - x1 / n1) / erro_padrao
+    return z, _p_valor(z)
+
+
+def _variacao(base, candidata):
+    if not base:
+        return None
+    return (candidata - base) / base * 100
+
+
+def comparar_execucoes(base, candidata, limiar=5.0, alfa=0.05):
+    """
+    Compara duas execuções salvas e aponta as regressões da candidata.
+
+    Uma regressão precisa ser estatisticamente significativa (p-valor abaixo
+    de `alfa`) e relevante (variação de pelo menos `limiar`%), para que
+    diferenças mínimas em execuções muito grandes não sejam apontadas:
+        - Vazão: queda, pelo teste de duas taxas de Poisson.
+        - Latência: candidata mais lenta pelo teste de Mann-Whitney sobre os
+          histogramas e p50, p90 ou p99 pelo menos `limiar`% maior.
+        - Taxa de erro: aumento, pelo teste de duas proporções (sem limiar).
+
+    :param base: Registro do HistoricoExecucoes usado como referência.
+    :param candidata: Registro comparado com a base.
+    :return: dict com 'base', 'candidata', 'metricas' (uma entrada por
+             métrica), 'avisos' e 'regressoes' (nomes das métricas).
+    """
+    resumo_base, resumo_candidata = base["resumo"], candidata["resumo"]
+    metricas = []
+
+    def adicionar(metrica, valor_base, valor_candidata, p_valor=None, regressao=False):
+        metricas.append(
+            {
+                "metrica": metrica,
+                "base": valor_base,
+                "candidata": valor_candidata,
+                "variacao_pct": _variacao(valor_base, valor_candidata),
+                "p_valor": p_valor,
+                "regressao": regressao,
+            }
+        )
+
+    _, p_vazao = _teste_taxas(
+        resumo_base["envios"],
+        resumo_base["duracao_s"],
+        resumo_candidata["envios"],
+        resumo_candidata["duracao_s"],
+    )
+    variacao_vazao = _variacao(resumo_base["vazao_rps"], resumo_candidata["vazao_rps"])
+    adicionar(
+        "vazao_rps",
+        resumo_base["vazao_rps"],
+        resumo_candidata["vazao_rps"],
+        p_vazao,
+        p_vazao < alfa and variacao_vazao is not None and variacao_vazao <= -limiar,
+    )
+
+    z_latencia, p_latencia = _teste_mann_whitney(
+        HistogramaLatencia.importar(base["histograma"]),
+        HistogramaLatencia.importar(candidata["histograma"]),
+    )
+    latencia_base = resumo_base["latencia_ms"]
+    latencia_candidata = resumo_candidata["latencia_ms"]
+    significativa = z_latencia > 0 and p_latencia < alfa
+    for percentil in ("p50", "p90", "p99", "p99.9"):
+        variacao = _variacao(latencia_base[percentil], latencia_candidata[percentil])
+        adicionar(
+            f"latencia_{percentil}_ms",
+            latencia_base[percentil],
+            latencia_candidata[percentil],
+            p_latencia,
+            significativa
+            and percentil != "p99.9"
+            and variacao is not None
+            and variacao >= limiar,
+        )
+
+    erros_base = resumo_base["envios"] - resumo_base["contagens"]["sucesso"]
+    erros_candidata = (
+        resumo_candidata["envios"] - resumo_candidata["contagens"]["sucesso"]
+    )
+    z_erros, p_erros = _teste_proporcoes(
+        erros_base, resumo_base["envios"], erros_candidata, resumo_candidata["envios"]
+    )
+    adicionar(
+        "taxa_erro_pct",
+        (
+            round(erros_base / resumo_base["envios"] * 100, 2)
+            if resumo_base["envios"]
+            else 0
+        ),
+        (
+            round(erros_candidata / resumo_candidata["envios"] * 100, 2)
+            if resumo_candidata["envios"]
+            else 0
+        ),
+        p_erros,
+        z_erros > 0 and p_erros < alfa,
+    )
+
+    avisos = []
+    for campo in CAMPOS_CONFIGURACAO:
+        if resumo_base.get(campo) != resumo_candidata.get(campo):
+            avisos.append(
+                f"'{campo}' diferente: {resumo_base.get(campo)} x "
+                f"{resumo_candidata.get(campo)}"
+            )
+    parametros_base = resumo_base.get("parametros") or {}
+    parametros_candidata = resumo_candidata.get("parametros") or {}
+    for campo in PARAMETROS_CONFIGURACAO:
+        if parametros_base.get(campo) != parametros_candidata.get(campo):
+            avisos.append(
+                f"'{campo}' diferente: {parametros_base.get(campo)} x "
+                f"{parametros_candidata.get(campo)}"
+            )
+    cenario_base = (resumo_base.get("cenario") or {}).get("nome")
+    cenario_candidata = (resumo_candidata.get("cenario") or {}).get("nome")
+    if cenario_base != cenario_candidata:
+        avisos.append(f"'cenario' diferente: {cenario_base} x {cenario_candidata}")
+    for registro in (base, candidata):
+        if registro["resumo"].get("interrompido"):
+            avisos.append(f"A execução {registro['id']} foi interrompida.")
+
+    return {
+        "base": base["id"],
+        "candidata": candidata["id"],
+        "limiar_pct": limiar,
+        "alfa": alfa,
+        "metricas": metricas,
+        "avisos": avisos,
+        "regressoes": [m["metrica"] for m in metricas if m["regressao"]],
+    }
+
+
+def formatar_comparacao(comparacao):
+    """Linhas de texto da comparação, como `formatar_resumo`."""
+    linhas = [
+        f"--- Comparação: {comparacao['base']} (base) x "
+        f"{comparacao['candidata']} (candidata) ---"
+    ]
+    for metrica in comparacao["metricas"]:
+        variacao = (
+            f"{metrica['variacao_pct']:+.1f}%"
+            if metrica["variacao_pct"] is not None
+            else "-"
+        )
+        p_valor = (
+            f" | p={metrica['p_valor']:.3g}" if metrica["p_valor"] is not None else ""
+        )
+        marca = "  << REGRESSÃO" if metrica["regressao"] else ""
+        linhas.append(
+            f"{metrica['metrica']}: {metrica['base']} -> {metrica['candidata']} "
+            f"({variacao}{p_valor}){marca}"
+        )
+    for aviso in comparacao["avisos"]:
+        linhas.append(f"Atenção: {aviso}")
+    if comparacao["regressoes"]:
+        linhas.append(
+            "Regressões significativas: " + ", ".join(comparacao["regressoes"])
+        )
+    else:
+        linhas.append(
+            f"Nenhuma regressão significativa (p < {comparacao['alfa']:g} e "
+            f"variação >= {comparacao['limiar_pct']:g}%)."
+        )
+    return linhas
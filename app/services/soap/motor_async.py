@@ -0,0 +1,486 @@
+# app/services/soap/motor_async.py
+
+import asyncio
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from app.services.soap.envelope import CABECALHOS_SOAP
+from app.services.soap.estatisticas import CronometroFases
+from app.services.soap.perfis_carga import criar_resultado
+from app.services.soap.resiliencia import PoliticaRetentativa, erro_repetivel
+
+
+# Intervalo com que o alimentador, esperando vaga, confere se deve parar.
+ESPERA_ALIMENTADOR = 0.1
+
+# Marca o fim da agenda na fila das tarefas.
+_FIM = object()
+
+
+class ErroHTTP(Exception):
+    """Resposta HTTP com status 4xx/5xx (equivalente ao raise_for_status)."""
+
+    def __init__(self, mensagem, status):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class ClienteHTTPAsync:
+    """
+    Cliente HTTP/1.1 mínimo, não bloqueante, com pool de conexões keep-alive.
+
+    Só implementa o necessário para o POST do envelope SOAP: corpo com
+    Content-Length, resposta com Content-Length, chunked ou até o fechamento
+    da conexão. As conexões ociosas são compartilhadas por todas as tarefas.
+    """
+
+    def __init__(self, limite_conexoes=100, timeout=30, timeout_conexao=5):
+        self.timeout = timeout
+        self.timeout_conexao = timeout_conexao
+        self._limite = asyncio.Semaphore(limite_conexoes)
+        self._ociosas = {}
+        self._ssl = ssl.create_default_context()
+        self.abertas = 0
+        self.requisicoes = 0
+
+    async def post(self, url, corpo, cabecalhos, cronometro=None):
+        """
+        Envia um POST e retorna o texto da resposta.
+
+        `corpo` é um `CorpoEnvelope` (ou outro iterável de bytes com len):
+        suas partes vão para o socket sem serem concatenadas. Com um
+        `CronometroFases`, marca nele as fases HTTP da requisição.
+
+        Uma falha depois que a requisição começou a ser escrita não é
+        repetida aqui (o servidor pode já tê-la recebido): sobe para o motor,
+        que aplica e conta as novas tentativas da PoliticaRetentativa. Só as
+        conexões ociosas já fechadas são trocadas por novas, antes de escrever.
+
+        Raises:
+            ErroHTTP: Se o status for 4xx/5xx.
+            OSError, asyncio.TimeoutError, asyncio.IncompleteReadError: Falhas de rede.
+        """
+        partes = urlsplit(url)
+        tls = partes.scheme == "https"
+        porta = partes.port or (443 if tls else 80)
+        chave = (partes.hostname, porta, tls)
+        alvo = partes.path or "/"
+        if partes.query:
+            alvo += "?" + partes.query
+
+        linhas = [f"POST {alvo} HTTP/1.1", f"Host: {partes.netloc}"]
+        linhas += [f"{nome}: {valor}" for nome, valor in cabecalhos.items()]
+        linhas += [f"Content-Length: {len(corpo)}", "Connection: keep-alive", "", ""]
+        requisicao = ["\r\n".join(linhas).encode("latin-1"), *corpo]
+        if cronometro is None:
+            cronometro = CronometroFases()
+
+        cronometro.marcar("preparo")
+        esgotado = self._limite.locked()
+        async with self._limite:
+            if esgotado:
+                cronometro.marcar("fila")
+            self.requisicoes += 1
+            conexao = self._pegar_ociosa(chave)
+            if conexao is None:
+                self.abertas += 1
+                conexao = await asyncio.wait_for(
+                    self._conectar(partes.hostname, porta, tls, cronometro),
+                    self.timeout_conexao,
+                )
+            return await self._trocar(conexao, chave, requisicao, url, cronometro)
+
+    def estatisticas(self):
+        """Mesmo formato de TransporteSOAP.estatisticas."""
+        return {
+            "conexoes_abertas": self.abertas,
+            "conexoes_reutilizadas": max(0, self.requisicoes - self.abertas),
+        }
+
+    async def fechar(self):
+        """Fecha todas as conexões ociosas do pool."""
+        for conexoes in self._ociosas.values():
+            for _, writer in conexoes:
+                writer.close()
+        self._ociosas.clear()
+
+    def _pegar_ociosa(self, chave):
+        """
+        Conexão ociosa ainda utilizável, ou None. As que o servidor fechou
+        enquanto estavam ociosas (EOF ou erro já recebidos) são descartadas
+        aqui, antes de qualquer byte da requisição ser escrito.
+        """
+        conexoes = self._ociosas.get(chave)
+        while conexoes:
+            reader, writer = conexoes.pop()
+            if (
+                not writer.is_closing()
+                and not reader.at_eof()
+                and reader.exception() is None
+            ):
+                return reader, writer
+            writer.close()
+        return None
+
+    async def _conectar(self, host, porta, tls, cronometro):
+        """Abre uma conexão, marcando DNS, TCP e TLS separadamente."""
+        laco = asyncio.get_running_loop()
+        enderecos = await laco.getaddrinfo(host, porta, type=socket.SOCK_STREAM)
+        cronometro.marcar("dns")
+        # Sem StreamWriter.start_tls (Python < 3.11), o TLS fica na conexão.
+        tls_separado = tls and hasattr(asyncio.StreamWriter, "start_tls")
+        for posicao, (*_, endereco) in enumerate(enderecos):
+            try:
+                if tls and not tls_separado:
+                    conexao = await asyncio.open_connection(
+                        endereco[0], porta, ssl=self._ssl, server_hostname=host
+                    )
+                else:
+                    conexao = await asyncio.open_connection(endereco[0], porta)
+                break
+            except OSError:
+                if posicao == len(enderecos) - 1:
+                    raise
+        cronometro.marcar("conexao")
+        if tls_separado:
+            reader, writer = conexao
+            try:
+                await writer.start_tls(self._ssl, server_hostname=host)
+            except BaseException:
+                writer.close()
+                raise
+            cronometro.marcar("tls")
+        return conexao
+
+    async def _trocar(self, conexao, chave, requisicao, url, cronometro):
+        reader, writer = conexao
+        try:
+            writer.writelines(requisicao)
+            await writer.drain()
+            cronometro.marcar("envio")
+            status, razao, manter, texto = await asyncio.wait_for(
+                self._ler_resposta(reader, cronometro), self.timeout
+            )
+        except BaseException:
+            # Inclui o CancelledError do "Interromper": a conexão é abortada na hora.
+            writer.close()
+            raise
+
+        if manter:
+            self._ociosas.setdefault(chave, []).append(conexao)
+        else:
+            writer.close()
+
+        if status >= 400:
+            raise ErroHTTP(f"{status} {razao} para url: {url}", status)
+        return texto
+
+    async def _ler_resposta(self, reader, cronometro):
+        linha_status = await reader.readline()
+        if not linha_status:
+            raise asyncio.IncompleteReadError(b"", None)
+        versao, status, *razao = linha_status.decode("latin-1").split(" ", 2)
+        cabecalhos = {}
+        while True:
+            linha = await reader.readline()
+            if linha in (b"\r\n", b"\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+        cronometro.marcar("espera")
+
+        if cabecalhos.get("transfer-encoding", "").lower() == "chunked":
+            partes = []
+            while True:
+                tamanho = int((await reader.readline()).split(b";")[0], 16)
+                if tamanho == 0:
+                    await reader.readline()
+                    break
+                partes.append(await reader.readexactly(tamanho))
+                await reader.readexactly(2)
+            corpo = b"".join(partes)
+            completo = True
+        elif "content-length" in cabecalhos:
+            corpo = await reader.readexactly(int(cabecalhos["content-length"]))
+            completo = True
+        else:
+            corpo = await reader.read()
+            completo = False
+        cronometro.marcar("download")
+
+        conexao = cabecalhos.get("connection", "").lower()
+        manter = completo and (
+            conexao == "keep-alive" if versao == "HTTP/1.0" else conexao != "close"
+        )
+
+        charset = "utf-8"
+        for parte in cabecalhos.get("content-type", "").split(";")[1:]:
+            nome, _, valor = parte.strip().partition("=")
+            if nome.lower() == "charset" and valor:
+                charset = valor.strip('"')
+        try:
+            texto = corpo.decode(charset, errors="replace")
+        except LookupError:
+            texto = corpo.decode("utf-8", errors="replace")
+
+        return int(status), " ".join(razao).strip(), manter, texto
+
+
+class MotorAsync:
+    """
+    Motor de envio baseado em asyncio, para milhares de envios simultâneos.
+
+    Roda um event loop próprio na thread que chama `executar` e entrega os
+    resultados em lotes, a cada `intervalo_lote` segundos, pelo callback
+    `ao_lote`. Cada resultado é um dict criado por `criar_resultado`.
+    """
+
+    def __init__(
+        self,
+        concorrencia,
+        deve_interromper,
+        tamanho_pool=None,
+        timeout_conexao=5,
+        timeout_leitura=30,
+        intervalo_lote=0.1,
+        politica=None,
+        disjuntor=None,
+        balanceador=None,
+        limite_adaptativo=None,
+    ):
+        self.concorrencia = max(1, int(concorrencia))
+        self.deve_interromper = deve_interromper
+        self.tamanho_pool = tamanho_pool or self.concorrencia
+        self.timeout_conexao = timeout_conexao
+        self.timeout_leitura = timeout_leitura
+        self.intervalo_lote = intervalo_lote
+        self.politica = politica or PoliticaRetentativa()
+        self.disjuntor = disjuntor
+        self.balanceador = balanceador
+        self.limite_adaptativo = limite_adaptativo
+        self.estatisticas_conexoes = {}
+        # Lido pelo painel da tela; só o event loop escreve.
+        self.em_andamento = 0
+
+    def executar(self, url, agenda, ao_lote, agenda_bloqueante=False):
+        """
+        Envia um envelope por item da agenda. Cada item é
+        `((indice, corpo), instante_previsto)`, como gerado por
+        `perfis_carga.gerar_agenda` sobre os envios do MotorEnvio (`corpo` é um
+        CorpoEnvelope); com instante previsto o envio espera até ele.
+
+        Como no motor com threads, falhas repetíveis ganham novas tentativas
+        conforme a `politica` e o `disjuntor` (se houver) segura os envios
+        enquanto estiver aberto. Cada resultado traz em 'tentativas' quantas
+        novas tentativas foram feitas.
+
+        :param agenda_bloqueante: True se pegar o próximo item pode demorar
+                                  (ex.: corpus de uma FilaGeracao, que espera
+                                  o gerador). A agenda é então percorrida numa
+                                  thread à parte, para não parar o event loop
+                                  que lê as respostas em andamento; sem isso,
+                                  as tarefas a percorrem direto no loop, que é
+                                  mais barato.
+        :return: True se todos os itens foram processados, False caso contrário.
+        """
+        return asyncio.run(self._executar(url, agenda, ao_lote, agenda_bloqueante))
+
+    async def _executar(self, url, agenda, ao_lote, agenda_bloqueante):
+        cliente = ClienteHTTPAsync(
+            self.tamanho_pool, self.timeout_leitura, self.timeout_conexao
+        )
+        iterador = iter(agenda)
+        loop = asyncio.get_running_loop()
+        fila = asyncio.Queue()
+        # No máximo um item pronto por tarefa: o alimentador não adianta a
+        # agenda (e a geração) mais do que os envios conseguem consumir.
+        vagas = threading.Semaphore(self.concorrencia)
+        parar = threading.Event()
+        erros = []
+        lote = []
+        limite = self.limite_adaptativo
+        # Tarefas esperando uma vaga do limite adaptativo, na ordem de chegada.
+        esperando_vaga = deque()
+
+        async def reservar_vaga():
+            while not limite.adquirir():
+                futuro = asyncio.get_running_loop().create_future()
+                esperando_vaga.append(futuro)
+                await futuro
+
+        def liberar_vaga(latencia, sucesso):
+            # Acorda só quantas tarefas couberem, não todas a cada resposta.
+            limite.liberar(latencia, sucesso)
+            livres = limite.vagas_livres()
+            while esperando_vaga and livres > 0:
+                futuro = esperando_vaga.popleft()
+                if not futuro.done():
+                    futuro.set_result(None)
+                    livres -= 1
+
+        async def enviar(corpo):
+            """
+            Envia com novas tentativas; retorna (texto, erro, tentativas, url,
+            fases da última tentativa).
+            """
+            tentativa = 0
+            while True:
+                endpoint = None
+                destino = url
+                if self.balanceador is not None:
+                    endpoint = self.balanceador.escolher()
+                    destino = endpoint.url
+                inicio = time.perf_counter()
+                cronometro = CronometroFases()
+                try:
+                    texto = await cliente.post(
+                        destino, corpo, CABECALHOS_SOAP, cronometro
+                    )
+                    if endpoint is not None:
+                        self.balanceador.liberar(
+                            endpoint, True, time.perf_counter() - inicio
+                        )
+                    return texto, None, tentativa, destino, cronometro.fases
+                except asyncio.CancelledError:
+                    if endpoint is not None:
+                        self.balanceador.liberar(endpoint, True)
+                    raise
+                except (
+                    OSError,
+                    ErroHTTP,
+                    asyncio.TimeoutError,
+                    asyncio.IncompleteReadError,
+                    ValueError,
+                ) as e:
+                    status = e.status if isinstance(e, ErroHTTP) else None
+                    if endpoint is not None:
+                        self.balanceador.liberar(
+                            endpoint,
+                            not erro_repetivel(status),
+                            None if status is None else time.perf_counter() - inicio,
+                        )
+                    if tentativa >= self.politica.tentativas or not erro_repetivel(
+                        status
+                    ):
+                        return (
+                            None,
+                            str(e) or type(e).__name__,
+                            tentativa,
+                            destino,
+                            cronometro.fases,
+                        )
+                tentativa += 1
+                await asyncio.sleep(self.politica.espera(tentativa))
+
+        def entregar(item):
+            """Entrega o item às tarefas, esperando vaga; False se a execução acabou."""
+            while not (parar.is_set() or self.deve_interromper.is_set()):
+                if vagas.acquire(timeout=ESPERA_ALIMENTADOR):
+                    loop.call_soon_threadsafe(fila.put_nowait, item)
+                    return True
+            return False
+
+        def alimentar():
+            # Com agenda bloqueante: percorre a agenda fora do event loop.
+            try:
+                for item in iterador:
+                    if not entregar(item):
+                        return
+            except Exception as e:
+                erros.append(e)
+            finally:
+                loop.call_soon_threadsafe(fila.put_nowait, _FIM)
+
+        async def proximo():
+            if not agenda_bloqueante:
+                return next(iterador, _FIM)
+            item = await fila.get()
+            if item is _FIM:
+                # Repõe a marca para as outras tarefas também pararem.
+                fila.put_nowait(_FIM)
+            else:
+                vagas.release()
+            return item
+
+        async def trabalhar():
+            # A agenda é compartilhada: cada tarefa pega o próximo item livre.
+            while True:
+                item = await proximo()
+                if item is _FIM:
+                    return
+                (i, corpo), previsto = item
+                if self.deve_interromper.is_set():
+                    return
+                if previsto is not None:
+                    espera = previsto - time.perf_counter()
+                    if espera > 0:
+                        await asyncio.sleep(espera)
+                if self.disjuntor is not None:
+                    espera = self.disjuntor.permitir()
+                    while espera > 0:
+                        await asyncio.sleep(espera)
+                        espera = self.disjuntor.permitir()
+                if limite is not None:
+                    await reservar_vaga()
+                inicio = time.perf_counter()
+                self.em_andamento += 1
+                erro = "Interrompido"
+                try:
+                    texto, erro, tentativas, destino, fases = await enviar(corpo)
+                finally:
+                    self.em_andamento -= 1
+                    if limite is not None:
+                        liberar_vaga(time.perf_counter() - inicio, erro is None)
+                if self.disjuntor is not None:
+                    self.disjuntor.registrar(erro is None)
+                lote.append(
+                    criar_resultado(
+                        i,
+                        previsto,
+                        inicio,
+                        time.perf_counter(),
+                        texto,
+                        erro,
+                        tentativas,
+                        destino,
+                        fases,
+                    )
+                )
+
+        def descarregar():
+            if lote:
+                ao_lote(lote[:])
+                lote.clear()
+
+        alimentador = None
+        if agenda_bloqueante:
+            alimentador = threading.Thread(target=alimentar, daemon=True)
+            alimentador.start()
+        trabalhadores = asyncio.gather(*(trabalhar() for _ in range(self.concorrencia)))
+        try:
+            while not trabalhadores.done():
+                await asyncio.wait({trabalhadores}, timeout=self.intervalo_lote)
+                if self.deve_interromper.is_set():
+                    trabalhadores.cancel()
+                    break
+                descarregar()
+            try:
+                await trabalhadores
+            except asyncio.CancelledError:
+                return False
+            descarregar()
+            if erros:
+                raise erros[0]
+            return True
+        finally:
+            # O alimentador termina o item em que está (e não pega outro)
+            # antes de o loop fechar.
+            if alimentador is not None:
+                parar.set()
+                alimentador.join()
+            self.estatisticas_conexoes = cliente.estatisticas()
+            await cliente.fechar()
@@ -0,0 +1,704 @@
+# app/services/soap/motor_envio.py
+
+import itertools
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import requests
+
+from app.services.soap.envelope import ModeloEnvelope
+from app.services.soap.estatisticas import EstatisticasExecucao, MedidorAoVivo
+from app.services.soap.motor_async import MotorAsync
+from app.services.soap.multiprocesso import executar_em_processos
+from app.services.soap.perfis_carga import (
+    criar_resultado,
+    despachar_agenda,
+    gerar_agenda,
+)
+from app.services.soap.pipeline_geracao import FilaGeracao
+from app.services.soap.pool_envio import PoolEnvio
+from app.services.soap.resiliencia import PoliticaRetentativa, erro_repetivel
+from app.services.soap.transporte import TransporteSOAP
+
+MOTORES = ("Threads", "Asyncio")
+# Espera máxima por uma vaga do limite adaptativo antes de conferir a interrupção.
+ESPERA_VAGA = 0.05
+
+
+def construir_url(url_base, porta):
+    """Monta a URL do MegaIntegradorService a partir do host e da porta."""
+    url_base = url_base.strip()
+    if not url_base.lower().startswith(("http://", "https://")):
+        url_base = "http://" + url_base
+    url_base = url_base.rstrip("/")
+    return f"{url_base}:{porta.strip()}/SOAP?service=MegaIntegradorService"
+
+
+def construir_endpoints(texto, porta):
+    """
+    Monta as URLs de uma ou mais instâncias do integrador.
+
+    `texto` aceita várias instâncias separadas por vírgula ou ponto e vírgula,
+    cada uma como `host[:porta][*peso]` (ex.: "int01, int02:8111*2"); sem
+    porta, vale `porta`.
+
+    Returns:
+        list: `(url, peso)` de cada instância.
+
+    Raises:
+        ValueError: Se nenhuma instância for informada ou um peso for inválido.
+    """
+    endpoints = []
+    for item in texto.replace(";", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        peso = 1
+        if "*" in item:
+            item, peso_texto = item.rsplit("*", 1)
+            if not peso_texto.strip().isdigit() or int(peso_texto) < 1:
+                raise ValueError(f"Peso inválido em '{item}*{peso_texto}'.")
+            peso = int(peso_texto)
+        host = item.strip().rstrip("/")
+        porta_item = porta
+        sem_esquema = host.split("://", 1)[-1]
+        if ":" in sem_esquema:
+            host, porta_item = host.rsplit(":", 1)
+        endpoints.append((construir_url(host, porta_item), peso))
+    if not endpoints:
+        raise ValueError("Informe o computador/URL do integrador.")
+    return endpoints
+
+
+def validar_parametros(parametros, com_corpus=False, com_transacoes=False):
+    """
+    Aplica as regras de preenchimento dos parâmetros da requisição.
+
+    :param com_corpus: Os payloads virão de um corpus (valem as regras de
+                       'XML Envio' preenchido).
+    :param com_transacoes: Consulta em lote; os códigos vêm de uma lista e
+                           o 'XML Envio' deve ficar vazio.
+
+    Raises:
+        ValueError: Com a mensagem a ser mostrada ao usuário.
+    """
+    obrigatorios = ("pro_id", "usu_codigo", "transacao", "sistema")
+    if not all(parametros.get(campo) for campo in obrigatorios):
+        raise ValueError(
+            "Todos os campos de parâmetros, exceto 'Obs', são obrigatórios."
+        )
+    if parametros["pro_id"] == "0000":
+        raise ValueError("O 'Cód. Serviço' deve ser diferente de 0000.")
+    if com_transacoes and parametros["payload"]:
+        raise ValueError(
+            "Na consulta de transações em lote, deixe o 'XML Envio' vazio."
+        )
+    if (parametros["payload"] or com_corpus) and parametros["transacao"] != "0":
+        raise ValueError(
+            "Se o 'XML Envio' for preenchido, o 'Cód. Transação' deve ser 0."
+        )
+
+
+# Elemento do envelope de resposta com o XML de retorno do integrador.
+TAG_RESULT = "{http://tempuri.org/}Result"
+# Campos do XML de retorno que interessam à ferramenta.
+CAMPOS_RETORNO = ("Erro", "Mensagem", "CodTransacao")
+# Tamanho dos blocos entregues ao parser incremental.
+TAMANHO_BLOCO_PARSE = 64 * 1024
+
+
+def _eventos_xml(texto, eventos):
+    """
+    Entrega o texto a um XMLPullParser em blocos e gera os eventos conforme
+    aparecem, para que quem consome possa parar antes do fim do documento.
+    """
+    parser = ET.XMLPullParser(events=eventos)
+    for inicio in range(0, len(texto), TAMANHO_BLOCO_PARSE):
+        parser.feed(texto[inicio : inicio + TAMANHO_BLOCO_PARSE])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _extrair_result(texto):
+    """Retorna o texto do elemento Result; AttributeError se não existir."""
+    for _, elemento in _eventos_xml(texto, ("end",)):
+        if elemento.tag == TAG_RESULT:
+            return elemento.text
+    raise AttributeError("Elemento Result ausente na resposta.")
+
+
+def _extrair_campos(result_text):
+    """
+    Lê os filhos diretos Erro, Mensagem e CodTransacao do XML de retorno,
+    parando assim que os três forem encontrados.
+    """
+    campos = {}
+    profundidade = 0
+    for evento, elemento in _eventos_xml(result_text, ("start", "end")):
+        if evento == "start":
+            profundidade += 1
+            continue
+        profundidade -= 1
+        if profundidade == 1 and elemento.tag in CAMPOS_RETORNO:
+            campos.setdefault(elemento.tag, elemento.text)
+            if len(campos) == len(CAMPOS_RETORNO):
+                break
+        if profundidade >= 1:
+            elemento.clear()
+    return campos
+
+
+def interpretar_resposta(texto):
+    """
+    Extrai o status do envelope de resposta do IntegraXMLString.
+
+    Roda nos workers do motor, não na thread da UI. O envelope e o XML de
+    retorno são lidos de forma incremental e a leitura para assim que o
+    Result (no envelope) e os campos de interesse (no retorno) aparecem;
+    o restante dos documentos não é validado.
+
+    Returns:
+        dict: 'status' ('sucesso', 'erro_servico' ou 'erro_conexao'),
+              'resposta' ('completa', 'vazia' ou 'invalida'),
+              'mensagem' e 'cod_transacao' (None quando ausentes).
+    """
+    try:
+        result_text = _extrair_result(texto)
+        if result_text is None:
+            return {
+                "status": "sucesso",
+                "resposta": "vazia",
+                "mensagem": None,
+                "cod_transacao": None,
+            }
+
+        campos = _extrair_campos(result_text)
+        is_erro = "Erro" in campos and campos["Erro"].lower() == "true"
+        return {
+            "status": "erro_servico" if is_erro else "sucesso",
+            "resposta": "completa",
+            "mensagem": campos.get("Mensagem"),
+            "cod_transacao": campos.get("CodTransacao"),
+        }
+    except (ET.ParseError, AttributeError):
+        return {
+            "status": "erro_conexao",
+            "resposta": "invalida",
+            "mensagem": None,
+            "cod_transacao": None,
+        }
+
+
+class MotorEnvio:
+    """
+    Executa uma rodada de envios SOAP, independente de interface gráfica.
+
+    É usado tanto pela FerramentaSOAPFrame quanto pelo cli.py: recebe a
+    configuração já validada, dispara os envios com o motor escolhido
+    (Threads ou Asyncio), classifica as respostas, acumula as estatísticas
+    e devolve um resumo serializável em JSON.
+    """
+
+    def __init__(
+        self,
+        url,
+        parametros,
+        repeticoes,
+        concorrencia=1,
+        motor="Threads",
+        perfil=None,
+        config_conexao=None,
+        tentativas=0,
+        arquivo_respostas=None,
+        corpus=None,
+        backoff_base=0.2,
+        disjuntor=None,
+        balanceador=None,
+        processos=1,
+        particao=None,
+        transacoes=None,
+        gravador_resultados=None,
+        limite_adaptativo=None,
+        cenario=None,
+    ):
+        """
+        :param url: URL final do serviço (ver construir_url); ignorada quando
+                    há `balanceador`.
+        :param parametros: dict com 'pro_id', 'usu_codigo', 'payload', 'obs',
+                           'transacao' e 'sistema'.
+        :param repeticoes: Número de envios. Com corpus, limita quantos
+                           registros são enviados (0 ou None = todos).
+        :param concorrencia: Máximo de envios simultâneos.
+        :param motor: "Threads" ou "Asyncio".
+        :param perfil: PerfilCarga para carga aberta, ou None para carga fechada.
+        :param config_conexao: dict com 'tamanho_pool', 'timeout_conexao' e
+                               'timeout_leitura' (padrões do TransporteSOAP).
+        :param tentativas: Novas tentativas por envio em falha de conexão,
+                           timeout ou HTTP 5xx (ver PoliticaRetentativa).
+        :param arquivo_respostas: ArquivoRespostas onde cada resposta é guardada,
+                                  ou None. Quem cria é quem fecha.
+        :param corpus: CorpusPayloads (ou iterável de `(origem, payload)`) com
+                       um payload por envio, no lugar do payload dos parâmetros.
+        :param backoff_base: Teto da primeira espera entre tentativas (s).
+        :param disjuntor: DisjuntorCircuito que pausa os envios quando a taxa
+                          de erro sobe, ou None. Sem ele, a execução segue até
+                          o fim mesmo com erros.
+        :param balanceador: BalanceadorEndpoints que escolhe a instância de
+                            cada tentativa, ou None para enviar só a `url`.
+        :param processos: Processos que dividem os envios (ver
+                          multiprocesso.executar_em_processos); 1 = só este.
+        :param particao: `(k, n)` para enviar só a parte do processo `k` de
+                         `n`; usado pelos processos filhos.
+        :param transacoes: ListaTransacoes (ou iterável de `(origem, codigo)`)
+                           para consultar cada código em um envio (pTransacao
+                           com pXML vazio), no lugar de repetir os parâmetros.
+        :param gravador_resultados: GravadorResultados (banco SQLite) que
+                                    recebe cada resultado, ou None. Quem cria
+                                    é quem fecha.
+        :param limite_adaptativo: LimiteAdaptativo que ajusta os envios em
+                                  andamento pela latência medida, com a
+                                  `concorrencia` como máximo; None = fixo.
+        :param cenario: CenarioCarga (já preparado) com a mistura de serviços
+                        intercalados na execução, cada um com os seus
+                        parâmetros e payloads, no lugar de `parametros`,
+                        corpus e transações.
+        """
+        if motor not in MOTORES:
+            raise ValueError(f"Motor de envio desconhecido: {motor}")
+        if corpus is not None and transacoes is not None:
+            raise ValueError("Use um corpus de payloads ou uma lista de transações.")
+        if cenario is not None and (corpus is not None or transacoes is not None):
+            raise ValueError("Com um cenário, os payloads vêm dos serviços dele.")
+        processos = max(1, int(processos))
+        if processos > max(1, int(concorrencia)):
+            raise ValueError(
+                "Os 'Envios Simultâneos' devem ser no mínimo o número de processos."
+            )
+        self.balanceador = balanceador
+        self.url = url if balanceador is None else ", ".join(balanceador.urls)
+        self.parametros = parametros
+        self.repeticoes = repeticoes
+        self.concorrencia = max(1, int(concorrencia))
+        self.motor = motor
+        self.perfil = perfil
+        self.config_conexao = config_conexao or {}
+        self.tentativas = tentativas
+        self.politica = PoliticaRetentativa(tentativas, backoff_base)
+        self.disjuntor = disjuntor
+        self.arquivo_respostas = arquivo_respostas
+        self.gravador_resultados = gravador_resultados
+        self.limite_adaptativo = limite_adaptativo
+        self.corpus = corpus
+        self.transacoes = transacoes
+        self.processos = processos
+        self.particao = particao
+        self.cenario = cenario
+
+        self.modelo_envelope = None
+        if cenario is None:
+            self.modelo_envelope = ModeloEnvelope(parametros)
+        self.deve_interromper = threading.Event()
+        self.estatisticas = EstatisticasExecucao()
+        self.estatisticas_conexoes = {}
+        # Estatísticas de cada serviço do cenário, pelo nome.
+        self.estatisticas_servicos = {
+            servico.nome: EstatisticasExecucao()
+            for servico in (cenario.servicos if cenario is not None else ())
+        }
+        self.medidor = MedidorAoVivo()
+        self.duracao = 0.0
+        self._lock = threading.Lock()
+        self._transporte = None
+        self._motor_async = None
+        self._em_andamento = 0
+        # Envios em andamento e limite adaptativo de cada processo filho (ver
+        # multiprocesso.py).
+        self.em_andamento_processos = {}
+        self.limites_processos = {}
+        # Origem dos envios em andamento; cada entrada sai quando o resultado chega.
+        self._origens = {}
+        self._servicos = {}
+        self.erro_corpus = None
+        self.erros_processos = []
+
+    def executar(self, ao_resultados=None):
+        """
+        Executa os envios e bloqueia até o fim (ou até `interromper`).
+
+        :param ao_resultados: Chamado com uma lista de resultados (dicts de
+                              `criar_resultado` mais os campos de
+                              `interpretar_resposta` e 'origem', o registro
+                              do corpus ou None, e 'servico', o nome do
+                              serviço do cenário ou None) a cada envio ou lote,
+                              fora da thread de quem chamou.
+        :return: O resumo da execução (ver `resumo`).
+        """
+        if self.processos > 1:
+            self.duracao = executar_em_processos(self, ao_resultados)
+            return self.resumo()
+
+        agenda = gerar_agenda(self.perfil, self._gerar_envios())
+        if self.limite_adaptativo is not None:
+            self.limite_adaptativo.iniciar(self.concorrencia)
+        inicio = time.perf_counter()
+        if self.balanceador is not None:
+            self.balanceador.iniciar_verificacao(self.deve_interromper)
+
+        try:
+            if self.motor == "Asyncio":
+                motor = self._motor_async = MotorAsync(
+                    self.concorrencia,
+                    self.deve_interromper,
+                    politica=self.politica,
+                    disjuntor=self.disjuntor,
+                    balanceador=self.balanceador,
+                    limite_adaptativo=self.limite_adaptativo,
+                    **self.config_conexao,
+                )
+                # Gerar agentes durante a execução pode segurar cada envio.
+                agenda_bloqueante = isinstance(self.corpus, FilaGeracao) or (
+                    self.cenario is not None and self.cenario.usa_agentes()
+                )
+                motor.executar(
+                    self.url,
+                    agenda,
+                    lambda lote: self._receber(lote, ao_resultados),
+                    agenda_bloqueante,
+                )
+                self.estatisticas_conexoes = motor.estatisticas_conexoes
+            else:
+                num_hosts = 1
+                if self.balanceador is not None:
+                    num_hosts = len(self.balanceador.endpoints)
+                self._transporte = TransporteSOAP(
+                    self.url, num_hosts=num_hosts, **self.config_conexao
+                )
+                try:
+                    pool = PoolEnvio(self.concorrencia, self.deve_interromper)
+                    pool.executar(
+                        despachar_agenda(agenda, self.deve_interromper),
+                        lambda item: self._enviar(item, ao_resultados),
+                    )
+                finally:
+                    self.estatisticas_conexoes = self._transporte.estatisticas()
+                    self._transporte.fechar()
+        finally:
+            self.duracao = time.perf_counter() - inicio
+            if self.balanceador is not None:
+                self.balanceador.parar_verificacao()
+        return self.resumo()
+
+    def interromper(self):
+        """Para de despachar envios e aborta os que estão em andamento."""
+        self.deve_interromper.set()
+        if self._transporte is not None:
+            self._transporte.abortar()
+
+    def em_andamento(self):
+        """Envios (com as novas tentativas) aguardando resposta agora."""
+        if self.processos > 1:
+            return sum(self.em_andamento_processos.values())
+        if self._motor_async is not None:
+            return self._motor_async.em_andamento
+        return self._em_andamento
+
+    def limite_atual(self):
+        """Limite adaptativo de envios simultâneos agora (None se fixo)."""
+        if self.limite_adaptativo is None:
+            return None
+        if self.processos > 1:
+            return sum(self.limites_processos.values())
+        return self.limite_adaptativo.atual()
+
+    def amostrar(self):
+        """
+        Números do painel ao vivo: os de MedidorAoVivo.amostrar mais
+        'em_andamento' e 'limite_concorrencia'. Feito para ser chamado algumas
+        vezes por segundo.
+        """
+        amostra = self.medidor.amostrar()
+        amostra["em_andamento"] = self.em_andamento()
+        amostra["limite_concorrencia"] = self.limite_atual()
+        return amostra
+
+    def resumo(self):
+        """Configuração, estatísticas e contadores de conexão da execução."""
+        with self._lock:
+            resumo = self.estatisticas.resumo(self.duracao)
+            servicos = {
+                nome: estatisticas.resumo(self.duracao)
+                for nome, estatisticas in self.estatisticas_servicos.items()
+            }
+        resumo.update(
+            {
+                "url": self.url,
+                "motor": self.motor,
+                "repeticoes": self.repeticoes,
+                "concorrencia": self.concorrencia,
+                "processos": self.processos,
+                "erros_processos": list(self.erros_processos),
+                "carga_aberta": self.perfil is not None,
+                "interrompido": self.deve_interromper.is_set(),
+                "corpus": (
+                    self.corpus.resumo() if hasattr(self.corpus, "resumo") else None
+                ),
+                "transacoes": (
+                    self.transacoes.resumo()
+                    if hasattr(self.transacoes, "resumo")
+                    else None
+                ),
+                "erro_corpus": self.erro_corpus,
+                "cenario": (
+                    self._resumo_cenario(servicos, resumo["envios"])
+                    if self.cenario is not None
+                    else None
+                ),
+                "conexoes": dict(self.estatisticas_conexoes),
+                "disjuntor": (
+                    self.disjuntor.resumo() if self.disjuntor is not None else None
+                ),
+                "concorrencia_adaptativa": (
+                    self.limite_adaptativo.resumo()
+                    if self.limite_adaptativo is not None
+                    else None
+                ),
+                "balanceamento": (
+                    self.balanceador.estrategia
+                    if self.balanceador is not None
+                    else None
+                ),
+                "endpoints": (
+                    self.balanceador.resumo(self.duracao)
+                    if self.balanceador is not None
+                    else None
+                ),
+                "arquivo_respostas": (
+                    self.arquivo_respostas.resumo()
+                    if self.arquivo_respostas is not None
+                    else None
+                ),
+                "banco_resultados": (
+                    self.gravador_resultados.resumo()
+                    if self.gravador_resultados is not None
+                    else None
+                ),
+                "parametros": {
+                    campo: valor
+                    for campo, valor in self.parametros.items()
+                    if campo != "payload"
+                },
+            }
+        )
+        return resumo
+
+    def _resumo_cenario(self, servicos, envios):
+        """Cenário com os números de cada serviço e a fração real dos envios."""
+        resumo = self.cenario.resumo()
+        for nome, numeros in servicos.items():
+            resumo["servicos"][nome].update(
+                {
+                    "fracao_real": (
+                        round(numeros["envios"] / envios, 4) if envios else 0.0
+                    ),
+                    "envios": numeros["envios"],
+                    "vazao_rps": numeros["vazao_rps"],
+                    "contagens": numeros["contagens"],
+                    "latencia_ms": numeros["latencia_ms"],
+                    "novas_tentativas": numeros["novas_tentativas"],
+                }
+            )
+        return resumo
+
+    def _gerar_envios(self):
+        """
+        Gera `(indice, corpo)` sob demanda, conforme o despacho pede.
+
+        Com corpus (ou lista de transações), lê um registro por envio; um
+        registro inválido encerra a geração e fica em `erro_corpus`. Com
+        `particao`, só os envios deste processo são montados.
+        """
+        k, n = self.particao or (0, 1)
+        if self.cenario is not None:
+            yield from self._gerar_envios_cenario(k, n)
+            return
+        if self.corpus is None and self.transacoes is None:
+            for i in range(1 + k, self.repeticoes + 1, n):
+                yield i, self.modelo_envelope.montar(i)
+            return
+
+        consulta = self.transacoes is not None
+        registros = iter(self.transacoes if consulta else self.corpus)
+        if self.repeticoes:
+            registros = itertools.islice(registros, self.repeticoes)
+        try:
+            for i, (origem, payload) in enumerate(registros, 1):
+                if (i - 1) % n != k:
+                    continue
+                self._origens[i] = origem
+                if consulta:
+                    yield i, self.modelo_envelope.montar(i, transacao=payload)
+                else:
+                    yield i, self.modelo_envelope.montar(i, payload)
+        except (ValueError, OSError) as e:
+            self.erro_corpus = str(e)
+
+    def _gerar_envios_cenario(self, k, n):
+        """
+        Envios do cenário: o serviço de cada posição vem da sequência
+        ponderada e o registro, da origem do serviço. Todo processo avança
+        as origens em todas as posições (para que cada registro caia num só
+        processo), mas só monta os envelopes das suas.
+        """
+        registros = {
+            servico.nome: servico.registros() for servico in self.cenario.servicos
+        }
+        sequencia = self.cenario.sequencia()
+        try:
+            for i in range(1, self.repeticoes + 1):
+                servico = next(sequencia)
+                registro = next(registros[servico.nome])
+                if (i - 1) % n != k:
+                    continue
+                origem, corpo = servico.montar(i, registro)
+                self._origens[i] = origem
+                self._servicos[i] = servico.nome
+                yield i, corpo
+        except (ValueError, OSError) as e:
+            self.erro_corpus = str(e)
+
+    def _enviar(self, item, ao_resultados):
+        """Executado pelos workers do PoolEnvio."""
+        (i, corpo), previsto = item
+        if self.disjuntor is not None:
+            espera = self.disjuntor.permitir()
+            while espera > 0:
+                if self.deve_interromper.wait(espera):
+                    return True
+                espera = self.disjuntor.permitir()
+
+        limite = self.limite_adaptativo
+        if limite is not None:
+            while not limite.adquirir(ESPERA_VAGA):
+                if self.deve_interromper.is_set():
+                    return True
+
+        inicio = time.perf_counter()
+        with self._lock:
+            self._em_andamento += 1
+        erro = "Interrompido"
+        try:
+            texto, erro, tentativas, url = self._enviar_com_tentativas(corpo)
+            fases = self._transporte.fases()
+        finally:
+            with self._lock:
+                self._em_andamento -= 1
+            if limite is not None:
+                limite.liberar(time.perf_counter() - inicio, erro is None)
+        if self.disjuntor is not None:
+            self.disjuntor.registrar(erro is None)
+        resultado = criar_resultado(
+            i,
+            previsto,
+            inicio,
+            time.perf_counter(),
+            texto,
+            erro,
+            tentativas,
+            url,
+            fases,
+        )
+
+        # Resultado de uma execução já interrompida: descartado.
+        if self.deve_interromper.is_set():
+            return True
+        self._receber([resultado], ao_resultados)
+        return True
+
+    def _enviar_com_tentativas(self, corpo):
+        """
+        Envia com novas tentativas; cada tentativa pode ir para outra
+        instância. Retorna (texto, erro, tentativas, url).
+        """
+        tentativa = 0
+        while True:
+            endpoint = None
+            url = self.url
+            if self.balanceador is not None:
+                endpoint = self.balanceador.escolher()
+                url = endpoint.url
+            inicio = time.perf_counter()
+            try:
+                texto = self._transporte.enviar(corpo, url).text
+                if endpoint is not None:
+                    self.balanceador.liberar(
+                        endpoint, True, time.perf_counter() - inicio
+                    )
+                return texto, None, tentativa, url
+            except requests.exceptions.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                if endpoint is not None:
+                    self.balanceador.liberar(
+                        endpoint,
+                        not erro_repetivel(status),
+                        None if status is None else time.perf_counter() - inicio,
+                    )
+                if tentativa >= self.politica.tentativas or not erro_repetivel(status):
+                    return None, str(e), tentativa, url
+            tentativa += 1
+            if self.deve_interromper.wait(self.politica.espera(tentativa)):
+                return None, "Interrompido", tentativa, url
+
+    def _receber(self, lote, ao_resultados):
+        if self.deve_interromper.is_set():
+            return
+        for resultado in lote:
+            resultado["origem"] = self._origens.pop(resultado["indice"], None)
+            resultado["servico"] = self._servicos.pop(resultado["indice"], None)
+            if resultado["erro"] is not None:
+                resultado.update(
+                    {
+                        "status": "erro_conexao",
+                        "resposta": None,
+                        "mensagem": None,
+                        "cod_transacao": None,
+                    }
+                )
+            else:
+                resultado.update(interpretar_resposta(resultado["texto"]))
+        with self._lock:
+            for resultado in lote:
+                latencia = fases = None
+                if resultado["erro"] is None:
+                    latencia = resultado["latencia"]
+                    fases = resultado["fases"]
+                self.estatisticas.registrar(
+                    resultado["status"],
+                    latencia,
+                    resultado["atraso"],
+                    resultado["tentativas"],
+                    fases,
+                )
+                if resultado["servico"] is not None:
+                    self.estatisticas_servicos[resultado["servico"]].registrar(
+                        resultado["status"],
+                        latencia,
+                        resultado["atraso"],
+                        resultado["tentativas"],
+                        fases,
+                    )
+        self._repassar(lote, ao_resultados)
+
+    def _repassar(self, lote, ao_resultados):
+        """Arquiva e entrega um lote já classificado (também os dos processos filhos)."""
+        if self.deve_interromper.is_set():
+            return
+        self.medidor.registrar(lote)
+        if self.arquivo_respostas is not None:
+            for resultado in lote:
+                self.arquivo_respostas.registrar(resultado)
+        if self.gravador_resultados is not None:
+            self.gravador_resultados.registrar(lote)
+        if ao_resultados is not None:
+            ao_resultados(lote)
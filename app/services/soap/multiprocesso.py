@@ -0,0 +1,288 @@
+# app/services/soap/multiprocesso.py
+
+import copy
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import traceback
+
+from app.services.soap.perfis_carga import PerfilFracao
+
+# Intervalo com que cada processo repassa os resultados acumulados.
+INTERVALO_REPASSE = 0.05
+# Intervalo com que cada processo confere os sinais de largada e de parada.
+INTERVALO_SINAIS = 0.01
+# Espera pelo fim de cada processo antes de encerrá-lo à força.
+TIMEOUT_ENCERRAMENTO = 5.0
+
+
+def executar_em_processos(motor_envio, ao_resultados=None):
+    """
+    Executa os envios de `motor_envio` em `motor_envio.processos` processos.
+
+    Cada processo monta os envelopes, envia e interpreta as respostas da sua
+    parte dos envios (os índices `k+1, k+1+n, ...` do processo `k` de `n`),
+    com a sua fatia da concorrência, do pool e da taxa do perfil de carga.
+    Todos partem juntos, depois de prontos, e param com o mesmo sinal. Os
+    resultados chegam em lotes a `motor_envio` (que arquiva e repassa a
+    `ao_resultados`) e, no fim, as estatísticas de cada processo são mescladas
+    às de `motor_envio`.
+
+    Usa o método "spawn", que funciona igual no Windows e no Linux e não
+    copia as threads da tela para os filhos.
+
+    :return: Duração da execução, em segundos, a partir da largada.
+    """
+    contexto = multiprocessing.get_context("spawn")
+    n = motor_envio.processos
+    fila = contexto.Queue()
+    parar = contexto.Event()
+    largada = contexto.Event()
+    encaminhar = ao_resultados is not None or (
+        motor_envio.arquivo_respostas is not None
+        or motor_envio.gravador_resultados is not None
+    )
+
+    processos = [
+        contexto.Process(
+            target=_processo_envio,
+            args=(
+                k,
+                _opcoes_processo(motor_envio, k, n),
+                encaminhar,
+                fila,
+                parar,
+                largada,
+            ),
+            daemon=True,
+        )
+        for k in range(n)
+    ]
+    for processo in processos:
+        processo.start()
+
+    prontos = set()
+    pendentes = set(range(n))
+    inicio = None
+    try:
+        while pendentes:
+            if motor_envio.deve_interromper.is_set() and not parar.is_set():
+                parar.set()
+                largada.set()
+            # Largada quando todos estiverem prontos (ou já tiverem falhado).
+            if inicio is None and len(prontos | (set(range(n)) - pendentes)) == n:
+                inicio = time.perf_counter()
+                largada.set()
+
+            try:
+                mensagem = fila.get(timeout=0.1)
+            except KeyboardInterrupt:
+                # Ctrl+C no terminal: para todos e ainda recolhe os parciais.
+                motor_envio.interromper()
+                continue
+            except queue.Empty:
+                for k in list(pendentes):
+                    if processos[k].exitcode is not None:
+                        pendentes.discard(k)
+                        motor_envio.erros_processos.append(
+                            f"Processo {k + 1} terminou sem resultado "
+                            f"(código {processos[k].exitcode})."
+                        )
+                continue
+
+            tipo, conteudo = mensagem[0], mensagem[1:]
+            if tipo == "lote":
+                motor_envio._repassar(conteudo[0], ao_resultados)
+            elif tipo == "andamento":
+                k, em_andamento, limite = conteudo
+                motor_envio.em_andamento_processos[k] = em_andamento
+                if limite is not None:
+                    motor_envio.limites_processos[k] = limite
+            elif tipo == "pronto":
+                prontos.add(conteudo[0])
+            elif tipo == "parcial":
+                k, parcial = conteudo
+                pendentes.discard(k)
+                motor_envio.em_andamento_processos.pop(k, None)
+                _mesclar_parcial(motor_envio, parcial)
+            elif tipo == "erro":
+                k, detalhes = conteudo
+                pendentes.discard(k)
+                motor_envio.erros_processos.append(
+                    f"Processo {k + 1}: {detalhes.strip().splitlines()[-1]}"
+                )
+    finally:
+        parar.set()
+        largada.set()
+        for processo in processos:
+            processo.join(TIMEOUT_ENCERRAMENTO)
+            if processo.is_alive():
+                processo.terminate()
+    return time.perf_counter() - (inicio or time.perf_counter())
+
+
+def _fatia(total, k, n):
+    """Parte `k` de `total` dividido entre `n` (as sobras vão para as primeiras)."""
+    return max(1, total // n + (1 if k < total % n else 0))
+
+
+def _opcoes_processo(motor_envio, k, n):
+    """Argumentos do MotorEnvio do processo `k` de `n`."""
+    config_conexao = dict(motor_envio.config_conexao)
+    if "tamanho_pool" in config_conexao:
+        config_conexao["tamanho_pool"] = _fatia(config_conexao["tamanho_pool"], k, n)
+    perfil = motor_envio.perfil
+    if perfil is not None:
+        perfil = PerfilFracao(perfil, 1 / n)
+    limite = motor_envio.limite_adaptativo
+    if limite is not None and limite.inicial:
+        limite = copy.copy(limite)
+        limite.inicial = _fatia(limite.inicial, k, n)
+    corpus = motor_envio.corpus
+    if hasattr(corpus, "dividir"):
+        # Payloads gerados: cada processo gera só os seus.
+        corpus = corpus.dividir(k, n)
+    return {
+        "url": motor_envio.url,
+        "parametros": motor_envio.parametros,
+        "repeticoes": motor_envio.repeticoes,
+        "concorrencia": _fatia(motor_envio.concorrencia, k, n),
+        "motor": motor_envio.motor,
+        "perfil": perfil,
+        "config_conexao": config_conexao,
+        "tentativas": motor_envio.politica.tentativas,
+        "corpus": corpus,
+        "transacoes": motor_envio.transacoes,
+        "backoff_base": motor_envio.politica.base,
+        "disjuntor": motor_envio.disjuntor,
+        "balanceador": motor_envio.balanceador,
+        "particao": (k, n),
+        "limite_adaptativo": limite,
+        "cenario": motor_envio.cenario,
+    }
+
+
+def _processo_envio(k, opcoes, encaminhar, fila, parar, largada):
+    """Ponto de entrada de cada processo (precisa ser importável pelo spawn)."""
+    # Import local: motor_envio importa este módulo.
+    from app.services.soap.motor_envio import MotorEnvio
+
+    # Quem interrompe é o processo principal, pelo evento `parar`.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    try:
+        motor_envio = MotorEnvio(**opcoes)
+
+        # Os sinais são consultados com is_set: um processo que termina dentro
+        # de um Event.wait deixa o `set` do processo principal esperando por ele.
+        def vigiar_parada():
+            while not parar.is_set():
+                time.sleep(INTERVALO_SINAIS * 10)
+            motor_envio.interromper()
+
+        threading.Thread(target=vigiar_parada, daemon=True).start()
+
+        acumulados = []
+        lock = threading.Lock()
+        fim = threading.Event()
+
+        def acumular(lote):
+            with lock:
+                acumulados.extend(lote)
+
+        def repassar():
+            with lock:
+                lote = acumulados[:]
+                acumulados.clear()
+            if lote:
+                fila.put(("lote", lote))
+
+        def repassar_periodicamente():
+            while not fim.wait(INTERVALO_REPASSE):
+                repassar()
+                fila.put(
+                    (
+                        "andamento",
+                        k,
+                        motor_envio.em_andamento(),
+                        motor_envio.limite_atual(),
+                    )
+                )
+
+        repasse = threading.Thread(target=repassar_periodicamente, daemon=True)
+        repasse.start()
+
+        fila.put(("pronto", k))
+        while not largada.is_set():
+            time.sleep(INTERVALO_SINAIS)
+        motor_envio.executar(acumular if encaminhar else None)
+        fim.set()
+        repasse.join()
+        repassar()
+
+        fila.put(
+            (
+                "parcial",
+                k,
+                {
+                    "estatisticas": motor_envio.estatisticas,
+                    "servicos": motor_envio.estatisticas_servicos,
+                    "conexoes": motor_envio.estatisticas_conexoes,
+                    "disjuntor": (
+                        motor_envio.disjuntor.resumo()
+                        if motor_envio.disjuntor is not None
+                        else None
+                    ),
+                    "endpoints": (
+                        motor_envio.balanceador.endpoints
+                        if motor_envio.balanceador is not None
+                        else None
+                    ),
+                    "erro_corpus": motor_envio.erro_corpus,
+                    "geracao": (
+                        motor_envio.corpus.resumo()
+                        if hasattr(motor_envio.corpus, "mesclar")
+                        else None
+                    ),
+                    "limite_adaptativo": (
+                        motor_envio.limite_adaptativo.resumo()
+                        if motor_envio.limite_adaptativo is not None
+                        else None
+                    ),
+                },
+            )
+        )
+    except Exception:
+        fila.put(("erro", k, traceback.format_exc()))
+
+
+def _mesclar_parcial(motor_envio, parcial):
+    """Soma o resultado de um processo ao de `motor_envio`."""
+    with motor_envio._lock:
+        motor_envio.estatisticas.mesclar(parcial["estatisticas"])
+        for nome, estatisticas in parcial["servicos"].items():
+            motor_envio.estatisticas_servicos[nome].mesclar(estatisticas)
+    for chave, valor in parcial["conexoes"].items():
+        motor_envio.estatisticas_conexoes[chave] = (
+            motor_envio.estatisticas_conexoes.get(chave, 0) + valor
+        )
+    if motor_envio.disjuntor is not None and parcial["disjuntor"] is not None:
+        # Cada processo tem o seu disjuntor; o tempo sem enviar é o do pior.
+        motor_envio.disjuntor.aberturas += parcial["disjuntor"]["aberturas"]
+        motor_envio.disjuntor.tempo_aberto = max(
+            motor_envio.disjuntor.tempo_aberto,
+            parcial["disjuntor"]["tempo_aberto_s"],
+        )
+    if parcial["limite_adaptativo"] is not None:
+        motor_envio.limite_adaptativo.mesclar(parcial["limite_adaptativo"])
+    if parcial["geracao"] is not None:
+        motor_envio.corpus.mesclar(parcial["geracao"])
+    if motor_envio.balanceador is not None and parcial["endpoints"] is not None:
+        for endpoint, outro in zip(
+            motor_envio.balanceador.endpoints, parcial["endpoints"]
+        ):
+            endpoint.mesclar(outro)
+    if motor_envio.erro_corpus is None:
+        motor_envio.erro_corpus = parcial["erro_corpus"]
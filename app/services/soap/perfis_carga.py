@@ -0,0 +1,203 @@
+# app/services/soap/perfis_carga.py
+
+import abc
+import time
+
+
+class PerfilCarga(abc.ABC):
+    """
+    Taxa-alvo de envios (req/s) em função do tempo decorrido desde o início.
+
+    Usado no modo de carga aberta: os envios são disparados nos instantes
+    definidos pelo perfil, independente de quanto as respostas demoram.
+    """
+
+    @abc.abstractmethod
+    def taxa(self, t):
+        """Taxa-alvo (req/s) `t` segundos após o início."""
+
+
+class PerfilConstante(PerfilCarga):
+    def __init__(self, taxa):
+        self.taxa_fixa = float(taxa)
+
+    def taxa(self, t):
+        return self.taxa_fixa
+
+
+class PerfilRampa(PerfilCarga):
+    """Sobe linearmente de `taxa_inicial` até `taxa_final` em `duracao` segundos."""
+
+    def __init__(self, taxa_inicial, taxa_final, duracao):
+        self.taxa_inicial = float(taxa_inicial)
+        self.taxa_final = float(taxa_final)
+        self.duracao = float(duracao)
+
+    def taxa(self, t):
+        if self.duracao <= 0 or t >= self.duracao:
+            return self.taxa_final
+        fracao = t / self.duracao
+        return self.taxa_inicial + (self.taxa_final - self.taxa_inicial) * fracao
+
+
+class PerfilDegraus(PerfilCarga):
+    """
+    Vai de `taxa_inicial` a `taxa_final` em `num_degraus` patamares iguais,
+    cada um mantido por `duracao_degrau` segundos.
+    """
+
+    def __init__(self, taxa_inicial, taxa_final, duracao_degrau, num_degraus=5):
+        self.taxa_inicial = float(taxa_inicial)
+        self.taxa_final = float(taxa_final)
+        self.duracao_degrau = float(duracao_degrau)
+        self.num_degraus = max(1, int(num_degraus))
+
+    def taxa(self, t):
+        if self.num_degraus == 1 or self.duracao_degrau <= 0:
+            return self.taxa_final
+        degrau = min(int(t // self.duracao_degrau), self.num_degraus - 1)
+        passo = (self.taxa_final - self.taxa_inicial) / (self.num_degraus - 1)
+        return self.taxa_inicial + passo * degrau
+
+
+class PerfilPico(PerfilCarga):
+    """
+    Taxa `taxa_base`, saltando para `taxa_pico` entre `inicio` e
+    `inicio + duracao`.
+    """
+
+    def __init__(self, taxa_base, taxa_pico, inicio, duracao):
+        self.taxa_base = float(taxa_base)
+        self.taxa_pico = float(taxa_pico)
+        self.inicio = float(inicio)
+        self.duracao = float(duracao)
+
+    def taxa(self, t):
+        if self.inicio <= t < self.inicio + self.duracao:
+            return self.taxa_pico
+        return self.taxa_base
+
+
+class PerfilFracao(PerfilCarga):
+    """Fração `fracao` da taxa de outro perfil (a parte de cada processo)."""
+
+    def __init__(self, perfil, fracao):
+        self.perfil = perfil
+        self.fracao = float(fracao)
+
+    def taxa(self, t):
+        return self.perfil.taxa(t) * self.fracao
+
+
+def criar_perfil(nome, taxa_base, taxa_alvo=0, duracao=0, inicio=0, num_degraus=5):
+    """
+    Cria um perfil a partir dos campos da aba "Carga".
+
+    Args:
+        nome (str): "Constante", "Rampa", "Degraus" ou "Pico".
+        taxa_base (float): Taxa constante, inicial ou de base (req/s).
+        taxa_alvo (float): Taxa final da rampa/degraus ou taxa do pico (req/s).
+        duracao (float): Duração da rampa, de cada degrau ou do pico (s).
+        inicio (float): Início do pico (s).
+        num_degraus (int): Quantidade de patamares do perfil em degraus.
+
+    Raises:
+        ValueError: Para um perfil desconhecido ou taxas não positivas.
+    """
+    if taxa_base <= 0 or (nome != "Constante" and taxa_alvo <= 0):
+        raise ValueError("As taxas do perfil de carga devem ser maiores que zero.")
+    if nome == "Constante":
+        return PerfilConstante(taxa_base)
+    if nome == "Rampa":
+        return PerfilRampa(taxa_base, taxa_alvo, duracao)
+    if nome == "Degraus":
+        return PerfilDegraus(taxa_base, taxa_alvo, duracao, num_degraus)
+    if nome == "Pico":
+        return PerfilPico(taxa_base, taxa_alvo, inicio, duracao)
+    raise ValueError(f"Perfil de carga desconhecido: {nome}")
+
+
+def gerar_agenda(perfil, indices, inicio=None):
+    """
+    Gera `(indice, instante_previsto)` para cada envio, em `time.perf_counter`.
+
+    Os instantes são absolutos e calculados só a partir do perfil, nunca a
+    partir de quando o envio anterior terminou (carga aberta). Com
+    `perfil=None` a carga é fechada e o instante previsto é None.
+    """
+    if perfil is None:
+        for i in indices:
+            yield i, None
+        return
+
+    inicio = time.perf_counter() if inicio is None else inicio
+    decorrido = 0.0
+    for i in indices:
+        yield i, inicio + decorrido
+        decorrido += 1.0 / perfil.taxa(decorrido)
+
+
+def esperar_ate(instante, deve_interromper):
+    """
+    Dorme até `instante` (em `time.perf_counter`) com precisão de ~1 ms.
+
+    Dorme pelo Event (acorda na hora se o "Interromper" for pressionado) e
+    só cede a CPU no último milissegundo, onde o sleep do SO é impreciso.
+
+    :return: False se a interrupção foi pedida durante a espera.
+    """
+    while True:
+        restante = instante - time.perf_counter()
+        if restante <= 0:
+            return not deve_interromper.is_set()
+        if restante > 0.002:
+            if deve_interromper.wait(restante - 0.001):
+                return False
+        else:
+            time.sleep(0)
+
+
+def despachar_agenda(agenda, deve_interromper):
+    """Itera a agenda esperando o instante previsto de cada envio."""
+    for indice, previsto in agenda:
+        if previsto is not None and not esperar_ate(previsto, deve_interromper):
+            return
+        yield indice, previsto
+
+
+def criar_resultado(
+    indice,
+    previsto,
+    inicio,
+    fim,
+    texto=None,
+    erro=None,
+    tentativas=0,
+    endpoint=None,
+    fases=None,
+):
+    """
+    Monta o registro de resultado de um envio, com as medições de tempo.
+
+    'latencia' é medida a partir do instante previsto (quando houver), e não
+    de quando o envio de fato saiu: se a ferramenta atrasou o disparo porque
+    todas as vagas estavam ocupadas com respostas lentas, esse atraso entra
+    na latência (correção de "coordinated omission"). 'tempo_servico' é só
+    o tempo da requisição HTTP (com as novas tentativas, se houve).
+    'tentativas' conta só as novas tentativas, não o envio original.
+    'endpoint' é a URL que respondeu por último (com vários integradores).
+    'fases' é o tempo da última tentativa em cada fase HTTP (dict fase →
+    segundos, ver estatisticas.FASES_HTTP); só as fases que ocorreram.
+    """
+    base = previsto if previsto is not None else inicio
+    return {
+        "indice": indice,
+        "texto": texto,
+        "erro": erro,
+        "latencia": fim - base,
+        "tempo_servico": fim - inicio,
+        "atraso": inicio - base,
+        "tentativas": tentativas,
+        "endpoint": endpoint,
+        "fases": fases or {},
+    }
@@ -0,0 +1,159 @@
+# app/services/soap/pipeline_geracao.py
+
+import queue
+import threading
+import time
+
+# Documentos gerados à frente dos envios, no máximo (padrão da fila).
+CAPACIDADE_FILA_PADRAO = 100
+# Intervalo com que o gerador, esperando vaga na fila, confere se deve parar.
+ESPERA_FILA = 0.1
+
+# Marca o fim da geração (por erro) na fila.
+_FIM = object()
+
+
+class FilaGeracao:
+    """
+    Gera os payloads de uma campanha enquanto eles são enviados.
+
+    Iterar gera `(origem, payload)`, como o CorpusPayloads, então o
+    MotorEnvio usa a fila no lugar de um corpus. Uma thread produtora chama
+    `gerar(posicao)` para cada posição `1..quantidade` e põe o resultado numa
+    fila limitada a `capacidade`: com a fila cheia o gerador espera os
+    envios (contrapressão), e com ela vazia são os envios que esperam o
+    gerador. Os dois tempos de espera, junto com o tempo gasto gerando,
+    mostram no resumo qual dos lados limitou a vazão.
+
+    Com processos (ver `dividir`), cada processo gera só as suas posições;
+    as dos outros saem como `(None, None)`, que o MotorEnvio pula.
+    """
+
+    def __init__(
+        self,
+        gerar,
+        quantidade,
+        capacidade=CAPACIDADE_FILA_PADRAO,
+        descricao="Gerado",
+        particao=None,
+    ):
+        """
+        :param gerar: Chamado com a posição (de 1 a `quantidade`); retorna
+                      `(origem, payload)`. Precisa ser copiável para outros
+                      processos (ex.: método de GeradorAgentes).
+        :param quantidade: Payloads a gerar.
+        :param capacidade: Payloads prontos na fila, no máximo.
+        :param descricao: O que é gerado, para o resumo.
+        :param particao: `(k, n)` para gerar só a parte do processo `k` de `n`.
+        """
+        if quantidade < 1:
+            raise ValueError("A quantidade de envios gerados deve ser no mínimo 1.")
+        if capacidade < 1:
+            raise ValueError("A capacidade da fila de geração deve ser no mínimo 1.")
+        self.gerar = gerar
+        self.quantidade = int(quantidade)
+        self.capacidade = int(capacidade)
+        self.descricao = descricao
+        self.particao = particao or (0, 1)
+        self._resumos_processos = []
+        self._zerar()
+
+    def __iter__(self):
+        self._zerar()
+        k, n = self.particao
+        fila = queue.Queue(self.capacidade)
+        parar = threading.Event()
+        threading.Thread(target=self._produzir, args=(fila, parar), daemon=True).start()
+        try:
+            for posicao in range(1, self.quantidade + 1):
+                if (posicao - 1) % n != k:
+                    yield None, None
+                    continue
+                inicio = time.perf_counter()
+                item = fila.get()
+                self.espera_fila_vazia += time.perf_counter() - inicio
+                if item is _FIM:
+                    raise ValueError(f"Falha ao gerar o envio {posicao}: {self.erro}")
+                yield item
+        finally:
+            # Execução interrompida ou limitada: o gerador não espera mais vaga.
+            parar.set()
+
+    def dividir(self, k, n):
+        """Cópia que gera só a parte do processo `k` de `n`."""
+        return FilaGeracao(
+            self.gerar, self.quantidade, self.capacidade, self.descricao, (k, n)
+        )
+
+    def mesclar(self, resumo):
+        """Junta o resumo da geração de um processo filho (ver multiprocesso.py)."""
+        self._resumos_processos.append(resumo["geracao"])
+
+    def resumo(self):
+        if self._resumos_processos:
+            # Cada processo gera em paralelo: as vazões se somam.
+            geracao = {
+                campo: round(
+                    sum(parcial[campo] for parcial in self._resumos_processos), 3
+                )
+                for campo in (
+                    "gerados",
+                    "vazao_geracao",
+                    "tempo_geracao_s",
+                    "espera_fila_cheia_s",
+                    "espera_fila_vazia_s",
+                )
+            }
+            geracao["gerados"] = int(geracao["gerados"])
+            geracao["pico_fila"] = max(
+                parcial["pico_fila"] for parcial in self._resumos_processos
+            )
+        else:
+            geracao = {
+                "gerados": self.gerados,
+                "vazao_geracao": round(
+                    self.gerados / self.tempo_geracao if self.tempo_geracao else 0.0,
+                    1,
+                ),
+                "tempo_geracao_s": round(self.tempo_geracao, 3),
+                "espera_fila_cheia_s": round(self.espera_fila_cheia, 3),
+                "espera_fila_vazia_s": round(self.espera_fila_vazia, 3),
+                "pico_fila": self.pico_fila,
+            }
+        geracao["capacidade_fila"] = self.capacidade
+        return {"caminho": self.descricao, "formato": "Gerado", "geracao": geracao}
+
+    def _zerar(self):
+        self.gerados = 0
+        self.tempo_geracao = 0.0
+        self.espera_fila_cheia = 0.0
+        self.espera_fila_vazia = 0.0
+        self.pico_fila = 0
+        self.erro = None
+
+    def _produzir(self, fila, parar):
+        k, n = self.particao
+        try:
+            for posicao in range(1 + k, self.quantidade + 1, n):
+                inicio = time.perf_counter()
+                item = self.gerar(posicao)
+                self.tempo_geracao += time.perf_counter() - inicio
+                self.gerados += 1
+                if not self._enfileirar(fila, parar, item):
+                    return
+        except Exception as e:
+            self.erro = str(e) or type(e).__name__
+            self._enfileirar(fila, parar, _FIM)
+
+    def _enfileirar(self, fila, parar, item):
+        """Põe o item na fila, esperando vaga; False se a execução acabou antes."""
+        inicio = time.perf_counter()
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=ESPERA_FILA)
+            except queue.Full:
+                continue
+            self.espera_fila_cheia += time.perf_counter() - inicio
+            self.pico_fila = max(self.pico_fila, fila.qsize())
+            return True
+        return False
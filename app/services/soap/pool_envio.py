@@ -0,0 +1,93 @@
+# app/services/soap/pool_envio.py
+
+import queue
+import threading
+
+
+class PoolEnvio:
+    """
+    Pool limitado de threads que executa os envios SOAP de forma concorrente.
+
+    No máximo `concorrencia` envios ficam em andamento ao mesmo tempo: cada
+    índice só é entregue aos workers depois que uma vaga é reservada, então a
+    fila interna nunca cresce com o número de envios.
+    """
+
+    def __init__(self, concorrencia, deve_interromper):
+        """
+        :param concorrencia: Número máximo de envios simultâneos.
+        :param deve_interromper: threading.Event sinalizado pelo botão "Interromper".
+        """
+        self.concorrencia = max(1, int(concorrencia))
+        self.deve_interromper = deve_interromper
+        self._abortar = threading.Event()
+
+    def executar(self, indices, tarefa):
+        """
+        Executa `tarefa(i)` para cada índice, com até `concorrencia` em paralelo.
+
+        Se `tarefa` retornar False o lote é abortado: nenhum índice novo é
+        despachado, mas os envios em andamento terminam normalmente. Uma
+        exceção em `tarefa` também aborta o lote e, depois que os envios em
+        andamento terminam, é levantada de novo aqui.
+        Se `deve_interromper` for sinalizado, o método retorna imediatamente,
+        sem esperar os envios em andamento (os workers são daemon e seus
+        resultados devem ser descartados por quem os consome).
+
+        :return: True se todos os índices foram processados, False caso contrário.
+        """
+        vagas = threading.Semaphore(self.concorrencia)
+        fila = queue.SimpleQueue()
+        erros = []
+
+        def trabalhar():
+            while True:
+                i = fila.get()
+                if i is None:
+                    return
+                try:
+                    if not self.deve_interromper.is_set() and tarefa(i) is False:
+                        self._abortar.set()
+                except Exception as e:
+                    # A thread não pode morrer: sem workers, ninguém mais lê a
+                    # fila e o despacho esperaria uma vaga para sempre.
+                    erros.append(e)
+                    self._abortar.set()
+                finally:
+                    vagas.release()
+
+        workers = [
+            threading.Thread(target=trabalhar, daemon=True)
+            for _ in range(self.concorrencia)
+        ]
+        for worker in workers:
+            worker.start()
+
+        completo = True
+        try:
+            for i in indices:
+                if self._abortar.is_set() or not self._reservar_vaga(vagas):
+                    completo = False
+                    break
+                fila.put(i)
+
+            # Aguarda os envios em andamento devolverem todas as vagas.
+            for _ in range(self.concorrencia):
+                if not self._reservar_vaga(vagas):
+                    return False
+            if erros:
+                raise erros[0]
+            return completo and not self._abortar.is_set()
+        finally:
+            for _ in workers:
+                fila.put(None)
+
+    def _reservar_vaga(self, vagas):
+        """Aguarda uma vaga livre, desistindo assim que a interrupção é pedida."""
+        while not vagas.acquire(timeout=0.05):
+            if self.deve_interromper.is_set():
+                return False
+        if self.deve_interromper.is_set():
+            vagas.release()
+            return False
+        return True
@@ -0,0 +1,132 @@
+# app/services/soap/resiliencia.py
+
+import random
+import threading
+import time
+from collections import deque
+
+
+class PoliticaRetentativa:
+    """
+    Novas tentativas com backoff exponencial e jitter completo.
+
+    A espera antes da tentativa `n` (1, 2, ...) é sorteada entre 0 e
+    `min(maximo, base * 2 ** (n - 1))`, para que envios que falharam juntos
+    não voltem todos no mesmo instante.
+    """
+
+    def __init__(self, tentativas=0, base=0.2, maximo=10.0):
+        """
+        :param tentativas: Novas tentativas por envio (0 = nenhuma).
+        :param base: Teto da primeira espera, em segundos.
+        :param maximo: Teto de qualquer espera, em segundos.
+        """
+        self.tentativas = max(0, int(tentativas))
+        self.base = base
+        self.maximo = maximo
+
+    def espera(self, tentativa):
+        """Segundos a esperar antes da nova tentativa `tentativa` (a partir de 1)."""
+        return random.uniform(0, min(self.maximo, self.base * 2 ** (tentativa - 1)))
+
+
+def erro_repetivel(status_http):
+    """Falhas de conexão/timeout (status None) e respostas 5xx valem nova tentativa."""
+    return status_http is None or status_http >= 500
+
+
+class DisjuntorCircuito:
+    """
+    Circuit breaker dos envios de uma execução.
+
+    Fechado, deixa tudo passar e acompanha o resultado dos últimos `janela`
+    envios. Se a taxa de erro chegar a `limite_erros`, abre: nenhum envio sai
+    por `pausa` segundos. Depois disso fica meio-aberto e libera um único
+    envio de sonda; se ele der certo o circuito fecha, senão abre de novo.
+
+    Não bloqueia ninguém: `permitir` diz quanto esperar, e cada motor dorme
+    do seu jeito (Event.wait nas threads, asyncio.sleep no asyncio).
+    """
+
+    def __init__(self, limite_erros=0.5, janela=20, pausa=5.0):
+        """
+        :param limite_erros: Fração de erros (0 a 1) que abre o circuito.
+        :param janela: Quantidade de envios recentes considerados.
+        :param pausa: Segundos com o circuito aberto antes da sonda.
+        """
+        self.limite_erros = limite_erros
+        self.pausa = pausa
+        self._resultados = deque(maxlen=max(1, int(janela)))
+        self._lock = threading.Lock()
+        self._aberto_ate = None
+        self._sonda_em_andamento = False
+        self._aberto_desde = None
+        self.aberturas = 0
+        self.tempo_aberto = 0.0
+
+    def __getstate__(self):
+        # Para ir a outros processos (ver multiprocesso.py); o lock não é copiável.
+        estado = self.__dict__.copy()
+        del estado["_lock"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """
+        :return: 0 se o envio pode sair agora; senão, segundos até perguntar
+                 de novo.
+        """
+        with self._lock:
+            if self._aberto_ate is None:
+                return 0.0
+            restante = self._aberto_ate - time.perf_counter()
+            if restante > 0:
+                return restante
+            if self._sonda_em_andamento:
+                return min(0.1, self.pausa)
+            self._sonda_em_andamento = True
+            return 0.0
+
+    def registrar(self, sucesso):
+        """Informa o resultado final de um envio liberado por `permitir`."""
+        with self._lock:
+            agora = time.perf_counter()
+            if self._aberto_ate is not None:
+                if not self._sonda_em_andamento:
+                    # Envio que já estava em andamento quando o circuito abriu.
+                    return
+                self._sonda_em_andamento = False
+                if sucesso:
+                    self.tempo_aberto += agora - self._aberto_desde
+                    self._aberto_ate = None
+                    self._aberto_desde = None
+                    self._resultados.clear()
+                else:
+                    self._aberto_ate = agora + self.pausa
+                return
+
+            self._resultados.append(sucesso)
+            if len(self._resultados) < self._resultados.maxlen:
+                return
+            erros = self._resultados.count(False)
+            if erros / len(self._resultados) >= self.limite_erros:
+                self.aberturas += 1
+                self._aberto_desde = agora
+                self._aberto_ate = agora + self.pausa
+
+    def esta_aberto(self):
+        with self._lock:
+            return self._aberto_ate is not None
+
+    def resumo(self):
+        with self._lock:
+            tempo_aberto = self.tempo_aberto
+            if self._aberto_desde is not None:
+                tempo_aberto += time.perf_counter() - self._aberto_desde
+            return {
+                "aberturas": self.aberturas,
+                "tempo_aberto_s": round(tempo_aberto, 3),
+            }
@@ -0,0 +1,261 @@
+# app/services/soap/saturacao.py
+
+import math
+import threading
+from collections import Counter
+
+from app.services.soap.estatisticas import EstatisticasExecucao
+from app.services.soap.perfis_carga import PerfilConstante
+
+# Fração inicial de cada estágio descartada das medições (aquecimento).
+FRACAO_AQUECIMENTO = 0.2
+# Mensagens de Erro=true guardadas por estágio no relatório.
+MENSAGENS_POR_ESTAGIO = 3
+
+
+class BuscaSaturacao:
+    """
+    Procura a maior vazão que o integrador sustenta dentro de um SLO.
+
+    Cada estágio é uma execução do MotorEnvio em carga aberta, com taxa
+    constante, mantida por `duracao_estagio` segundos; a taxa do estágio
+    seguinte é a anterior vezes `fator`. As medições de cada estágio
+    descartam o aquecimento (FRACAO_AQUECIMENTO do início) e a busca para
+    no primeiro estágio em que o p99 passa do SLO ou a taxa de erros
+    (Erro=true ou sem resposta) passa de `erros_aceitos`.
+
+    O "joelho" é o último estágio aprovado: a vazão medida nele é a vazão
+    máxima sustentável, com resolução de um `fator` entre estágios.
+    """
+
+    def __init__(
+        self,
+        criar_motor,
+        taxa_inicial,
+        slo_p99_ms,
+        fator=1.5,
+        duracao_estagio=30,
+        erros_aceitos=0.0,
+        max_estagios=10,
+    ):
+        """
+        :param criar_motor: Chamado com `(perfil, repeticoes)` para montar o
+                            MotorEnvio de cada estágio, com a configuração
+                            de conexão e os parâmetros da requisição.
+        :param taxa_inicial: Taxa do primeiro estágio (req/s).
+        :param slo_p99_ms: Teto do p99 da latência, em ms.
+        :param fator: Multiplicador da taxa entre estágios (> 1).
+        :param duracao_estagio: Segundos de cada estágio.
+        :param erros_aceitos: Fração de envios com erro aceita em um estágio
+                              (0 = para no primeiro erro).
+        :param max_estagios: Estágios no máximo, aprovados ou não.
+        """
+        if taxa_inicial <= 0 or slo_p99_ms <= 0:
+            raise ValueError("A taxa inicial e o SLO do p99 devem ser positivos.")
+        if fator <= 1:
+            raise ValueError("O fator entre estágios deve ser maior que 1.")
+        if duracao_estagio <= 0 or max_estagios < 1:
+            raise ValueError("A duração e o número de estágios devem ser positivos.")
+        if not 0 <= erros_aceitos < 1:
+            raise ValueError("Os erros aceitos devem ser de 0 a 100%.")
+        self.criar_motor = criar_motor
+        self.taxa_inicial = float(taxa_inicial)
+        self.slo_p99_ms = float(slo_p99_ms)
+        self.fator = float(fator)
+        self.duracao_estagio = float(duracao_estagio)
+        self.erros_aceitos = float(erros_aceitos)
+        self.max_estagios = int(max_estagios)
+
+        self.deve_interromper = threading.Event()
+        # Estágio em andamento e o seu motor (para a tela e para interromper).
+        self.estagio_atual = 0
+        self.taxa_atual = None
+        self.motor_atual = None
+        self.estagios = []
+        self.parada = None
+
+    def executar(self, ao_estagio=None, ao_resultados=None):
+        """
+        Executa os estágios até a parada e bloqueia até o fim.
+
+        :param ao_estagio: Chamado com o dict de cada estágio concluído.
+        :param ao_resultados: Repassado a cada MotorEnvio (ver
+                              MotorEnvio.executar).
+        :return: O relatório da busca (ver `relatorio`).
+        """
+        taxa = self.taxa_inicial
+        for numero in range(1, self.max_estagios + 1):
+            estagio = self._executar_estagio(numero, taxa, ao_resultados)
+            if self.deve_interromper.is_set():
+                self.parada = "interrompido"
+                break
+            self.estagios.append(estagio)
+            if ao_estagio is not None:
+                ao_estagio(estagio)
+            if estagio["erro_corpus"]:
+                self.parada = "corpus"
+                break
+            if estagio["motivo"] is not None:
+                self.parada = estagio["motivo"]
+                break
+            taxa *= self.fator
+        else:
+            self.parada = "limite_estagios"
+        return self.relatorio()
+
+    def interromper(self):
+        self.deve_interromper.set()
+        self.parada = "interrompido"
+        if self.motor_atual is not None:
+            self.motor_atual.interromper()
+
+    def relatorio(self):
+        """Estágios, ponto de joelho e onde começaram as respostas Erro=true."""
+        aprovados = [e for e in self.estagios if e["motivo"] is None]
+        joelho = aprovados[-1] if aprovados else None
+        com_erro = [e for e in self.estagios if e["mensagens_erro"]]
+        inicio_erro_servico = com_erro[0] if com_erro else None
+        return {
+            "slo_p99_ms": self.slo_p99_ms,
+            "erros_aceitos": self.erros_aceitos,
+            "fator": self.fator,
+            "duracao_estagio_s": self.duracao_estagio,
+            "parada": self.parada,
+            "estagios": list(self.estagios),
+            "joelho": (
+                {
+                    "estagio": joelho["estagio"],
+                    "taxa_oferecida": joelho["taxa_oferecida"],
+                    "vazao_rps": joelho["vazao_rps"],
+                    "p99_ms": joelho["latencia_ms"]["p99"],
+                }
+                if joelho is not None
+                else None
+            ),
+            "vazao_maxima_rps": joelho["vazao_rps"] if joelho is not None else None,
+            "inicio_erro_servico": (
+                {
+                    "estagio": inicio_erro_servico["estagio"],
+                    "taxa_oferecida": inicio_erro_servico["taxa_oferecida"],
+                    "mensagem": inicio_erro_servico["primeira_mensagem_erro"],
+                }
+                if inicio_erro_servico is not None
+                else None
+            ),
+        }
+
+    def _executar_estagio(self, numero, taxa, ao_resultados):
+        repeticoes = max(1, math.ceil(taxa * self.duracao_estagio))
+        aquecimento = int(repeticoes * FRACAO_AQUECIMENTO)
+        estatisticas = EstatisticasExecucao()
+        # Mensagens Erro=true do estágio todo, aquecimento incluído: o
+        # relatório aponta onde elas começaram, não só onde foram medidas.
+        mensagens = Counter()
+        primeira_mensagem = []
+        lock = threading.Lock()
+
+        def registrar(lote):
+            with lock:
+                for resultado in lote:
+                    if resultado["status"] == "erro_servico":
+                        mensagem = resultado["mensagem"] or ""
+                        mensagens[mensagem] += 1
+                        if not primeira_mensagem:
+                            primeira_mensagem.append(mensagem)
+                    if resultado["indice"] <= aquecimento:
+                        continue
+                    latencia = (
+                        resultado["latencia"] if resultado["erro"] is None else None
+                    )
+                    estatisticas.registrar(resultado["status"], latencia)
+            if ao_resultados is not None:
+                ao_resultados(lote)
+
+        self.estagio_atual = numero
+        self.taxa_atual = taxa
+        motor = self.criar_motor(PerfilConstante(taxa), repeticoes)
+        self.motor_atual = motor
+        if self.deve_interromper.is_set():
+            motor.interromper()
+        motor.executar(registrar)
+
+        # A vazão conta só os envios medidos, no tempo depois do aquecimento
+        # (inclui a espera pelas respostas atrasadas no fim do estágio).
+        duracao = max(motor.duracao - aquecimento / taxa, 1e-9)
+        resumo = estatisticas.resumo(duracao)
+        contagens = resumo["contagens"]
+        erros = contagens["erro_servico"] + contagens["erro_conexao"]
+        taxa_erro = erros / resumo["envios"] if resumo["envios"] else 0.0
+        motivo = None
+        if resumo["latencia_ms"]["p99"] > self.slo_p99_ms:
+            motivo = "slo"
+        elif taxa_erro > self.erros_aceitos or not resumo["envios"]:
+            motivo = "erros"
+        return {
+            "estagio": numero,
+            "taxa_oferecida": round(taxa, 2),
+            "vazao_rps": resumo["vazao_rps"],
+            "envios": resumo["envios"],
+            "contagens": resumo["contagens"],
+            "latencia_ms": resumo["latencia_ms"],
+            "taxa_erro": round(taxa_erro, 4),
+            "mensagens_erro": dict(mensagens.most_common(MENSAGENS_POR_ESTAGIO)),
+            "primeira_mensagem_erro": (
+                primeira_mensagem[0] if primeira_mensagem else None
+            ),
+            "erro_corpus": motor.erro_corpus,
+            "motivo": motivo,
+        }
+
+
+def formatar_relatorio_saturacao(relatorio):
+    """Linhas de texto do relatório da busca, para o log da tela e do cli.py."""
+    linhas = [
+        "--- Busca de Saturação ---",
+        f"SLO: p99 até {relatorio['slo_p99_ms']:g} ms, erros até "
+        f"{relatorio['erros_aceitos'] * 100:g}% | estágios de "
+        f"{relatorio['duracao_estagio_s']:g} s, taxa x{relatorio['fator']:g}",
+    ]
+    for estagio in relatorio["estagios"]:
+        latencia = estagio["latencia_ms"]
+        situacao = {None: "ok", "slo": "ACIMA DO SLO", "erros": "ERROS"}[
+            estagio["motivo"]
+        ]
+        linhas.append(
+            f"  Estágio {estagio['estagio']}: {estagio['taxa_oferecida']:g} req/s "
+            f"oferecidos, {estagio['vazao_rps']:.1f} medidos | p50 "
+            f"{latencia['p50']:.1f} | p90 {latencia['p90']:.1f} | p99 "
+            f"{latencia['p99']:.1f} ms | erros {estagio['taxa_erro'] * 100:.2f}% "
+            f"| {situacao}"
+        )
+    joelho = relatorio["joelho"]
+    if joelho is not None:
+        linhas.append(
+            f"Vazão máxima sustentável: {joelho['vazao_rps']:.1f} req/s "
+            f"(estágio {joelho['estagio']}, {joelho['taxa_oferecida']:g} req/s "
+            f"oferecidos, p99 {joelho['p99_ms']:.1f} ms)"
+        )
+    else:
+        linhas.append(
+            "Vazão máxima sustentável: nenhum estágio dentro do SLO "
+            "(reduza a taxa inicial)."
+        )
+    motivos = {
+        "slo": "p99 acima do SLO",
+        "erros": "erros acima do aceito",
+        "limite_estagios": "último estágio concluído sem atingir o limite "
+        "(aumente os estágios ou a taxa inicial)",
+        "interrompido": "interrompida pelo usuário",
+        "corpus": "leitura do corpus interrompida",
+    }
+    linhas.append(f"Parada: {motivos.get(relatorio['parada'], relatorio['parada'])}")
+    inicio = relatorio["inicio_erro_servico"]
+    if inicio is not None:
+        linhas.append(
+            f"Respostas Erro=true a partir do estágio {inicio['estagio']} "
+            f"({inicio['taxa_oferecida']:g} req/s): "
+            f"{inicio['mensagem'] or '(sem mensagem)'}"
+        )
+    else:
+        linhas.append("Nenhuma resposta Erro=true nos estágios executados.")
+    return linhas
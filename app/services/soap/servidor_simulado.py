@@ -0,0 +1,389 @@
+# app/services/soap/servidor_simulado.py
+
+import asyncio
+import hashlib
+import itertools
+import math
+import multiprocessing
+import queue
+import random
+import re
+import socket
+import threading
+from html import escape
+
+DISTRIBUICOES_LATENCIA = ("Fixa", "Uniforme", "Normal", "Exponencial", "Lognormal")
+
+MENSAGEM_SUCESSO = "Transação processada com sucesso."
+MENSAGEM_CONSULTA = "Transação consultada com sucesso."
+MENSAGENS_ERRO = (
+    "Campo obrigatório não informado: AGN_ST_NOME.",
+    "CPF/CNPJ inválido.",
+    "Código de serviço não habilitado para o usuário.",
+    "Falha ao gravar o registro: tempo de bloqueio excedido.",
+)
+MENSAGEM_DUPLICADO = "Registro duplicado: documento já integrado anteriormente."
+
+# Maior cabeçalho HTTP aceito, para uma conexão não prender memória à toa.
+LIMITE_CABECALHO = 64 * 1024
+
+_TRANSACAO = re.compile(rb"<pTransacao>([^<]*)</pTransacao>")
+_PXML = re.compile(rb"<pXML>(.*?)</pXML>", re.S)
+
+
+def criar_distribuicao(nome, media_ms, desvio_ms=0.0):
+    """
+    Retorna uma função sem argumentos que sorteia uma latência, em segundos.
+
+    :param nome: Um de DISTRIBUICOES_LATENCIA. Na Uniforme o intervalo é
+                 `media ± desvio`; na Exponencial o desvio é ignorado; na
+                 Lognormal, média e desvio são os da própria latência.
+    """
+    media = max(0.0, media_ms) / 1000
+    desvio = max(0.0, desvio_ms) / 1000
+    if nome == "Fixa" or media == 0:
+        return lambda: media
+    if nome == "Uniforme":
+        return lambda: random.uniform(max(0.0, media - desvio), media + desvio)
+    if nome == "Normal":
+        return lambda: max(0.0, random.gauss(media, desvio))
+    if nome == "Exponencial":
+        return lambda: random.expovariate(1 / media)
+    if nome == "Lognormal":
+        sigma = math.sqrt(math.log(1 + (desvio / media) ** 2))
+        mu = math.log(media) - sigma**2 / 2
+        return lambda: random.lognormvariate(mu, sigma)
+    raise ValueError(f"Distribuição de latência desconhecida: {nome}")
+
+
+class ServidorSimulado:
+    """
+    Substituto local do MegaIntegradorService para testes e benchmarks.
+
+    Atende a ação IntegraXMLString em HTTP/1.1 com keep-alive, num único
+    event loop asyncio: a latência simulada é um `asyncio.sleep`, então
+    milhares de conexões simultâneas não custam uma thread cada. As respostas
+    têm o mesmo formato das do integrador (Result com Erro, Mensagem e
+    CodTransacao) e passam pelo mesmo `interpretar_resposta` da ferramenta.
+
+    Com `pTransacao` diferente de 0 o envio é tratado como consulta: o
+    resultado é sorteado a partir do próprio código, então a mesma consulta
+    tem sempre a mesma resposta.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        porta=8110,
+        latencia="Lognormal",
+        latencia_media_ms=50.0,
+        latencia_desvio_ms=20.0,
+        taxa_erro_servico=0.0,
+        taxa_erro_http=0.0,
+        taxa_queda=0.0,
+        tamanho_resposta=0,
+        detectar_duplicados=False,
+        capacidade=0,
+        reuse_port=False,
+    ):
+        """
+        :param latencia: Distribuição da latência (ver criar_distribuicao).
+        :param taxa_erro_servico: Fração (0 a 1) de respostas com Erro=true.
+        :param taxa_erro_http: Fração de respostas HTTP 503.
+        :param taxa_queda: Fração de conexões fechadas sem resposta.
+        :param tamanho_resposta: Tamanho aproximado, em bytes, de cada resposta
+                                 (completado com um elemento Detalhes); 0 = mínimo.
+        :param detectar_duplicados: Responde Erro=true a um pXML já recebido,
+                                    como o integrador faz com registros repetidos.
+        :param capacidade: Requisições atendidas ao mesmo tempo, como os
+                           workers do integrador; as demais esperam na fila
+                           e a latência cresce com a carga (0 = sem limite).
+        :param reuse_port: Divide a porta com outros processos (ver
+                           servir_em_processos).
+        """
+        for taxa in (taxa_erro_servico, taxa_erro_http, taxa_queda):
+            if not 0 <= taxa <= 1:
+                raise ValueError("As taxas devem estar entre 0 e 1.")
+        self.host = host
+        self.porta = porta
+        self.latencia = latencia
+        self._sortear_latencia = criar_distribuicao(
+            latencia, latencia_media_ms, latencia_desvio_ms
+        )
+        self.taxa_erro_servico = taxa_erro_servico
+        self.taxa_erro_http = taxa_erro_http
+        self.taxa_queda = taxa_queda
+        self.tamanho_resposta = tamanho_resposta
+        self.detectar_duplicados = detectar_duplicados
+        self.capacidade = max(0, int(capacidade))
+        self.reuse_port = reuse_port
+
+        self._codigos = itertools.count(1)
+        self._recebidos = set()
+        self._enchimento = {}
+        self.contagens = dict.fromkeys(
+            ("requisicoes", "sucesso", "erro_servico", "erro_http", "quedas"), 0
+        )
+        self.conexoes_abertas = 0
+        self.maximo_conexoes = 0
+
+        self._loop = None
+        self._vagas = None
+        self._servidor = None
+        self._thread = None
+        self._pronto = threading.Event()
+
+    # --- Ciclo de vida ---
+
+    def servir(self):
+        """Atende até Ctrl+C (bloqueia a thread que chamou)."""
+        asyncio.run(self._servir())
+
+    def iniciar(self):
+        """Atende numa thread daemon; retorna quando a porta já está aberta."""
+        self._thread = threading.Thread(target=self.servir, daemon=True)
+        self._thread.start()
+        self._pronto.wait()
+        return self
+
+    def parar(self):
+        if self._loop is not None and self._servidor is not None:
+            self._loop.call_soon_threadsafe(self._servidor.close)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def resumo(self):
+        return {
+            **self.contagens,
+            "conexoes_abertas": self.conexoes_abertas,
+            "maximo_conexoes": self.maximo_conexoes,
+        }
+
+    async def _servir(self):
+        self._loop = asyncio.get_running_loop()
+        if self.capacidade:
+            self._vagas = asyncio.Semaphore(self.capacidade)
+        self._servidor = await asyncio.start_server(
+            self._atender,
+            self.host,
+            self.porta,
+            backlog=4096,
+            limit=LIMITE_CABECALHO,
+            reuse_port=self.reuse_port or None,
+        )
+        if not self.porta:
+            self.porta = self._servidor.sockets[0].getsockname()[1]
+        self._pronto.set()
+        async with self._servidor:
+            try:
+                await self._servidor.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    # --- HTTP ---
+
+    async def _atender(self, reader, writer):
+        self.conexoes_abertas += 1
+        self.maximo_conexoes = max(self.maximo_conexoes, self.conexoes_abertas)
+        try:
+            while True:
+                try:
+                    cabecalho = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    return
+                linhas = cabecalho.decode("latin-1").split("\r\n")
+                metodo = linhas[0].split(" ", 1)[0]
+                cabecalhos = {}
+                for linha in linhas[1:]:
+                    if ":" in linha:
+                        nome, valor = linha.split(":", 1)
+                        cabecalhos[nome.strip().lower()] = valor.strip()
+                fechar = cabecalhos.get("connection", "").lower() == "close"
+
+                if "content-length" not in cabecalhos:
+                    status, corpo = 411, b""
+                    fechar = True
+                else:
+                    corpo = await reader.readexactly(int(cabecalhos["content-length"]))
+                    if metodo != "POST":
+                        status, corpo = 405, b""
+                    else:
+                        resposta = await self._responder(corpo)
+                        if resposta is None:
+                            self.contagens["quedas"] += 1
+                            return
+                        status, corpo = resposta
+
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {_RAZOES[status]}\r\n"
+                        "Content-Type: text/xml; charset=utf-8\r\n"
+                        f"Content-Length: {len(corpo)}\r\n"
+                        f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n"
+                    ).encode("latin-1")
+                    + corpo
+                )
+                await writer.drain()
+                if fechar:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            return
+        except asyncio.CancelledError:
+            # Servidor encerrado com a conexão aberta.
+            return
+        finally:
+            self.conexoes_abertas -= 1
+            writer.close()
+
+    async def _responder(self, corpo):
+        """Retorna (status HTTP, corpo) ou None para derrubar a conexão."""
+        self.contagens["requisicoes"] += 1
+        if self._vagas is None:
+            await asyncio.sleep(self._sortear_latencia())
+        else:
+            async with self._vagas:
+                await asyncio.sleep(self._sortear_latencia())
+
+        sorteio = random.random()
+        if sorteio < self.taxa_queda:
+            return None
+        if b"IntegraXMLString" not in corpo:
+            self.contagens["erro_http"] += 1
+            return 500, _falha_soap("Ação SOAP desconhecida.")
+        if sorteio < self.taxa_queda + self.taxa_erro_http:
+            self.contagens["erro_http"] += 1
+            return 503, _falha_soap("Serviço temporariamente indisponível.")
+
+        # pTransacao fica no fim do envelope, depois do pXML.
+        encontrada = _TRANSACAO.search(corpo, max(0, len(corpo) - 1024))
+        transacao = (encontrada.group(1).strip() if encontrada else b"") or b"0"
+        if transacao != b"0":
+            # Consulta: o mesmo código tem sempre o mesmo resultado.
+            sorteador = random.Random(transacao)
+            erro = sorteador.random() < self.taxa_erro_servico
+            mensagem = sorteador.choice(MENSAGENS_ERRO) if erro else MENSAGEM_CONSULTA
+            codigo = transacao.decode("latin-1")
+        else:
+            erro = random.random() < self.taxa_erro_servico
+            mensagem = random.choice(MENSAGENS_ERRO) if erro else MENSAGEM_SUCESSO
+            if not erro and self.detectar_duplicados:
+                encontrado = _PXML.search(corpo)
+                resumo = hashlib.sha1(encontrado.group(1) if encontrado else b"")
+                if resumo.digest() in self._recebidos:
+                    erro, mensagem = True, MENSAGEM_DUPLICADO
+                else:
+                    self._recebidos.add(resumo.digest())
+            codigo = str(next(self._codigos))
+
+        self.contagens["erro_servico" if erro else "sucesso"] += 1
+        return 200, self._envelope(erro, mensagem, codigo)
+
+    def _envelope(self, erro, mensagem, codigo):
+        retorno = escape(
+            f"<Retorno><Erro>{'true' if erro else 'false'}</Erro>"
+            f"<Mensagem>{escape(mensagem)}</Mensagem>"
+            f"<CodTransacao>{codigo}</CodTransacao>"
+        )
+        tamanho = len(_INICIO_RESPOSTA) + len(retorno) + len(_FIM_RETORNO)
+        enchimento = self._enchimento_para(self.tamanho_resposta - tamanho)
+        return (_INICIO_RESPOSTA + retorno + enchimento + _FIM_RETORNO).encode("utf-8")
+
+    def _enchimento_para(self, falta):
+        """Elemento Detalhes (já escapado) com cerca de `falta` caracteres."""
+        vazio = len("&lt;Detalhes&gt;&lt;/Detalhes&gt;")
+        if falta <= vazio:
+            return ""
+        # Os tamanhos se repetem: cada enchimento é montado uma vez só.
+        enchimento = self._enchimento.get(falta)
+        if enchimento is None:
+            enchimento = f"&lt;Detalhes&gt;{'x' * (falta - vazio)}&lt;/Detalhes&gt;"
+            self._enchimento[falta] = enchimento
+        return enchimento
+
+
+def servir_em_processos(processos, **opcoes):
+    """
+    Atende com `processos` processos na mesma porta, para usar vários núcleos
+    (o sistema distribui as conexões). Bloqueia até Ctrl+C.
+
+    :param opcoes: Argumentos do ServidorSimulado.
+    :return: O resumo somado de todos os processos.
+
+    Raises:
+        ValueError: Se o sistema não permitir dividir a porta (Windows).
+    """
+    if processos > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        raise ValueError("Vários processos na mesma porta não são suportados aqui.")
+    if processos <= 1:
+        return _servir_ate_interromper(ServidorSimulado(**opcoes))
+
+    # A fila (e os semáforos dela) só existe com processos filhos.
+    contexto = multiprocessing.get_context("spawn")
+    resumos = contexto.Queue()
+    filhos = [
+        contexto.Process(target=_servir_processo, args=(opcoes, resumos), daemon=True)
+        for _ in range(processos - 1)
+    ]
+    for filho in filhos:
+        filho.start()
+    try:
+        resumo = _servir_ate_interromper(ServidorSimulado(**opcoes, reuse_port=True))
+        for _ in filhos:
+            try:
+                parcial = resumos.get(timeout=5)
+            except queue.Empty:
+                break
+            for chave, valor in parcial.items():
+                resumo[chave] += valor
+    finally:
+        for filho in filhos:
+            filho.join(1)
+            if filho.is_alive():
+                filho.terminate()
+        resumos.close()
+        resumos.join_thread()
+    return resumo
+
+
+def _servir_ate_interromper(servidor):
+    """Atende até Ctrl+C e devolve o resumo do servidor."""
+    try:
+        servidor.servir()
+    except KeyboardInterrupt:
+        pass
+    return servidor.resumo()
+
+
+def _servir_processo(opcoes, resumos):
+    resumos.put(_servir_ate_interromper(ServidorSimulado(**opcoes, reuse_port=True)))
+
+
+_RAZOES = {
+    200: "OK",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+_INICIO_RESPOSTA = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/">'
+    "<SOAP-ENV:Body>"
+    '<NS1:IntegraXMLStringResponse xmlns:NS1="urn:MegaIntegradorLibrary-'
+    'MegaIntegradorService"><Result xmlns="http://tempuri.org/">'
+)
+_FIM_RETORNO = (
+    "&lt;/Retorno&gt;</Result></NS1:IntegraXMLStringResponse>"
+    "</SOAP-ENV:Body></SOAP-ENV:Envelope>"
+)
+
+
+def _falha_soap(mensagem):
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/">'
+        "<SOAP-ENV:Body><SOAP-ENV:Fault><faultcode>SOAP-ENV:Server</faultcode>"
+        f"<faultstring>{escape(mensagem)}</faultstring></SOAP-ENV:Fault>"
+        "</SOAP-ENV:Body></SOAP-ENV:Envelope>"
+    ).encode("utf-8")
@@ -0,0 +1,285 @@
+# app/services/soap/transporte.py
+
+import socket
+import threading
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+from app.services.soap.envelope import CABECALHOS_SOAP
+from app.services.soap.estatisticas import CronometroFases
+
+
+class ContadorConexoes:
+    """
+    Contabiliza as conexões TCP abertas e as requisições feitas pelo pool,
+    e mantém o registro das conexões em uso para poder abortá-las.
+
+    Também cronometra as fases (estatisticas.FASES_HTTP) da requisição em
+    andamento em cada thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_uso = weakref.WeakSet()
+        self._local = threading.local()
+        self.abertas = 0
+        self.requisicoes = 0
+
+    def iniciar_fases(self):
+        """Começa a cronometrar uma requisição nesta thread."""
+        self._local.cronometro = CronometroFases()
+
+    def marcar_fase(self, fase):
+        cronometro = getattr(self._local, "cronometro", None)
+        if cronometro is not None:
+            cronometro.marcar(fase)
+
+    def fases(self):
+        """Fases da última requisição desta thread (dict fase → segundos)."""
+        cronometro = getattr(self._local, "cronometro", None)
+        return dict(cronometro.fases) if cronometro is not None else {}
+
+    def registrar_abertura(self):
+        with self._lock:
+            self.abertas += 1
+
+    def registrar_uso(self, conexao):
+        with self._lock:
+            self.requisicoes += 1
+            self._em_uso.add(conexao)
+
+    def liberar(self, conexao):
+        with self._lock:
+            self._em_uso.discard(conexao)
+
+    def abortar_em_uso(self):
+        """Derruba o socket das conexões em uso, destravando quem está lendo."""
+        with self._lock:
+            conexoes = list(self._em_uso)
+        for conexao in conexoes:
+            sock = getattr(conexao, "sock", None)
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def resumo(self):
+        with self._lock:
+            return {
+                "conexoes_abertas": self.abertas,
+                "conexoes_reutilizadas": max(0, self.requisicoes - self.abertas),
+            }
+
+
+class _ConexaoContadaMixin:
+    contador = None
+
+    def connect(self):
+        # Conta a tentativa, mesmo que falhe: não é uma conexão reutilizada.
+        if self.contador is not None:
+            self.contador.registrar_abertura()
+        super().connect()
+
+    def _new_conn(self):
+        # Resolve o nome aqui, para separar o DNS do TCP; a conexão a cada
+        # endereço continua com o urllib3 (timeout, opções e erros dele).
+        if self.contador is None:
+            return super()._new_conn()
+        host = self._dns_host
+        try:
+            enderecos = [
+                endereco[0]
+                for *_, endereco in socket.getaddrinfo(
+                    host.strip("[]"),
+                    self.port,
+                    allowed_gai_family(),
+                    socket.SOCK_STREAM,
+                )
+            ]
+        except (OSError, UnicodeError):
+            enderecos = []
+        if not enderecos:
+            # O urllib3 tenta de novo e traduz o erro (ex.: NameResolutionError).
+            return super()._new_conn()
+        self.contador.marcar_fase("dns")
+        try:
+            for posicao, endereco in enumerate(enderecos):
+                self._dns_host = endereco
+                try:
+                    sock = super()._new_conn()
+                    break
+                except ConnectTimeoutError:  # Inclui o NewConnectionError.
+                    if posicao == len(enderecos) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+        self.contador.marcar_fase("conexao")
+        return sock
+
+    def request(self, *args, **kwargs):
+        super().request(*args, **kwargs)
+        if self.contador is not None:
+            self.contador.marcar_fase("envio")
+
+    def getresponse(self):
+        resposta = super().getresponse()
+        if self.contador is not None:
+            self.contador.marcar_fase("espera")
+        return resposta
+
+
+class _ConexaoHTTP(_ConexaoContadaMixin, HTTPConnection):
+    pass
+
+
+class _ConexaoHTTPS(_ConexaoContadaMixin, HTTPSConnection):
+    def connect(self):
+        super().connect()
+        if self.contador is not None:
+            self.contador.marcar_fase("tls")
+
+
+class _PoolContadoMixin:
+    contador = None
+
+    def _new_conn(self):
+        conexao = super()._new_conn()
+        conexao.contador = self.contador
+        return conexao
+
+    def _get_conn(self, timeout=None):
+        # Até aqui, o requests montou a requisição (e a thread esperou o GIL).
+        # A fila conta só quando o pool estava esgotado e a thread esperou
+        # uma conexão ser devolvida; senão, o tempo aqui é preparo também.
+        esgotado = self.pool is not None and self.pool.empty()
+        self.contador.marcar_fase("preparo")
+        conexao = super()._get_conn(timeout)
+        self.contador.registrar_uso(conexao)
+        self.contador.marcar_fase("fila" if esgotado else "preparo")
+        return conexao
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            self.contador.liberar(conn)
+        super()._put_conn(conn)
+
+
+class _PoolHTTP(_PoolContadoMixin, HTTPConnectionPool):
+    ConnectionCls = _ConexaoHTTP
+
+
+class _PoolHTTPS(_PoolContadoMixin, HTTPSConnectionPool):
+    ConnectionCls = _ConexaoHTTPS
+
+
+class _PoolManagerContado(PoolManager):
+    def __init__(self, contador, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.contador = contador
+        self.pool_classes_by_scheme = {"http": _PoolHTTP, "https": _PoolHTTPS}
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.contador = self.contador
+        return pool
+
+
+class _AdaptadorContado(HTTPAdapter):
+    def __init__(self, contador, **kwargs):
+        # Precisa existir antes do super().__init__, que chama init_poolmanager.
+        self.contador = contador
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _PoolManagerContado(
+            self.contador,
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            **pool_kwargs,
+        )
+
+
+class TransporteSOAP:
+    """
+    Sessão HTTP keep-alive usada por toda uma execução da ferramenta SOAP.
+
+    Mantém um pool de até `tamanho_pool` conexões reaproveitadas entre os
+    envios, com timeouts de conexão/leitura configuráveis, e informa quantas
+    conexões foram abertas e reutilizadas. Não faz novas tentativas: elas
+    ficam com o MotorEnvio, que as contabiliza (ver resiliencia.py).
+    """
+
+    def __init__(
+        self,
+        url,
+        tamanho_pool=10,
+        timeout_conexao=5,
+        timeout_leitura=30,
+        num_hosts=1,
+    ):
+        """
+        :param url: URL padrão do serviço (ver motor_envio.construir_url).
+        :param tamanho_pool: Máximo de conexões mantidas abertas com o integrador.
+        :param timeout_conexao: Segundos para estabelecer a conexão TCP.
+        :param timeout_leitura: Segundos de espera pela resposta.
+        :param num_hosts: Quantas instâncias do integrador recebem envios (um
+                          pool de conexões por instância).
+        """
+        self.url = url
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.contador = ContadorConexoes()
+
+        adaptador = _AdaptadorContado(
+            self.contador,
+            pool_connections=max(1, int(num_hosts)),
+            pool_maxsize=max(1, int(tamanho_pool)),
+            pool_block=True,
+        )
+        self.session = requests.Session()
+        self.session.headers.update(CABECALHOS_SOAP)
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+
+    def enviar(self, corpo, url=None):
+        """
+        Envia um envelope já codificado e retorna a resposta.
+
+        :param url: Instância de destino; None usa a URL padrão.
+
+        As fases da requisição ficam em `fases`, nesta mesma thread.
+
+        Raises:
+            requests.exceptions.RequestException: Em falha de rede ou status 4xx/5xx.
+        """
+        self.contador.iniciar_fases()
+        response = self.session.post(url or self.url, data=corpo, timeout=self.timeout)
+        self.contador.marcar_fase("download")
+        response.raise_for_status()
+        return response
+
+    def fases(self):
+        """Fases HTTP (dict fase → segundos) do último `enviar` desta thread."""
+        return self.contador.fases()
+
+    def abortar(self):
+        """Interrompe na hora os envios em andamento (usado pelo "Interromper")."""
+        self.contador.abortar_em_uso()
+
+    def fechar(self):
+        self.session.close()
+
+    def estatisticas(self):
+        return self.contador.resumo()
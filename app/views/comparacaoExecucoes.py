@@ -0,0 +1,152 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from app.services.soap.historico_execucoes import (
+    comparar_execucoes,
+    descrever_execucao,
+    formatar_comparacao,
+)
+
+
+class ComparacaoExecucoesWindow(tk.Toplevel):
+    """
+    Janela para escolher duas execuções do histórico e comparar os resultados.
+    """
+
+    def __init__(self, parent, historico):
+        """
+        Inicializa a janela.
+        :param parent: A janela pai que está chamando esta.
+        :param historico: HistoricoExecucoes de onde vêm as execuções.
+        """
+        super().__init__(parent)
+        self.title("Comparar Execuções")
+        self.geometry("800x500")
+        self.minsize(600, 350)
+        self.transient(parent)
+
+        self.historico = historico
+        self.execucoes = []
+
+        self._criar_widgets()
+        self._configurar_eventos()
+        self._popular_dados()
+
+    def _criar_widgets(self):
+        """Cria e posiciona todos os widgets da interface."""
+        container = ttk.Frame(self, padding="10")
+        container.pack(fill="both", expand=True)
+        container.columnconfigure(1, weight=1)
+        container.rowconfigure(4, weight=1)
+
+        title_bar = tk.Label(
+            container,
+            text="Comparar Execuções Salvas",
+            bg="#005a9e",
+            fg="white",
+            font=("Helvetica", 12, "bold"),
+            padx=10,
+            pady=5,
+            anchor="w",
+        )
+        title_bar.grid(row=0, column=0, columnspan=3, sticky="ew", pady=(0, 10))
+
+        ttk.Label(container, text="Base:").grid(row=1, column=0, sticky="w", padx=5)
+        self.base_combo = ttk.Combobox(container, state="readonly")
+        self.base_combo.grid(row=1, column=1, columnspan=2, sticky="ew", padx=5, pady=2)
+        ttk.Label(container, text="Candidata:").grid(
+            row=2, column=0, sticky="w", padx=5
+        )
+        self.candidata_combo = ttk.Combobox(container, state="readonly")
+        self.candidata_combo.grid(
+            row=2, column=1, columnspan=2, sticky="ew", padx=5, pady=2
+        )
+        ttk.Label(container, text="Limiar (%):").grid(
+            row=3, column=0, sticky="w", padx=5
+        )
+        self.limiar_entry = ttk.Entry(container, width=8)
+        self.limiar_entry.insert(0, "5")
+        self.limiar_entry.grid(row=3, column=1, sticky="w", padx=5, pady=5)
+        self.comparar_button = ttk.Button(container, text="Comparar")
+        self.comparar_button.grid(row=3, column=2, sticky="e", padx=5)
+
+        text_frame = ttk.Frame(container)
+        text_frame.grid(row=4, column=0, columnspan=3, sticky="nsew", pady=(5, 0))
+        text_frame.rowconfigure(0, weight=1)
+        text_frame.columnconfigure(0, weight=1)
+        self.resultado_text = tk.Text(
+            text_frame,
+            wrap="word",
+            font=("Consolas", 10),
+            padx=5,
+            pady=5,
+            borderwidth=1,
+            relief="solid",
+        )
+        self.resultado_text.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(
+            text_frame, orient="vertical", command=self.resultado_text.yview
+        )
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.resultado_text.config(yscrollcommand=scrollbar.set)
+        self.resultado_text.tag_config(
+            "regressao", foreground="red", font=("Consolas", 10, "bold")
+        )
+        self.resultado_text.tag_config("aviso", foreground="#b36b00")
+
+        self.voltar_button = ttk.Button(container, text="Fechar")
+        self.voltar_button.grid(row=5, column=2, sticky="e", pady=(10, 0))
+
+    def _configurar_eventos(self):
+        self.comparar_button.config(command=self.comparar)
+        self.voltar_button.config(command=self.destroy)
+
+    def _popular_dados(self):
+        """Carrega o histórico; por padrão compara as duas últimas execuções."""
+        try:
+            self.execucoes = self.historico.listar()
+        except (OSError, ValueError) as e:
+            self._mostrar([f"Não foi possível ler o histórico: {e}"])
+            return
+        descricoes = [descrever_execucao(registro) for registro in self.execucoes]
+        self.base_combo.config(values=descricoes)
+        self.candidata_combo.config(values=descricoes)
+        if len(descricoes) < 2:
+            self._mostrar(
+                ["São necessárias ao menos duas execuções salvas para comparar."]
+            )
+            return
+        self.base_combo.current(len(descricoes) - 2)
+        self.candidata_combo.current(len(descricoes) - 1)
+        self.comparar()
+
+    # --- Métodos de Lógica ---
+
+    def comparar(self):
+        base = self.base_combo.current()
+        candidata = self.candidata_combo.current()
+        if base < 0 or candidata < 0:
+            return
+        try:
+            limiar = float(self.limiar_entry.get())
+        except ValueError:
+            messagebox.showerror(
+                "Erro de Validação", "O limiar deve ser numérico.", parent=self
+            )
+            return
+        comparacao = comparar_execucoes(
+            self.execucoes[base], self.execucoes[candidata], limiar
+        )
+        self._mostrar(formatar_comparacao(comparacao))
+
+    def _mostrar(self, linhas):
+        self.resultado_text.config(state="normal")
+        self.resultado_text.delete("1.0", "end")
+        for linha in linhas:
+            tags = ()
+            if "REGRESSÃO" in linha or linha.startswith("Regressões"):
+                tags = ("regressao",)
+            elif linha.startswith("Atenção"):
+                tags = ("aviso",)
+            self.resultado_text.insert("end", linha + "\n", tags)
+        self.resultado_text.config(state="disabled")
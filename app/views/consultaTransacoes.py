@@ -0,0 +1,144 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+# Filtros da tabela: rótulo → valor da coluna 'erro' (None = todos).
+FILTROS = {
+    "Todas": None,
+    "Erro = true": "true",
+    "Erro = false": "false",
+    "Sem resposta": "",
+}
+
+# (coluna, título, largura)
+COLUNAS_TABELA = (
+    ("codigo", "Cód. Transação", 110),
+    ("erro", "Erro", 60),
+    ("mensagem", "Mensagem", 400),
+    ("status", "Status", 100),
+    ("latencia_ms", "Latência (ms)", 90),
+)
+
+
+class ConsultaTransacoesWindow(tk.Toplevel):
+    """
+    Janela com a tabela código da transação → Erro/Mensagem de uma consulta
+    em lote, com filtro pelo campo Erro e exportação para CSV.
+    """
+
+    def __init__(self, parent, tabela):
+        """
+        Inicializa a janela.
+        :param parent: A janela pai que está chamando esta.
+        :param tabela: TabelaConsultas da execução.
+        """
+        super().__init__(parent)
+        self.title("Consulta de Transações")
+        self.geometry("850x500")
+        self.minsize(600, 300)
+        self.transient(parent)
+
+        self.tabela = tabela
+        self.linhas = tabela.linhas()
+
+        self._criar_widgets()
+        self._configurar_eventos()
+        self._popular_dados()
+
+    def _criar_widgets(self):
+        """Cria e posiciona todos os widgets da interface."""
+        container = ttk.Frame(self, padding="10")
+        container.pack(fill="both", expand=True)
+        container.columnconfigure(0, weight=1)
+        container.rowconfigure(2, weight=1)
+
+        title_bar = tk.Label(
+            container,
+            text="Resultado da Consulta de Transações",
+            bg="#005a9e",
+            fg="white",
+            font=("Helvetica", 12, "bold"),
+            padx=10,
+            pady=5,
+            anchor="w",
+        )
+        title_bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
+
+        filtro_frame = ttk.Frame(container)
+        filtro_frame.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        ttk.Label(filtro_frame, text="Mostrar:").pack(side="left", padx=(0, 5))
+        self.filtro_combo = ttk.Combobox(
+            filtro_frame, values=list(FILTROS), state="readonly", width=15
+        )
+        self.filtro_combo.set("Todas")
+        self.filtro_combo.pack(side="left")
+        self.contagem_label = ttk.Label(filtro_frame, foreground="gray")
+        self.contagem_label.pack(side="left", padx=10)
+
+        self.tree = ttk.Treeview(
+            container,
+            columns=[coluna for coluna, _, _ in COLUNAS_TABELA],
+            show="headings",
+        )
+        for coluna, titulo, largura in COLUNAS_TABELA:
+            self.tree.heading(coluna, text=titulo)
+            self.tree.column(coluna, width=largura, stretch=coluna == "mensagem")
+        self.tree.grid(row=2, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.tree.yview)
+        scrollbar.grid(row=2, column=1, sticky="ns")
+        self.tree.config(yscrollcommand=scrollbar.set)
+        self.tree.tag_configure("true", foreground="red")
+        self.tree.tag_configure("sem_resposta", foreground="gray")
+
+        button_frame = ttk.Frame(container)
+        button_frame.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        self.exportar_button = ttk.Button(button_frame, text="Exportar CSV...")
+        self.exportar_button.pack(side="left")
+        self.fechar_button = ttk.Button(button_frame, text="Fechar")
+        self.fechar_button.pack(side="right")
+
+    def _configurar_eventos(self):
+        self.filtro_combo.bind("<<ComboboxSelected>>", lambda e: self._popular_dados())
+        self.exportar_button.config(command=self.exportar)
+        self.fechar_button.config(command=self.destroy)
+
+    def _popular_dados(self):
+        self.tree.delete(*self.tree.get_children())
+        filtro = FILTROS[self.filtro_combo.get()]
+        mostradas = 0
+        for linha in self.linhas:
+            if filtro is not None and linha["erro"] != filtro:
+                continue
+            self.tree.insert(
+                "",
+                "end",
+                values=[linha[coluna] for coluna, _, _ in COLUNAS_TABELA],
+                tags=(linha["erro"] or "sem_resposta",),
+            )
+            mostradas += 1
+        contagens = self.tabela.contagens()
+        self.contagem_label.config(
+            text=(
+                f"{mostradas} de {len(self.linhas)} | Erro=false: "
+                f"{contagens['sem_erro']} | Erro=true: {contagens['com_erro']} | "
+                f"sem resposta: {contagens['sem_resposta']}"
+            )
+        )
+
+    # --- Métodos de Lógica ---
+
+    def exportar(self):
+        caminho = filedialog.asksaveasfilename(
+            parent=self,
+            title="Exportar consulta",
+            defaultextension=".csv",
+            initialfile="consulta_transacoes.csv",
+            filetypes=[("CSV", "*.csv"), ("Todos os arquivos", "*.*")],
+        )
+        if not caminho:
+            return
+        try:
+            self.tabela.salvar_csv(caminho)
+        except OSError as e:
+            messagebox.showerror(
+                "Erro", f"Não foi possível exportar a consulta:\n{e}", parent=self
+            )
@@ -0,0 +1,137 @@
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+from collections import deque
+import itertools
+import threading
+
+
+class LogVirtual(ttk.Frame):
+    """
+    Área de log para grandes volumes de mensagens.
+
+    As mensagens vão para um buffer circular (pode ser chamado de qualquer
+    thread, sem `after`) e uma única rotina periódica da UI insere as novas
+    de uma vez, mantendo só as últimas `linhas_visiveis` linhas no widget.
+    O histórico completo guardado no buffer pode ser aberto sob demanda.
+    """
+
+    def __init__(
+        self,
+        parent,
+        capacidade=200_000,
+        linhas_visiveis=2000,
+        intervalo_ms=100,
+        **kwargs,
+    ):
+        """
+        :param parent: Widget pai.
+        :param capacidade: Máximo de mensagens guardadas para o "Mostrar tudo".
+        :param linhas_visiveis: Máximo de linhas mantidas no widget de texto.
+        :param intervalo_ms: Intervalo entre as inserções em lote.
+        """
+        super().__init__(parent)
+        self.capacidade = capacidade
+        self.linhas_visiveis = linhas_visiveis
+        self.intervalo_ms = intervalo_ms
+
+        # deque.append é atômico: as threads de envio escrevem direto aqui.
+        self._registros = deque(maxlen=capacidade)
+        self._pendentes = deque(maxlen=linhas_visiveis)
+        self._total = 0
+        self._lock_total = threading.Lock()
+
+        self.text = scrolledtext.ScrolledText(self, state="disabled", **kwargs)
+        self.text.pack(fill="both", expand=True)
+        self._agendar()
+
+    # --- API usada pelas telas ---
+
+    def adicionar(self, mensagem, tags=None):
+        """Enfileira uma mensagem; pode ser chamado de qualquer thread."""
+        registro = (mensagem + "\n", tags or ())
+        self._registros.append(registro)
+        self._pendentes.append(registro)
+        with self._lock_total:
+            self._total += 1
+
+    def limpar(self):
+        """Apaga o widget e o histórico (somente na thread da UI)."""
+        self._registros.clear()
+        self._pendentes.clear()
+        self._total = 0
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.configure(state="disabled")
+
+    def descarregar(self):
+        """Insere de uma só vez as mensagens pendentes (somente na thread da UI)."""
+        if not self._pendentes:
+            return
+        lote = []
+        while self._pendentes:
+            try:
+                lote.append(self._pendentes.popleft())
+            except IndexError:
+                break
+
+        # Text.insert aceita vários pares (texto, tags) em uma só chamada.
+        argumentos = list(itertools.chain.from_iterable(lote))
+        self.text.configure(state="normal")
+        self.text.insert("end", *argumentos)
+        linhas = int(self.text.index("end-1c").split(".")[0])
+        if linhas > self.linhas_visiveis:
+            self.text.delete("1.0", f"{linhas - self.linhas_visiveis + 1}.0")
+        self.text.configure(state="disabled")
+        self.text.see("end")
+
+    def mostrar_tudo(self, titulo="Log Completo", bloco=2000):
+        """Abre uma janela com todo o histórico, carregado em blocos."""
+        registros = list(self._registros)
+        descartados = self._total - len(registros)
+
+        janela = tk.Toplevel(self)
+        janela.title(titulo)
+        janela.geometry("800x600")
+        janela.transient(self)
+        texto = scrolledtext.ScrolledText(
+            janela, font=self.text.cget("font"), wrap=self.text.cget("wrap")
+        )
+        texto.pack(fill="both", expand=True, padx=10, pady=10)
+        for tag in self.text.tag_names():
+            opcoes = {
+                nome: valores[-1]
+                for nome, valores in self.text.tag_configure(tag).items()
+                if valores[-1] not in ("", None)
+            }
+            texto.tag_configure(tag, **opcoes)
+        ttk.Button(janela, text="Fechar", command=janela.destroy).pack(pady=10)
+
+        if descartados > 0:
+            texto.insert(
+                "end",
+                f"({descartados} mensagens mais antigas foram descartadas do histórico)\n",
+                ("info",),
+            )
+
+        def inserir_bloco(inicio):
+            if not texto.winfo_exists():
+                return
+            fatia = registros[inicio : inicio + bloco]
+            if fatia:
+                texto.insert("end", *itertools.chain.from_iterable(fatia))
+                janela.after(1, inserir_bloco, inicio + bloco)
+            else:
+                texto.configure(state="disabled")
+
+        inserir_bloco(0)
+
+    # --- Rotina periódica ---
+
+    def _agendar(self):
+        self.after(self.intervalo_ms, self._tick)
+
+    def _tick(self):
+        try:
+            self.descarregar()
+        finally:
+            self._agendar()
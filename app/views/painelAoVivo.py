@@ -0,0 +1,86 @@
+import tkinter as tk
+from tkinter import ttk
+from collections import deque
+
+# (chave da amostra, título, formato do valor atual, cor da linha)
+INDICADORES = (
+    ("vazao_rps", "req/s", "{:.1f}", "#005a9e"),
+    ("em_andamento", "pendentes", "{:.0f}", "#6b4fbb"),
+    ("p95_ms", "p95 ms", "{:.1f}", "#b36b00"),
+    ("taxa_erro_pct", "erros %", "{:.1f}", "#c0392b"),
+)
+
+
+class Sparkline(ttk.Frame):
+    """Título, valor atual e um pequeno gráfico de linha das últimas amostras."""
+
+    def __init__(self, parent, titulo, formato, cor, pontos=120, largura=80, altura=22):
+        super().__init__(parent)
+        self.titulo = titulo
+        self.formato = formato
+        self.largura = largura
+        self.altura = altura
+        self._valores = deque(maxlen=pontos)
+
+        self.valor_label = ttk.Label(self, text=f"{titulo}: -", width=15)
+        self.valor_label.pack(side="left")
+        self.canvas = tk.Canvas(
+            self,
+            width=largura,
+            height=altura,
+            background="white",
+            highlightthickness=1,
+            highlightbackground="#cccccc",
+        )
+        self.canvas.pack(side="left", padx=(2, 0))
+        # Um único item de linha, atualizado com `coords` a cada amostra.
+        self._linha = self.canvas.create_line(0, 0, 0, 0, fill=cor, width=1.5)
+
+    def adicionar(self, valor):
+        self._valores.append(valor)
+        self.valor_label.config(text=f"{self.titulo}: {self.formato.format(valor)}")
+        if len(self._valores) < 2:
+            return
+        maximo = max(self._valores) or 1
+        passo = self.largura / (self._valores.maxlen - 1)
+        inicio = self.largura - passo * (len(self._valores) - 1)
+        coordenadas = []
+        for posicao, v in enumerate(self._valores):
+            coordenadas.append(inicio + posicao * passo)
+            coordenadas.append(self.altura - 2 - (self.altura - 4) * v / maximo)
+        self.canvas.coords(self._linha, *coordenadas)
+
+    def limpar(self):
+        self._valores.clear()
+        self.valor_label.config(text=f"{self.titulo}: -")
+        self.canvas.coords(self._linha, 0, 0, 0, 0)
+
+
+class PainelAoVivo(ttk.Frame):
+    """
+    Painel com a vazão, os envios em andamento, o p95 e a taxa de erro da
+    execução em andamento, cada um com o seu sparkline.
+
+    Não lê nada sozinho: quem usa chama `adicionar_amostra` (na thread da
+    UI) com o dict de MotorEnvio.amostrar algumas vezes por segundo.
+    """
+
+    def __init__(self, parent, pontos=120):
+        """
+        :param parent: Widget pai.
+        :param pontos: Amostras mantidas em cada gráfico.
+        """
+        super().__init__(parent)
+        self.sparklines = {}
+        for chave, titulo, formato, cor in INDICADORES:
+            sparkline = Sparkline(self, titulo, formato, cor, pontos)
+            sparkline.pack(side="left", padx=(0, 10))
+            self.sparklines[chave] = sparkline
+
+    def adicionar_amostra(self, amostra):
+        for chave, sparkline in self.sparklines.items():
+            sparkline.adicionar(amostra.get(chave, 0))
+
+    def limpar(self):
+        for sparkline in self.sparklines.values():
+            sparkline.limpar()
@@ -0,0 +1,233 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import json
+
+# (coluna, título, largura)
+COLUNAS_ESTAGIOS = (
+    ("estagio", "Estágio", 60),
+    ("taxa_oferecida", "Oferecido (req/s)", 110),
+    ("vazao_rps", "Medido (req/s)", 100),
+    ("p50", "p50 (ms)", 80),
+    ("p90", "p90 (ms)", 80),
+    ("p99", "p99 (ms)", 80),
+    ("erros", "Erros (%)", 70),
+    ("erro_servico", "Erro=true", 70),
+    ("situacao", "Situação", 110),
+)
+
+# (percentil, cor da linha) no gráfico de latência por estágio.
+CURVAS_LATENCIA = (("p50", "#005a9e"), ("p90", "#b36b00"), ("p99", "#c0392b"))
+
+SITUACOES = {None: "ok", "slo": "acima do SLO", "erros": "erros"}
+
+
+class RelatorioSaturacaoWindow(tk.Toplevel):
+    """
+    Janela com o relatório da busca de saturação: vazão máxima sustentável,
+    curva de latência por estágio e onde começaram as respostas Erro=true.
+    """
+
+    def __init__(self, parent, relatorio):
+        """
+        Inicializa a janela.
+        :param parent: A janela pai que está chamando esta.
+        :param relatorio: Dict de BuscaSaturacao.relatorio.
+        """
+        super().__init__(parent)
+        self.title("Busca de Saturação")
+        self.geometry("850x600")
+        self.minsize(650, 450)
+        self.transient(parent)
+
+        self.relatorio = relatorio
+
+        self._criar_widgets()
+        self._configurar_eventos()
+        self._popular_dados()
+
+    def _criar_widgets(self):
+        """Cria e posiciona todos os widgets da interface."""
+        container = ttk.Frame(self, padding="10")
+        container.pack(fill="both", expand=True)
+        container.columnconfigure(0, weight=1)
+        container.rowconfigure(2, weight=1)
+
+        title_bar = tk.Label(
+            container,
+            text="Relatório da Busca de Saturação",
+            bg="#005a9e",
+            fg="white",
+            font=("Helvetica", 12, "bold"),
+            padx=10,
+            pady=5,
+            anchor="w",
+        )
+        title_bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
+
+        self.resumo_label = ttk.Label(container, justify="left")
+        self.resumo_label.grid(row=1, column=0, columnspan=2, sticky="w", pady=(0, 10))
+
+        self.grafico = tk.Canvas(
+            container,
+            height=180,
+            background="white",
+            highlightthickness=1,
+            highlightbackground="#cccccc",
+        )
+        self.grafico.grid(row=2, column=0, columnspan=2, sticky="nsew")
+
+        self.tree = ttk.Treeview(
+            container,
+            columns=[coluna for coluna, _, _ in COLUNAS_ESTAGIOS],
+            show="headings",
+            height=8,
+        )
+        for coluna, titulo, largura in COLUNAS_ESTAGIOS:
+            self.tree.heading(coluna, text=titulo)
+            self.tree.column(coluna, width=largura, anchor="e")
+        self.tree.grid(row=3, column=0, sticky="nsew", pady=(10, 0))
+        scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.tree.yview)
+        scrollbar.grid(row=3, column=1, sticky="ns", pady=(10, 0))
+        self.tree.config(yscrollcommand=scrollbar.set)
+        self.tree.tag_configure("reprovado", foreground="red")
+        self.tree.tag_configure("joelho", font=("Helvetica", 9, "bold"))
+
+        button_frame = ttk.Frame(container)
+        button_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        self.salvar_button = ttk.Button(button_frame, text="Salvar JSON...")
+        self.salvar_button.pack(side="left")
+        self.fechar_button = ttk.Button(button_frame, text="Fechar")
+        self.fechar_button.pack(side="right")
+
+    def _configurar_eventos(self):
+        self.grafico.bind("<Configure>", lambda e: self._desenhar_grafico())
+        self.salvar_button.config(command=self.salvar)
+        self.fechar_button.config(command=self.destroy)
+
+    def _popular_dados(self):
+        relatorio = self.relatorio
+        joelho = relatorio["joelho"]
+        if joelho is not None:
+            linhas = [
+                f"Vazão máxima sustentável: {joelho['vazao_rps']:.1f} req/s "
+                f"(estágio {joelho['estagio']}, p99 {joelho['p99_ms']:.1f} ms)"
+            ]
+        else:
+            linhas = ["Nenhum estágio ficou dentro do SLO (reduza a Taxa Base)."]
+        linhas.append(
+            f"SLO: p99 até {relatorio['slo_p99_ms']:g} ms e erros até "
+            f"{relatorio['erros_aceitos'] * 100:g}%"
+        )
+        inicio = relatorio["inicio_erro_servico"]
+        if inicio is not None:
+            linhas.append(
+                f"Erro=true a partir do estágio {inicio['estagio']} "
+                f"({inicio['taxa_oferecida']:g} req/s): "
+                f"{inicio['mensagem'] or '(sem mensagem)'}"
+            )
+        else:
+            linhas.append("Nenhuma resposta Erro=true.")
+        self.resumo_label.config(text="\n".join(linhas))
+
+        numero_joelho = joelho["estagio"] if joelho is not None else None
+        for estagio in relatorio["estagios"]:
+            latencia = estagio["latencia_ms"]
+            tags = ()
+            if estagio["motivo"] is not None:
+                tags = ("reprovado",)
+            elif estagio["estagio"] == numero_joelho:
+                tags = ("joelho",)
+            self.tree.insert(
+                "",
+                "end",
+                values=[
+                    estagio["estagio"],
+                    f"{estagio['taxa_oferecida']:g}",
+                    f"{estagio['vazao_rps']:.1f}",
+                    f"{latencia['p50']:.1f}",
+                    f"{latencia['p90']:.1f}",
+                    f"{latencia['p99']:.1f}",
+                    f"{estagio['taxa_erro'] * 100:.2f}",
+                    estagio["contagens"]["erro_servico"],
+                    SITUACOES.get(estagio["motivo"], estagio["motivo"]),
+                ],
+                tags=tags,
+            )
+
+    # --- Métodos de Lógica ---
+
+    def _desenhar_grafico(self):
+        """Latência (p50/p90/p99) por taxa medida, com a linha do SLO."""
+        canvas = self.grafico
+        canvas.delete("all")
+        estagios = self.relatorio["estagios"]
+        largura, altura = canvas.winfo_width(), canvas.winfo_height()
+        margem_x, margem_y = 60, 20
+        if not estagios or largura <= 2 * margem_x or altura <= 2 * margem_y:
+            return
+        slo = self.relatorio["slo_p99_ms"]
+        # Eixo de latência limitado a 3x o SLO, para o joelho não sumir na escala.
+        maior_p99 = max(e["latencia_ms"]["p99"] for e in estagios)
+        maximo_y = min(max(maior_p99 * 1.1, slo * 1.2), slo * 3)
+        maximo_x = max(e["vazao_rps"] for e in estagios) * 1.1 or 1
+
+        def ponto(vazao, latencia):
+            x = margem_x + (largura - 2 * margem_x) * vazao / maximo_x
+            fracao = min(latencia, maximo_y) / maximo_y
+            return x, altura - margem_y - (altura - 2 * margem_y) * fracao
+
+        base = altura - margem_y
+        canvas.create_line(margem_x, base, largura - margem_x, base, fill="#999999")
+        canvas.create_line(margem_x, margem_y, margem_x, base, fill="#999999")
+        canvas.create_text(
+            margem_x - 5, margem_y, text=f"{maximo_y:.0f} ms", anchor="e", fill="gray"
+        )
+        canvas.create_text(margem_x - 5, base, text="0", anchor="e", fill="gray")
+        canvas.create_text(
+            largura - margem_x,
+            base + 10,
+            text=f"{maximo_x:.0f} req/s",
+            anchor="e",
+            fill="gray",
+        )
+        _, y_slo = ponto(0, slo)
+        canvas.create_line(
+            margem_x, y_slo, largura - margem_x, y_slo, fill="red", dash=(4, 2)
+        )
+        canvas.create_text(
+            largura - margem_x + 5, y_slo, text="SLO", anchor="w", fill="red"
+        )
+
+        for posicao, (percentil, cor) in enumerate(CURVAS_LATENCIA):
+            coordenadas = []
+            for estagio in estagios:
+                x, y = ponto(estagio["vazao_rps"], estagio["latencia_ms"][percentil])
+                coordenadas.extend((x, y))
+                canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill=cor, outline=cor)
+            if len(coordenadas) >= 4:
+                canvas.create_line(*coordenadas, fill=cor, width=1.5)
+            canvas.create_text(
+                margem_x + 10 + posicao * 45,
+                margem_y,
+                text=percentil,
+                anchor="w",
+                fill=cor,
+            )
+
+    def salvar(self):
+        caminho = filedialog.asksaveasfilename(
+            parent=self,
+            title="Salvar relatório",
+            defaultextension=".json",
+            initialfile="saturacao.json",
+            filetypes=[("JSON", "*.json"), ("Todos os arquivos", "*.*")],
+        )
+        if not caminho:
+            return
+        try:
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                json.dump(self.relatorio, arquivo, ensure_ascii=False, indent=2)
+        except OSError as e:
+            messagebox.showerror(
+                "Erro", f"Não foi possível salvar o relatório:\n{e}", parent=self
+            )
@@ -0,0 +1,231 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import csv
+import sqlite3
+
+from app.services.soap.banco_resultados import STATUS_FALHAS
+from app.services.soap.estatisticas import STATUS_RESULTADO
+
+# Linhas mostradas na tabela; a exportação leva todas.
+LIMITE_LINHAS = 1000
+
+# (coluna, título, largura)
+COLUNAS_RESULTADOS = (
+    ("execucao", "Exec.", 50),
+    ("envio", "Envio", 70),
+    ("status", "Status", 100),
+    ("cod_transacao", "CodTransacao", 100),
+    ("latencia_ms", "Latência (ms)", 90),
+    ("mensagem", "Mensagem", 380),
+    ("origem", "Origem", 120),
+)
+
+
+class ResultadosBancoWindow(tk.Toplevel):
+    """
+    Janela para filtrar os resultados gravados no BancoResultados por
+    execução, status, mensagem e CodTransacao.
+    """
+
+    def __init__(self, parent, banco):
+        """
+        Inicializa a janela.
+        :param parent: A janela pai que está chamando esta.
+        :param banco: BancoResultados consultado.
+        """
+        super().__init__(parent)
+        self.title("Resultados Gravados")
+        self.geometry("950x550")
+        self.minsize(700, 350)
+        self.transient(parent)
+
+        self.banco = banco
+        self.execucoes = []
+        self._mensagens_listadas = set()
+
+        self._criar_widgets()
+        self._configurar_eventos()
+        self._popular_dados()
+
+    def _criar_widgets(self):
+        """Cria e posiciona todos os widgets da interface."""
+        container = ttk.Frame(self, padding="10")
+        container.pack(fill="both", expand=True)
+        container.columnconfigure(0, weight=1)
+        container.rowconfigure(3, weight=1)
+
+        title_bar = tk.Label(
+            container,
+            text="Resultados Gravados no Banco",
+            bg="#005a9e",
+            fg="white",
+            font=("Helvetica", 12, "bold"),
+            padx=10,
+            pady=5,
+            anchor="w",
+        )
+        title_bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
+
+        filtros_frame = ttk.Frame(container)
+        filtros_frame.grid(row=1, column=0, columnspan=2, sticky="ew")
+        filtros_frame.columnconfigure(5, weight=1)
+        ttk.Label(filtros_frame, text="Execução:").grid(row=0, column=0, sticky="w")
+        self.execucao_combo = ttk.Combobox(filtros_frame, state="readonly", width=45)
+        self.execucao_combo.grid(row=0, column=1, columnspan=3, sticky="w", padx=5)
+        ttk.Label(filtros_frame, text="Status:").grid(
+            row=0, column=4, sticky="e", padx=(10, 5)
+        )
+        self.status_combo = ttk.Combobox(
+            filtros_frame,
+            values=["Todos", STATUS_FALHAS, *STATUS_RESULTADO],
+            state="readonly",
+            width=14,
+        )
+        self.status_combo.set(STATUS_FALHAS)
+        self.status_combo.grid(row=0, column=5, sticky="w", pady=2)
+        ttk.Label(filtros_frame, text="Mensagem:").grid(row=1, column=0, sticky="w")
+        self.mensagem_combo = ttk.Combobox(filtros_frame, width=60)
+        self.mensagem_combo.grid(row=1, column=1, columnspan=3, sticky="ew", padx=5)
+        ttk.Label(filtros_frame, text="CodTransacao:").grid(
+            row=1, column=4, sticky="e", padx=(10, 5)
+        )
+        self.cod_transacao_entry = ttk.Entry(filtros_frame, width=16)
+        self.cod_transacao_entry.grid(row=1, column=5, sticky="w", pady=2)
+        self.filtrar_button = ttk.Button(filtros_frame, text="Filtrar")
+        self.filtrar_button.grid(row=1, column=6, sticky="e", padx=(10, 0))
+        ttk.Label(
+            filtros_frame,
+            text="(mensagem da lista = exata; texto digitado = contém)",
+            foreground="gray",
+        ).grid(row=2, column=1, columnspan=5, sticky="w", padx=5)
+
+        self.contagem_label = ttk.Label(container, foreground="gray")
+        self.contagem_label.grid(row=2, column=0, columnspan=2, sticky="w", pady=5)
+
+        self.tree = ttk.Treeview(
+            container,
+            columns=[coluna for coluna, _, _ in COLUNAS_RESULTADOS],
+            show="headings",
+        )
+        for coluna, titulo, largura in COLUNAS_RESULTADOS:
+            self.tree.heading(coluna, text=titulo)
+            self.tree.column(coluna, width=largura, stretch=coluna == "mensagem")
+        self.tree.grid(row=3, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.tree.yview)
+        scrollbar.grid(row=3, column=1, sticky="ns")
+        self.tree.config(yscrollcommand=scrollbar.set)
+        self.tree.tag_configure("erro_servico", foreground="#b36b00")
+        self.tree.tag_configure("erro_conexao", foreground="red")
+
+        button_frame = ttk.Frame(container)
+        button_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        self.exportar_button = ttk.Button(button_frame, text="Exportar CSV...")
+        self.exportar_button.pack(side="left")
+        self.fechar_button = ttk.Button(button_frame, text="Fechar")
+        self.fechar_button.pack(side="right")
+
+    def _configurar_eventos(self):
+        self.execucao_combo.bind(
+            "<<ComboboxSelected>>", lambda e: self._atualizar_mensagens()
+        )
+        self.status_combo.bind(
+            "<<ComboboxSelected>>", lambda e: self._atualizar_mensagens()
+        )
+        self.mensagem_combo.bind("<<ComboboxSelected>>", lambda e: self.filtrar())
+        self.mensagem_combo.bind("<Return>", lambda e: self.filtrar())
+        self.cod_transacao_entry.bind("<Return>", lambda e: self.filtrar())
+        self.filtrar_button.config(command=self.filtrar)
+        self.exportar_button.config(command=self.exportar)
+        self.fechar_button.config(command=self.destroy)
+
+    def _popular_dados(self):
+        """Carrega as execuções; por padrão mostra as falhas da mais recente."""
+        try:
+            self.execucoes = self.banco.listar_execucoes()
+        except sqlite3.Error as e:
+            self.contagem_label.config(text=f"Não foi possível ler o banco: {e}")
+            return
+        descricoes = ["Todas"] + [
+            f"{e['id']} - {e['data']} - {e['resultados']} resultados"
+            + (f" - {e['rotulo']}" if e["rotulo"] else "")
+            for e in self.execucoes
+        ]
+        self.execucao_combo.config(values=descricoes)
+        self.execucao_combo.current(1 if self.execucoes else 0)
+        self._atualizar_mensagens()
+
+    # --- Métodos de Lógica ---
+
+    def _filtros(self):
+        posicao = self.execucao_combo.current()
+        status = self.status_combo.get()
+        mensagem = self.mensagem_combo.get().strip()
+        exata = mensagem in self._mensagens_listadas
+        return {
+            "execucao": self.execucoes[posicao - 1]["id"] if posicao > 0 else None,
+            "status": None if status == "Todos" else status,
+            "mensagem": mensagem if mensagem and exata else None,
+            "contem": mensagem if mensagem and not exata else None,
+            "cod_transacao": self.cod_transacao_entry.get().strip() or None,
+        }
+
+    def _atualizar_mensagens(self):
+        """Lista as mensagens mais frequentes da execução e do status escolhidos."""
+        self.mensagem_combo.set("")
+        filtros = self._filtros()
+        try:
+            mensagens = self.banco.mensagens(filtros["execucao"], filtros["status"])
+        except sqlite3.Error:
+            mensagens = []
+        self._mensagens_listadas = {linha["mensagem"] for linha in mensagens}
+        self.mensagem_combo.config(values=[linha["mensagem"] for linha in mensagens])
+        self.filtrar()
+
+    def filtrar(self):
+        filtros = self._filtros()
+        try:
+            total = self.banco.contar(**filtros)
+            linhas = self.banco.consultar(**filtros, limite=LIMITE_LINHAS)
+        except sqlite3.Error as e:
+            messagebox.showerror(
+                "Erro", f"Falha ao consultar o banco:\n{e}", parent=self
+            )
+            return
+        self.tree.delete(*self.tree.get_children())
+        for linha in linhas:
+            self.tree.insert(
+                "",
+                "end",
+                values=[
+                    "" if linha[coluna] is None else linha[coluna]
+                    for coluna, _, _ in COLUNAS_RESULTADOS
+                ],
+                tags=(linha["status"],),
+            )
+        self.contagem_label.config(
+            text=f"{total} resultado(s); mostrando {len(linhas)}."
+        )
+
+    def exportar(self):
+        caminho = filedialog.asksaveasfilename(
+            parent=self,
+            title="Exportar resultados",
+            defaultextension=".csv",
+            initialfile="resultados.csv",
+            filetypes=[("CSV", "*.csv"), ("Todos os arquivos", "*.*")],
+        )
+        if not caminho:
+            return
+        try:
+            linhas = self.banco.consultar(**self._filtros(), limite=None)
+            with open(caminho, "w", encoding="utf-8", newline="") as arquivo:
+                escritor = csv.writer(arquivo, delimiter=";")
+                escritor.writerow([coluna for coluna, _, _ in COLUNAS_RESULTADOS])
+                escritor.writerows(
+                    [linha[coluna] for coluna, _, _ in COLUNAS_RESULTADOS]
+                    for linha in linhas
+                )
+        except (OSError, sqlite3.Error) as e:
+            messagebox.showerror(
+                "Erro", f"Não foi possível exportar os resultados:\n{e}", parent=self
+            )
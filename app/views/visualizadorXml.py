@@ -0,0 +1,88 @@
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+import threading
+
+
+class VisualizadorXmlWindow(tk.Toplevel):
+    """
+    Janela que mostra um texto grande (ex.: uma resposta SOAP de vários MB)
+    sem travar a aplicação.
+
+    A preparação do texto (`preparar`, ex.: formatar o XML) roda numa
+    thread; depois o texto é inserido no widget em blocos de linhas, um
+    bloco por ciclo do event loop, com o progresso no rodapé.
+    """
+
+    def __init__(self, parent, titulo, texto, preparar=None, bloco=256 * 1024):
+        """
+        :param parent: A janela pai que está chamando esta.
+        :param titulo: Título da janela.
+        :param texto: Texto bruto a ser mostrado.
+        :param preparar: Função aplicada ao texto antes de mostrar, fora da
+                         thread da UI (None = mostra como veio).
+        :param bloco: Caracteres aproximados inseridos por vez.
+        """
+        super().__init__(parent)
+        self.title(titulo)
+        self.geometry("800x600")
+        self.transient(parent)
+        self.grab_set()
+
+        self.bloco = bloco
+        self._preparado = None
+
+        self._criar_widgets()
+        if preparar is None:
+            self._preparado = texto
+        else:
+            threading.Thread(
+                target=self._preparar, args=(preparar, texto), daemon=True
+            ).start()
+        self._aguardar_preparo()
+
+    def _criar_widgets(self):
+        self.text_widget = scrolledtext.ScrolledText(
+            self, font=("Consolas", 10), wrap=tk.WORD
+        )
+        self.text_widget.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+        rodape = ttk.Frame(self)
+        rodape.pack(fill="x", padx=10, pady=10)
+        self.status_label = ttk.Label(rodape, text="Formatando...", foreground="gray")
+        self.status_label.pack(side="left")
+        ttk.Button(rodape, text="Fechar", command=self.destroy).pack(side="right")
+
+    def _preparar(self, preparar, texto):
+        # Só o resultado volta para a UI; nada de Tk nesta thread.
+        try:
+            self._preparado = preparar(texto)
+        except Exception:
+            self._preparado = texto
+
+    def _aguardar_preparo(self):
+        if not self.winfo_exists():
+            return
+        if self._preparado is None:
+            self.after(50, self._aguardar_preparo)
+            return
+        self._inserir_bloco(0)
+
+    def _inserir_bloco(self, inicio):
+        if not self.winfo_exists():
+            return
+        texto = self._preparado
+        if inicio >= len(texto):
+            self.text_widget.configure(state="disabled")
+            self.status_label.config(
+                text=f"{len(texto):,} caracteres".replace(",", ".")
+            )
+            return
+        # Corta no fim de uma linha para não quebrar a linha ao meio.
+        fim = inicio + self.bloco
+        if fim < len(texto):
+            quebra = texto.find("\n", fim)
+            fim = len(texto) if quebra == -1 else quebra + 1
+        self.text_widget.insert("end", texto[inicio:fim])
+        self.status_label.config(
+            text=f"Carregando... {min(100, fim * 100 // max(1, len(texto)))}%"
+        )
+        self.after(1, self._inserir_bloco, fim)
@@ -0,0 +1,976 @@
+# cli.py
+
+"""
+Executor de linha de comando da Ferramenta de Integração SOAP.
+
+Roda o mesmo motor da tela (MotorEnvio) sem interface gráfica, para uso em
+agentes de build e servidores sem display, e grava um resumo em JSON.
+
+Exemplo:
+    python cli.py --url integrador01 --porta 8110 --pro-id 0207 \\
+        --usu-codigo 0001 --sistema 001 --payload agente.xml \\
+        --repeticoes 1000 --concorrencia 20 --saida resumo.json
+
+Cada execução fica salva no histórico (pasta "execucoes"). Para comparar
+duas execuções (sai com código 3 se houver regressão significativa):
+    python cli.py execucoes
+    python cli.py comparar 20250101_101500 20250102_093000
+
+Consulta em lote do resultado de transações já integradas (um código por
+linha; a tabela código → Erro/Mensagem vai para consulta_transacoes.csv):
+    python cli.py --url integrador01 --pro-id 0207 --transacoes codigos.txt \\
+        --concorrencia 20
+
+Concorrência adaptativa: --concorrencia passa a ser o máximo e o limite de
+envios simultâneos acompanha a latência (o resumo traz onde estabilizou):
+    python cli.py --url integrador01 --pro-id 0207 --payload agente.xml \\
+        --repeticoes 20000 --concorrencia 200 --adaptativa Gradiente \\
+        --latencia-maxima 500
+
+Geração e envio em fluxo: um Agente 207 novo (nome e CPF/CNPJ próprios) por
+envio, gerado enquanto os anteriores são enviados (modelo opcional em JSON,
+com as chaves de agente_207.MODELO_PADRAO):
+    python cli.py --url integrador01 --pro-id 0207 --gerar-agentes \\
+        --modelo-agentes modelo.json --repeticoes 5000 --concorrencia 20
+
+Mistura de serviços como a da produção: um cenário JSON lista os serviços
+(pPRO_IN_ID) com o peso ou a taxa de cada um e a origem dos payloads (ver
+cenario.CenarioCarga); o resumo traz as estatísticas de cada serviço:
+    python cli.py --url integrador01 --cenario producao.json \\
+        --repeticoes 10000 --concorrencia 50
+    (com 'taxa' nos serviços, a carga é aberta por --duracao segundos)
+
+Busca da vazão máxima dentro de um SLO (estágios de taxa crescente; o
+relatório aponta o joelho e onde começaram as respostas Erro=true):
+    python cli.py --url integrador01 --pro-id 0207 --payload agente.xml \\
+        --concorrencia 200 --saturacao --taxa-base 20 --slo-p99 800
+
+Cada envio também fica no banco de resultados (resultados.db). Para filtrar,
+por exemplo, as falhas com uma mensagem na execução mais recente:
+    python cli.py resultados --status falhas --mensagem "Campo obrigatório"
+    python cli.py resultados --execucoes
+
+Integrador simulado local, para testar a ferramenta sem o integrador real:
+    python cli.py simulador --porta 8110 --latencia Lognormal \\
+        --latencia-media 50 --latencia-desvio 20 --erro-servico 2
+"""
+
+import argparse
+import csv
+import json
+import logging
+import math
+import multiprocessing
+import sqlite3
+import sys
+import threading
+
+from app.services.soap.arquivo_respostas import ArquivoRespostas
+from app.services.soap.balanceamento import ESTRATEGIAS, BalanceadorEndpoints
+from app.services.soap.banco_resultados import (
+    ARQUIVO_BANCO,
+    STATUS_FALHAS,
+    BancoResultados,
+)
+from app.services.soap.cenario import CenarioCarga
+from app.services.soap.concorrencia_adaptativa import (
+    ALGORITMOS_CONCORRENCIA,
+    LimiteAdaptativo,
+)
+from app.services.soap.consulta_transacoes import ListaTransacoes, TabelaConsultas
+from app.services.soap.corpus import FORMATOS_CORPUS, CorpusPayloads
+from app.services.soap.estatisticas import STATUS_RESULTADO, formatar_resumo
+from app.services.soap.historico_execucoes import (
+    PASTA_HISTORICO,
+    HistoricoExecucoes,
+    comparar_execucoes,
+    descrever_execucao,
+    formatar_comparacao,
+)
+from app.services.soap.motor_envio import (
+    MOTORES,
+    MotorEnvio,
+    construir_endpoints,
+    validar_parametros,
+)
+from app.services.soap.perfis_carga import PerfilConstante, criar_perfil
+from app.services.soap.pipeline_geracao import CAPACIDADE_FILA_PADRAO, FilaGeracao
+from app.services.soap.resiliencia import DisjuntorCircuito
+from app.services.soap.saturacao import BuscaSaturacao, formatar_relatorio_saturacao
+from app.services.soap.servidor_simulado import (
+    DISTRIBUICOES_LATENCIA,
+    servir_em_processos,
+)
+from app.services.serviço_207.agente_207 import GeradorAgentes
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Envia requisições IntegraXMLString em lote ao MegaIntegradorService."
+    )
+    conexao = parser.add_argument_group("conexão")
+    conexao.add_argument(
+        "--url",
+        default="localhost",
+        help="Computador/URL do integrador; várias instâncias separadas por "
+        "vírgula, como host[:porta][*peso].",
+    )
+    conexao.add_argument("--porta", default="8110", help="Porta padrão do integrador.")
+    conexao.add_argument("--balanceamento", choices=ESTRATEGIAS, default="Round-robin")
+    conexao.add_argument(
+        "--falhas-ejecao",
+        type=int,
+        default=3,
+        help="Falhas seguidas que tiram uma instância do rodízio (0 = nunca).",
+    )
+    conexao.add_argument(
+        "--tempo-ejecao", type=float, default=10, help="Segundos fora do rodízio."
+    )
+    conexao.add_argument(
+        "--verificacao-saude",
+        type=float,
+        default=0,
+        help="Segundos entre as verificações TCP de cada instância (0 = desligada).",
+    )
+    conexao.add_argument(
+        "--pool", type=int, help="Pool de conexões (padrão: concorrência)."
+    )
+    conexao.add_argument("--timeout-conexao", type=float, default=5)
+    conexao.add_argument("--timeout-leitura", type=float, default=30)
+    conexao.add_argument(
+        "--tentativas",
+        type=int,
+        default=0,
+        help="Novas tentativas em falha de conexão, timeout ou HTTP 5xx.",
+    )
+    conexao.add_argument(
+        "--backoff-base",
+        type=float,
+        default=0.2,
+        help="Teto da primeira espera entre tentativas, em segundos (dobra a cada uma).",
+    )
+    conexao.add_argument(
+        "--disjuntor-erros",
+        type=float,
+        default=50,
+        help="%% de erros na janela que abre o disjuntor (0 = desligado).",
+    )
+    conexao.add_argument(
+        "--disjuntor-janela",
+        type=int,
+        default=20,
+        help="Envios na janela do disjuntor.",
+    )
+    conexao.add_argument(
+        "--disjuntor-pausa",
+        type=float,
+        default=5,
+        help="Segundos com o disjuntor aberto antes da sonda.",
+    )
+
+    requisicao = parser.add_argument_group("parâmetros da requisição")
+    requisicao.add_argument(
+        "--pro-id", help="Cód. Serviço (pPRO_IN_ID); obrigatório sem --cenario."
+    )
+    requisicao.add_argument("--usu-codigo", default="0001", help="Cód. Usuário.")
+    requisicao.add_argument("--transacao", default="0", help="Cód. Transação.")
+    requisicao.add_argument("--sistema", default="001", help="Cód. Sistema.")
+    requisicao.add_argument("--obs", default="", help="Obs (pObs).")
+    requisicao.add_argument("--payload", help="Arquivo com o XML de envio (pXML).")
+    requisicao.add_argument(
+        "--corpus",
+        help="Pasta, arquivo .jsonl ou XML com vários documentos: um payload por envio.",
+    )
+    requisicao.add_argument(
+        "--formato-corpus",
+        choices=FORMATOS_CORPUS,
+        help="Formato do corpus (padrão: detectado pelo caminho).",
+    )
+    requisicao.add_argument(
+        "--transacoes",
+        help=(
+            "Arquivo com um código de transação por linha: consulta cada um "
+            "(pTransacao com pXML vazio), --concorrencia por vez."
+        ),
+    )
+    requisicao.add_argument(
+        "--gerar-agentes",
+        action="store_true",
+        help="Gera um Agente 207 novo (nome e CPF/CNPJ próprios) para cada envio, "
+        "enquanto envia; --repeticoes é a quantidade.",
+    )
+    requisicao.add_argument(
+        "--modelo-agentes",
+        help="JSON com o modelo dos agentes gerados (padrão: o da tela 207).",
+    )
+    requisicao.add_argument(
+        "--fila-geracao",
+        type=int,
+        default=CAPACIDADE_FILA_PADRAO,
+        help="Agentes gerados à frente dos envios, no máximo.",
+    )
+    requisicao.add_argument(
+        "--cenario",
+        help="JSON com a mistura de serviços (pesos ou taxas, parâmetros e "
+        "payloads de cada um), no lugar dos parâmetros acima.",
+    )
+
+    envio = parser.add_argument_group("envio")
+    envio.add_argument(
+        "--repeticoes",
+        type=int,
+        help="Número de envios (padrão: 1; com --corpus, todos os registros; "
+        "num cenário por taxa, os de --duracao).",
+    )
+    envio.add_argument(
+        "--concorrencia", type=int, default=1, help="Envios simultâneos."
+    )
+    envio.add_argument("--motor", choices=MOTORES, default="Threads")
+    envio.add_argument(
+        "--processos",
+        type=int,
+        default=1,
+        help="Processos que dividem os envios, a concorrência e a taxa "
+        "(para usar vários núcleos).",
+    )
+    envio.add_argument(
+        "--adaptativa",
+        choices=ALGORITMOS_CONCORRENCIA,
+        help="Ajusta os envios simultâneos pela latência; --concorrencia vira o máximo.",
+    )
+    envio.add_argument(
+        "--latencia-maxima",
+        type=float,
+        help="Teto (ms) para o p90 da latência na concorrência adaptativa.",
+    )
+    envio.add_argument(
+        "--concorrencia-inicial",
+        type=int,
+        help="Limite no início da concorrência adaptativa (padrão: até 10).",
+    )
+    envio.add_argument(
+        "--perfil",
+        choices=["Fechada", "Constante", "Rampa", "Degraus", "Pico"],
+        default="Fechada",
+        help="Perfil de carga (Fechada = sem taxa-alvo).",
+    )
+    envio.add_argument("--taxa-base", type=float, default=10, help="req/s")
+    envio.add_argument("--taxa-alvo", type=float, default=50, help="req/s")
+    envio.add_argument("--duracao", type=float, default=30, help="segundos")
+    envio.add_argument("--inicio-pico", type=float, default=10, help="segundos")
+    envio.add_argument("--degraus", type=int, default=5)
+
+    saturacao = parser.add_argument_group("busca de saturação")
+    saturacao.add_argument(
+        "--saturacao",
+        action="store_true",
+        help="Sobe a taxa em estágios, a partir de --taxa-base, até o p99 passar "
+        "do SLO ou surgirem erros, e relata a vazão máxima sustentável "
+        "(--concorrencia limita os envios em andamento).",
+    )
+    saturacao.add_argument(
+        "--slo-p99", type=float, default=1000, help="Teto do p99 (ms)."
+    )
+    saturacao.add_argument(
+        "--fator-estagio",
+        type=float,
+        default=1.5,
+        help="Multiplicador da taxa entre estágios.",
+    )
+    saturacao.add_argument(
+        "--duracao-estagio", type=float, default=30, help="Segundos de cada estágio."
+    )
+    saturacao.add_argument(
+        "--erros-aceitos",
+        type=float,
+        default=0,
+        help="%% de envios com erro aceito em um estágio (0 = para no primeiro).",
+    )
+    saturacao.add_argument(
+        "--max-estagios", type=int, default=10, help="Estágios no máximo."
+    )
+
+    saida = parser.add_argument_group("saída")
+    saida.add_argument("--saida", help="Arquivo do resumo JSON (padrão: stdout).")
+    saida.add_argument(
+        "--verbose", action="store_true", help="Mostra o resultado de cada envio."
+    )
+    saida.add_argument(
+        "--arquivo-respostas",
+        help="Caminho (sem extensão) do arquivo comprimido com as respostas.",
+    )
+    saida.add_argument(
+        "--somente-falhas",
+        action="store_true",
+        help="Arquiva só as respostas que não foram sucesso.",
+    )
+    saida.add_argument(
+        "--relatorio",
+        help="CSV com o resultado de cada envio (e o registro do corpus de origem).",
+    )
+    saida.add_argument(
+        "--tabela-transacoes",
+        default="consulta_transacoes.csv",
+        help="CSV código → Erro/Mensagem da consulta com --transacoes.",
+    )
+    saida.add_argument(
+        "--historico",
+        default=PASTA_HISTORICO,
+        help="Pasta do histórico de execuções (ver 'comparar').",
+    )
+    saida.add_argument(
+        "--sem-historico",
+        action="store_true",
+        help="Não salva a execução no histórico.",
+    )
+    saida.add_argument(
+        "--rotulo", default="", help="Identificação da execução no histórico."
+    )
+    saida.add_argument(
+        "--banco",
+        default=ARQUIVO_BANCO,
+        help="Banco SQLite com o resultado de cada envio (ver 'resultados').",
+    )
+    saida.add_argument(
+        "--sem-banco", action="store_true", help="Não grava os resultados no banco."
+    )
+    return parser
+
+
+def criar_parser_historico():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Consulta e compara execuções salvas no histórico."
+    )
+    comum = argparse.ArgumentParser(add_help=False)
+    comum.add_argument(
+        "--historico", default=PASTA_HISTORICO, help="Pasta do histórico de execuções."
+    )
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("execucoes", parents=[comum], help="Lista as execuções salvas.")
+    comparar = comandos.add_parser(
+        "comparar",
+        parents=[comum],
+        help="Compara duas execuções e aponta regressões significativas.",
+    )
+    comparar.add_argument("base", help="Id ou arquivo JSON da execução de referência.")
+    comparar.add_argument("candidata", help="Id ou arquivo JSON da execução comparada.")
+    comparar.add_argument(
+        "--limiar",
+        type=float,
+        default=5,
+        help="Variação mínima (%%) para apontar uma regressão.",
+    )
+    comparar.add_argument(
+        "--alfa", type=float, default=0.05, help="Nível de significância dos testes."
+    )
+    comparar.add_argument("--saida", help="Arquivo da comparação em JSON.")
+    return parser
+
+
+def criar_parser_resultados():
+    parser = argparse.ArgumentParser(
+        prog="cli.py resultados",
+        description="Filtra os resultados gravados no banco de resultados.",
+    )
+    parser.add_argument("--banco", default=ARQUIVO_BANCO, help="Banco SQLite.")
+    parser.add_argument(
+        "--execucoes", action="store_true", help="Lista as execuções do banco."
+    )
+    parser.add_argument(
+        "--execucao", type=int, help="Id da execução (padrão: a mais recente)."
+    )
+    parser.add_argument(
+        "--todas", action="store_true", help="Busca em todas as execuções."
+    )
+    parser.add_argument("--status", choices=(*STATUS_RESULTADO, STATUS_FALHAS))
+    parser.add_argument("--mensagem", help="Mensagem exata.")
+    parser.add_argument("--contem", help="Trecho da mensagem.")
+    parser.add_argument("--cod-transacao", help="CodTransacao exato.")
+    parser.add_argument(
+        "--mensagens",
+        action="store_true",
+        help="Lista as mensagens mais frequentes (com os filtros de execução e status).",
+    )
+    parser.add_argument(
+        "--limite", type=int, default=100, help="Máximo de linhas (0 = todas)."
+    )
+    parser.add_argument("--csv", help="Grava as linhas neste CSV em vez de mostrar.")
+    return parser
+
+
+def main_resultados(argv):
+    args = criar_parser_resultados().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(levelname)s - %(message)s", stream=sys.stderr
+    )
+    banco = BancoResultados(args.banco)
+    execucoes = banco.listar_execucoes()
+    if args.execucoes:
+        for execucao in execucoes:
+            print(
+                f"{execucao['id']:>5}  {execucao['data']}  "
+                f"{execucao['resultados']:>9} resultados  "
+                f"{execucao['id_historico'] or '-':<18} {execucao['rotulo']}"
+            )
+        return 0
+
+    execucao = args.execucao
+    if execucao is None and not args.todas:
+        if not execucoes:
+            logging.error(f"Nenhuma execução gravada em {args.banco}.")
+            return 1
+        execucao = execucoes[0]["id"]
+
+    if args.mensagens:
+        for linha in banco.mensagens(execucao, args.status):
+            print(f"{linha['quantidade']:>9}  {linha['mensagem']}")
+        return 0
+
+    filtros = {
+        "execucao": execucao,
+        "status": args.status,
+        "mensagem": args.mensagem,
+        "contem": args.contem,
+        "cod_transacao": args.cod_transacao,
+    }
+    total = banco.contar(**filtros)
+    linhas = banco.consultar(**filtros, limite=args.limite or None)
+    logging.info(f"{total} resultado(s); mostrando {len(linhas)}.")
+    colunas = (
+        "execucao",
+        "envio",
+        "origem",
+        "endpoint",
+        "status",
+        "latencia_ms",
+        "tentativas",
+        "cod_transacao",
+        "mensagem",
+    )
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as arquivo:
+            escritor = csv.writer(arquivo, delimiter=";")
+            escritor.writerow(colunas)
+            escritor.writerows([linha[c] for c in colunas] for linha in linhas)
+        logging.info(f"Resultados gravados em {args.csv}")
+    else:
+        for linha in linhas:
+            print("\t".join("" if linha[c] is None else str(linha[c]) for c in colunas))
+    return 0
+
+
+def main_historico(argv):
+    args = criar_parser_historico().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(levelname)s - %(message)s", stream=sys.stderr
+    )
+    historico = HistoricoExecucoes(args.historico)
+
+    if args.comando == "execucoes":
+        for registro in historico.listar():
+            print(descrever_execucao(registro))
+        return 0
+
+    try:
+        base = historico.carregar(args.base)
+        candidata = historico.carregar(args.candidata)
+    except ValueError as e:
+        logging.error(str(e))
+        return 1
+    comparacao = comparar_execucoes(base, candidata, args.limiar, args.alfa)
+    for linha in formatar_comparacao(comparacao):
+        print(linha)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(comparacao, arquivo, ensure_ascii=False, indent=2)
+    return 3 if comparacao["regressoes"] else 0
+
+
+def criar_parser_simulador():
+    parser = argparse.ArgumentParser(
+        prog="cli.py simulador",
+        description="Integrador simulado: atende IntegraXMLString localmente.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8110)
+    parser.add_argument(
+        "--latencia", choices=DISTRIBUICOES_LATENCIA, default="Lognormal"
+    )
+    parser.add_argument(
+        "--latencia-media", type=float, default=50, help="Latência média (ms)."
+    )
+    parser.add_argument(
+        "--latencia-desvio", type=float, default=20, help="Desvio padrão (ms)."
+    )
+    parser.add_argument(
+        "--erro-servico", type=float, default=0, help="%% de respostas com Erro=true."
+    )
+    parser.add_argument(
+        "--erro-http", type=float, default=0, help="%% de respostas HTTP 503."
+    )
+    parser.add_argument(
+        "--quedas", type=float, default=0, help="%% de conexões fechadas sem resposta."
+    )
+    parser.add_argument(
+        "--tamanho-resposta",
+        type=int,
+        default=0,
+        help="Tamanho aproximado de cada resposta, em bytes.",
+    )
+    parser.add_argument(
+        "--detectar-duplicados",
+        action="store_true",
+        help="Responde Erro=true a um pXML já recebido.",
+    )
+    parser.add_argument(
+        "--capacidade",
+        type=int,
+        default=0,
+        help="Requisições atendidas ao mesmo tempo; as demais esperam na fila "
+        "(0 = sem limite).",
+    )
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=1,
+        help="Processos atendendo a mesma porta (Linux/macOS), para usar vários núcleos.",
+    )
+    return parser
+
+
+def main_simulador(argv):
+    args = criar_parser_simulador().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+    logging.info(
+        f"Integrador simulado em http://{args.host}:{args.porta}/SOAP "
+        f"(latência {args.latencia}, média {args.latencia_media:g} ms, "
+        f"{args.processos} processo(s)). Ctrl+C para encerrar."
+    )
+    try:
+        resumo = servir_em_processos(
+            max(1, args.processos),
+            host=args.host,
+            porta=args.porta,
+            latencia=args.latencia,
+            latencia_media_ms=args.latencia_media,
+            latencia_desvio_ms=args.latencia_desvio,
+            taxa_erro_servico=args.erro_servico / 100,
+            taxa_erro_http=args.erro_http / 100,
+            taxa_queda=args.quedas / 100,
+            tamanho_resposta=args.tamanho_resposta,
+            detectar_duplicados=args.detectar_duplicados,
+            capacidade=args.capacidade,
+        )
+    except ValueError as e:
+        logging.error(f"Parâmetros inválidos: {e}")
+        return 1
+    logging.info(f"Encerrado: {json.dumps(resumo)}")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in ("execucoes", "comparar"):
+        return main_historico(argv)
+    if argv and argv[0] == "simulador":
+        return main_simulador(argv[1:])
+    if argv and argv[0] == "resultados":
+        return main_resultados(argv[1:])
+    args = criar_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+
+    payload = ""
+    if args.payload:
+        with open(args.payload, encoding="utf-8") as arquivo:
+            payload = arquivo.read().strip()
+
+    parametros = {
+        "pro_id": args.pro_id,
+        "usu_codigo": args.usu_codigo,
+        "payload": payload,
+        "obs": args.obs,
+        "transacao": args.transacao or "0",
+        "sistema": args.sistema,
+    }
+    try:
+        endpoints = construir_endpoints(args.url, args.porta)
+        cenario = None
+        if args.cenario:
+            if args.payload or args.corpus or args.transacoes or args.gerar_agentes:
+                raise ValueError(
+                    "Com --cenario, os payloads vêm do cenário: não use --payload, "
+                    "--corpus, --transacoes nem --gerar-agentes."
+                )
+            if args.pro_id or args.saturacao:
+                raise ValueError("Com --cenario, não use --pro-id nem --saturacao.")
+            cenario = CenarioCarga.carregar(args.cenario)
+        elif not args.pro_id:
+            raise ValueError("Informe o --pro-id (ou um --cenario).")
+        corpus = None
+        if args.corpus:
+            if args.payload:
+                raise ValueError("Use --payload ou --corpus, não os dois.")
+            corpus = CorpusPayloads(args.corpus, args.formato_corpus)
+        transacoes = None
+        if args.transacoes:
+            if args.corpus:
+                raise ValueError("Use --corpus ou --transacoes, não os dois.")
+            transacoes = ListaTransacoes(args.transacoes)
+        if args.gerar_agentes and (args.payload or args.corpus or args.transacoes):
+            raise ValueError(
+                "Com --gerar-agentes, não use --payload, --corpus nem --transacoes."
+            )
+        if args.modelo_agentes and not args.gerar_agentes:
+            raise ValueError("--modelo-agentes exige --gerar-agentes.")
+        if cenario is None:
+            validar_parametros(
+                parametros,
+                com_corpus=corpus is not None or args.gerar_agentes,
+                com_transacoes=transacoes is not None,
+            )
+        else:
+            # Os parâmetros de cada serviço vêm do cenário.
+            parametros = {}
+        lista = corpus if corpus is not None else transacoes
+        repeticoes = args.repeticoes
+        if repeticoes is None:
+            repeticoes = 0 if lista is not None else 1
+        perfil = None
+        if cenario is not None and cenario.por_taxa:
+            if args.perfil != "Fechada":
+                raise ValueError(
+                    "O cenário define a taxa de cada serviço: não use --perfil."
+                )
+            perfil = PerfilConstante(cenario.taxa_total())
+            if args.repeticoes is None:
+                repeticoes = max(1, math.ceil(cenario.taxa_total() * args.duracao))
+        elif args.perfil != "Fechada":
+            perfil = criar_perfil(
+                args.perfil,
+                args.taxa_base,
+                args.taxa_alvo,
+                args.duracao,
+                args.inicio_pico,
+                args.degraus,
+            )
+        if (repeticoes < 1 and lista is None) or args.concorrencia < 1:
+            raise ValueError("Repetições e concorrência devem ser no mínimo 1.")
+        if not 1 <= args.processos <= args.concorrencia:
+            raise ValueError("Os processos devem ser de 1 até a concorrência.")
+        limite_adaptativo = None
+        if args.adaptativa:
+            limite_adaptativo = LimiteAdaptativo(
+                args.adaptativa,
+                args.latencia_maxima / 1000 if args.latencia_maxima else None,
+                args.concorrencia_inicial,
+            )
+        elif args.latencia_maxima or args.concorrencia_inicial:
+            raise ValueError(
+                "--latencia-maxima e --concorrencia-inicial exigem --adaptativa."
+            )
+        if args.saturacao and (
+            transacoes is not None or perfil is not None or args.adaptativa
+        ):
+            raise ValueError(
+                "A busca de saturação define a própria carga: não use "
+                "--transacoes, --perfil nem --adaptativa."
+            )
+        if args.saturacao and args.gerar_agentes:
+            # Cada estágio recomeçaria a geração: os agentes se repetiriam.
+            raise ValueError("A busca de saturação não gera agentes.")
+    except ValueError as e:
+        logging.error(f"Parâmetros inválidos: {e}")
+        return 1
+
+    if args.gerar_agentes:
+        try:
+            modelo = {}
+            if args.modelo_agentes:
+                with open(args.modelo_agentes, encoding="utf-8") as arquivo:
+                    modelo = json.load(arquivo)
+            gerador = GeradorAgentes(modelo, repeticoes)
+            corpus = FilaGeracao(
+                gerador.gerar, repeticoes, args.fila_geracao, gerador.descricao()
+            )
+        except Exception as e:
+            # Inclui as falhas das consultas ao IBGE e ao ViaCEP.
+            logging.error(f"Não foi possível preparar a geração de agentes: {e}")
+            return 1
+    if cenario is not None and cenario.usa_agentes():
+        try:
+            cenario.preparar(repeticoes)
+        except Exception as e:
+            logging.error(f"Não foi possível preparar a geração de agentes: {e}")
+            return 1
+
+    balanceador = None
+    if len(endpoints) > 1:
+        balanceador = BalanceadorEndpoints(
+            endpoints,
+            args.balanceamento,
+            args.falhas_ejecao,
+            args.tempo_ejecao,
+            args.verificacao_saude,
+        )
+
+    if args.saturacao:
+        return executar_saturacao(args, endpoints, parametros, corpus, balanceador)
+
+    disjuntor = None
+    if args.disjuntor_erros > 0:
+        disjuntor = DisjuntorCircuito(
+            args.disjuntor_erros / 100, args.disjuntor_janela, args.disjuntor_pausa
+        )
+
+    arquivo_respostas = None
+    if args.arquivo_respostas:
+        arquivo_respostas = ArquivoRespostas(
+            args.arquivo_respostas, somente_falhas=args.somente_falhas
+        )
+
+    gravador_resultados = None
+    if not args.sem_banco:
+        try:
+            gravador_resultados = BancoResultados(args.banco).nova_execucao(
+                args.rotulo, " ".join(argv)
+            )
+        except sqlite3.Error as e:
+            logging.warning(f"Resultados não serão gravados no banco: {e}")
+
+    motor_envio = MotorEnvio(
+        endpoints[0][0],
+        parametros,
+        repeticoes,
+        concorrencia=args.concorrencia,
+        motor=args.motor,
+        perfil=perfil,
+        config_conexao={
+            "tamanho_pool": args.pool or args.concorrencia,
+            "timeout_conexao": args.timeout_conexao,
+            "timeout_leitura": args.timeout_leitura,
+        },
+        tentativas=args.tentativas,
+        arquivo_respostas=arquivo_respostas,
+        corpus=corpus,
+        backoff_base=args.backoff_base,
+        disjuntor=disjuntor,
+        balanceador=balanceador,
+        processos=args.processos,
+        transacoes=transacoes,
+        gravador_resultados=gravador_resultados,
+        limite_adaptativo=limite_adaptativo,
+        cenario=cenario,
+    )
+    tabela = TabelaConsultas() if transacoes is not None else None
+
+    relatorio = None
+    if args.relatorio:
+        relatorio = open(args.relatorio, "w", encoding="utf-8", newline="")
+        escritor = csv.writer(relatorio, delimiter=";")
+        escritor.writerow(
+            [
+                "envio",
+                "origem",
+                "endpoint",
+                "status",
+                "latencia_ms",
+                "cod_transacao",
+                "mensagem",
+            ]
+        )
+        lock_relatorio = threading.Lock()
+
+    def ao_resultados(lote):
+        if tabela is not None:
+            tabela.registrar(lote)
+        if args.verbose:
+            for resultado in lote:
+                origem = f" ({resultado['origem']})" if resultado["origem"] else ""
+                if resultado["servico"] is not None:
+                    origem = f" {resultado['servico']}{origem}"
+                logging.info(
+                    f"[{resultado['indice']}]{origem} {resultado['status']} "
+                    f"{resultado['latencia'] * 1000:.1f} ms "
+                    f"{resultado['erro'] or resultado['mensagem'] or ''}"
+                )
+        if relatorio is not None:
+            with lock_relatorio:
+                escritor.writerows(
+                    [
+                        resultado["indice"],
+                        resultado["origem"] or "",
+                        resultado["endpoint"] or "",
+                        resultado["status"],
+                        f"{resultado['latencia'] * 1000:.1f}",
+                        resultado["cod_transacao"] or "",
+                        resultado["erro"] or resultado["mensagem"] or "",
+                    ]
+                    for resultado in lote
+                )
+
+    if transacoes is not None:
+        descricao = f"a consulta das transações de {args.transacoes}"
+    elif cenario is not None:
+        descricao = (
+            f"{repeticoes} envios do cenário '{cenario.nome}' "
+            f"({len(cenario.servicos)} serviços)"
+        )
+    elif args.gerar_agentes:
+        descricao = f"a geração e o envio de {repeticoes} agentes"
+    elif repeticoes:
+        descricao = f"{repeticoes} envios"
+    else:
+        descricao = f"o corpus {args.corpus}"
+    logging.info(
+        f"Iniciando {descricao} para {motor_envio.url} "
+        f"(motor {args.motor}, concorrência {args.concorrencia}, "
+        f"{args.processos} processo(s))."
+    )
+    try:
+        resumo = motor_envio.executar(
+            ao_resultados
+            if args.verbose or relatorio is not None or tabela is not None
+            else None
+        )
+    except KeyboardInterrupt:
+        motor_envio.interromper()
+        resumo = motor_envio.resumo()
+    finally:
+        if arquivo_respostas is not None:
+            arquivo_respostas.fechar()
+        if relatorio is not None:
+            relatorio.close()
+
+    for linha in formatar_resumo(resumo):
+        logging.info(linha)
+
+    if tabela is not None:
+        contagens = tabela.contagens()
+        tabela.salvar_csv(args.tabela_transacoes)
+        logging.info(
+            f"Transações consultadas: {contagens['sem_erro']} com Erro=false, "
+            f"{contagens['com_erro']} com Erro=true, "
+            f"{contagens['sem_resposta']} sem resposta. "
+            f"Tabela gravada em {args.tabela_transacoes}"
+        )
+
+    id_execucao = None
+    if not args.sem_historico:
+        id_execucao = HistoricoExecucoes(args.historico).salvar(
+            resumo, motor_envio.estatisticas.histograma, args.rotulo
+        )
+        logging.info(f"Execução salva no histórico: {id_execucao}")
+    if gravador_resultados is not None:
+        gravador_resultados.fechar(id_execucao)
+        if gravador_resultados.erro:
+            logging.warning(
+                f"Gravação no banco interrompida: {gravador_resultados.erro}"
+            )
+        logging.info(
+            f"{gravador_resultados.gravados} resultados gravados no banco "
+            f"(execução {gravador_resultados.id}; ver 'cli.py resultados')."
+        )
+
+    conteudo = json.dumps(resumo, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(conteudo + "\n")
+        logging.info(f"Resumo gravado em {args.saida}")
+    else:
+        print(conteudo)
+
+    if resumo["interrompido"]:
+        return 130
+    if resumo["erro_corpus"]:
+        return 1
+    if resumo["contagens"]["erro_conexao"]:
+        return 2
+    return 0
+
+
+def executar_saturacao(args, endpoints, parametros, corpus, balanceador):
+    """Busca de saturação (--saturacao); não grava histórico nem banco."""
+
+    def criar_motor(perfil, repeticoes):
+        return MotorEnvio(
+            endpoints[0][0],
+            parametros,
+            repeticoes,
+            concorrencia=args.concorrencia,
+            motor=args.motor,
+            perfil=perfil,
+            config_conexao={
+                "tamanho_pool": args.pool or args.concorrencia,
+                "timeout_conexao": args.timeout_conexao,
+                "timeout_leitura": args.timeout_leitura,
+            },
+            tentativas=args.tentativas,
+            corpus=corpus,
+            backoff_base=args.backoff_base,
+            balanceador=balanceador,
+            processos=args.processos,
+        )
+
+    try:
+        busca = BuscaSaturacao(
+            criar_motor,
+            args.taxa_base,
+            args.slo_p99,
+            fator=args.fator_estagio,
+            duracao_estagio=args.duracao_estagio,
+            erros_aceitos=args.erros_aceitos / 100,
+            max_estagios=args.max_estagios,
+        )
+    except ValueError as e:
+        logging.error(f"Parâmetros inválidos: {e}")
+        return 1
+
+    def ao_estagio(estagio):
+        latencia = estagio["latencia_ms"]
+        logging.info(
+            f"Estágio {estagio['estagio']}: {estagio['vazao_rps']:.1f} req/s "
+            f"(oferecidos {estagio['taxa_oferecida']:g}) | p99 "
+            f"{latencia['p99']:.1f} ms | erros {estagio['taxa_erro'] * 100:.2f}%"
+        )
+
+    logging.info(
+        f"Buscando a saturação de {args.url} a partir de {args.taxa_base:g} req/s "
+        f"(SLO p99 {args.slo_p99:g} ms, estágios de {args.duracao_estagio:g} s)."
+    )
+    try:
+        relatorio = busca.executar(ao_estagio)
+    except KeyboardInterrupt:
+        busca.interromper()
+        relatorio = busca.relatorio()
+
+    for linha in formatar_relatorio_saturacao(relatorio):
+        logging.info(linha)
+
+    conteudo = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(conteudo + "\n")
+        logging.info(f"Relatório gravado em {args.saida}")
+    else:
+        print(conteudo)
+
+    if relatorio["parada"] == "interrompido":
+        return 130
+    if relatorio["parada"] == "corpus":
+        return 1
+    return 0
+
+
+# --- Ponto de Entrada ---
+if __name__ == "__main__":
+    # Necessário para os processos de envio no executável do PyInstaller.
+    multiprocessing.freeze_support()
+    sys.exit(main())
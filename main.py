@@ -3,6 +3,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
+import multiprocessing
 import os
 import sys
 
@@ -214,6 +215,8 @@ class MenuPrincipalFrame(ttk.Frame):
 
 # --- Ponto de Entrada da Aplicação ---
 if __name__ == "__main__":
+    # Necessário para os processos de envio no executável do PyInstaller.
+    multiprocessing.freeze_support()
     try:
         logging.info("Aplicação iniciada. Carregando recursos...")
         codigoMapper.carregar_mapa_codigos()
@@ -0,0 +1,61 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from app.services.soap.envelope import (
+    LIMITE_JUNTAR_PARTES,
+    ModeloEnvelope,
+    envolver_cdata,
+)
+
+PARAMETROS = {
+    "pro_id": "0207",
+    "usu_codigo": "0001",
+    "payload": "",
+    "obs": "",
+    "transacao": "0",
+    "sistema": "001",
+}
+
+TEXTOS = [
+    "",
+    "<Agente><Nome>João & Cia</Nome></Agente>",
+    "]]>",
+    "a]]>b]]>c",
+    "]]]>",
+    "]]]]>>",
+    "]]",
+    ">",
+    "<x><![CDATA[dentro]]></x>",
+]
+
+
+@pytest.mark.parametrize("texto", TEXTOS)
+def test_cdata_devolve_o_texto_original(texto):
+    elemento = ET.fromstring("<r>" + envolver_cdata(texto) + "</r>")
+    assert (elemento.text or "") == texto
+
+
+def test_cdata_divide_no_fechamento():
+    assert envolver_cdata("a]]>b") == "<![CDATA[a]]]]><![CDATA[>b]]>"
+    assert envolver_cdata("sem fechamento") == "<![CDATA[sem fechamento]]>"
+
+
+def pxml(corpo):
+    envelope = ET.fromstring(b"".join(corpo))
+    return envelope.find(".//pXML").text or ""
+
+
+@pytest.mark.parametrize("texto", TEXTOS)
+def test_payload_do_envelope_chega_intacto(texto):
+    modelo = ModeloEnvelope({**PARAMETROS, "payload": texto})
+    assert pxml(modelo.montar(1)) == texto
+    assert pxml(ModeloEnvelope(PARAMETROS).montar(1, texto)) == texto
+
+
+def test_payload_grande_vai_em_partes_sem_copia():
+    payload = "<a>]]></a>" * (LIMITE_JUNTAR_PARTES // 10 + 1)
+    corpo = ModeloEnvelope(PARAMETROS).montar(1, payload)
+    assert len(corpo.partes) > 1
+    assert len(corpo) == len(b"".join(corpo))
+    assert pxml(corpo) == payload
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from app.services.soap.estatisticas import HistogramaLatencia
+
+
+def percentil_exato(valores_us, p):
+    """Mesmo critério do histograma: o menor valor com `p`% dos registros."""
+    ordenados = sorted(valores_us)
+    alvo = max(1, -(-len(ordenados) * p // 100))
+    return ordenados[int(alvo) - 1]
+
+
+def test_valores_pequenos_tem_bucket_proprio():
+    histograma = HistogramaLatencia()
+    valores_us = list(range(1, 128))
+    for valor_us in valores_us:
+        histograma.registrar(valor_us / 1_000_000)
+    for p in range(1, 101):
+        exato = percentil_exato(valores_us, p)
+        assert histograma.percentil(p) * 1_000_000 == pytest.approx(exato)
+
+
+@pytest.mark.parametrize("valor_us", [128, 1_000, 12_345, 250_000, 7_777_777])
+def test_erro_relativo_do_bucket_abaixo_de_1_porcento(valor_us):
+    histograma = HistogramaLatencia()
+    histograma.registrar(valor_us / 1_000_000)
+    # Um valor maior, para o percentil não ser limitado pelo máximo.
+    histograma.registrar(3000)
+    estimado_us = histograma.percentil(50) * 1_000_000
+    assert abs(estimado_us - valor_us) / valor_us < 0.01
+
+
+def test_percentis_de_amostra_lognormal():
+    aleatorio = random.Random(7)
+    segundos = [aleatorio.lognormvariate(-3, 1) for _ in range(20_000)]
+    valores_us = [int(s * 1_000_000) for s in segundos]
+    histograma = HistogramaLatencia()
+    for s in segundos:
+        histograma.registrar(s)
+
+    for p in (50, 90, 99, 99.9):
+        exato = percentil_exato(valores_us, p)
+        assert histograma.percentil(p) * 1_000_000 == pytest.approx(exato, rel=0.01)
+    assert histograma.percentil(100) == max(valores_us) / 1_000_000
+    assert histograma.maximo() == max(valores_us) / 1_000_000
+    assert histograma.media() == pytest.approx(sum(valores_us) / len(valores_us) / 1e6)
+
+
+def test_histograma_vazio():
+    histograma = HistogramaLatencia()
+    assert histograma.percentil(99) == 0.0
+    assert histograma.media() == 0.0
+    assert histograma.maximo() == 0.0
+
+
+def test_valor_acima_do_limite_vai_para_o_ultimo_bucket():
+    histograma = HistogramaLatencia(maximo_segundos=1)
+    histograma.registrar(5)
+    assert histograma.buckets[-1] == 1
+    # O máximo real continua registrado.
+    assert histograma.maximo() == 5
+    assert histograma.percentil(100) == pytest.approx(1, rel=0.01)
+
+
+def test_mesclar_equivale_a_registrar_tudo_num_so():
+    aleatorio = random.Random(11)
+    partes = [[aleatorio.expovariate(20) for _ in range(500)] for _ in range(3)]
+    junto = HistogramaLatencia()
+    mesclado = HistogramaLatencia()
+    for parte in partes:
+        histograma = HistogramaLatencia()
+        for segundos in parte:
+            histograma.registrar(segundos)
+            junto.registrar(segundos)
+        mesclado.mesclar(histograma)
+
+    assert mesclado.buckets == junto.buckets
+    assert mesclado.total == junto.total == 1500
+    assert mesclado.soma_us == junto.soma_us
+    assert mesclado.minimo_us == junto.minimo_us
+    assert mesclado.maximo_us == junto.maximo_us
+    for p in (50, 99, 100):
+        assert mesclado.percentil(p) == junto.percentil(p)
+
+
+def test_mesclar_histograma_vazio_nao_altera_minimo():
+    histograma = HistogramaLatencia()
+    histograma.registrar(0.01)
+    histograma.mesclar(HistogramaLatencia())
+    assert histograma.minimo_us == 10_000
+    assert histograma.total == 1
+
+
+def test_exportar_e_importar():
+    histograma = HistogramaLatencia()
+    for segundos in (0.001, 0.02, 0.02, 1.5):
+        histograma.registrar(segundos)
+    copia = HistogramaLatencia.importar(histograma.exportar())
+    assert copia.buckets == histograma.buckets
+    assert copia.total == histograma.total
+    assert copia.percentil(50) == histograma.percentil(50)
+    assert copia.media() == histograma.media()
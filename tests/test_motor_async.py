@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+
+from app.services.soap.envelope import ModeloEnvelope
+from app.services.soap.estatisticas import CronometroFases
+from app.services.soap.motor_async import ClienteHTTPAsync, ErroHTTP
+
+PARAMETROS = {
+    "pro_id": "0207",
+    "usu_codigo": "0001",
+    "payload": "",
+    "obs": "",
+    "transacao": "0",
+    "sistema": "001",
+}
+CORPO = ModeloEnvelope(PARAMETROS).montar(1, "<Agente>olá</Agente>")
+
+
+def ler(dados):
+    """Lê uma resposta de `dados`; retorna o resultado e o que sobrou no buffer."""
+
+    async def _ler():
+        reader = asyncio.StreamReader()
+        reader.feed_data(dados)
+        reader.feed_eof()
+        resultado = await ClienteHTTPAsync()._ler_resposta(reader, CronometroFases())
+        return resultado, await reader.read()
+
+    return asyncio.run(_ler())
+
+
+def test_resposta_com_content_length_deixa_a_proxima_no_buffer():
+    resposta = b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nabcde"
+    (status, razao, manter, texto), sobra = ler(resposta + b"HTTP/1.1 204")
+    assert (status, razao, manter, texto) == (200, "OK", True, "abcde")
+    assert sobra == b"HTTP/1.1 204"
+
+
+def test_resposta_chunked():
+    resposta = (
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"4\r\nWiki\r\n"
+        b"6;ext=1\r\npedia \r\n"
+        b"E\r\nin \r\n\r\nchunks.\r\n"
+        b"0\r\n\r\n"
+    )
+    (status, _, manter, texto), sobra = ler(resposta + b"proxima")
+    assert status == 200
+    assert manter
+    assert texto == "Wikipedia in \r\n\r\nchunks."
+    assert sobra == b"proxima"
+
+
+def test_resposta_ate_o_fechamento_nao_reusa_a_conexao():
+    resposta = b"HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\n\r\n<a>fim</a>"
+    (status, _, manter, texto), _ = ler(resposta)
+    assert (status, manter, texto) == (200, False, "<a>fim</a>")
+
+
+@pytest.mark.parametrize(
+    "versao, conexao, manter",
+    [
+        (b"HTTP/1.1", b"", True),
+        (b"HTTP/1.1", b"Connection: close\r\n", False),
+        (b"HTTP/1.0", b"", False),
+        (b"HTTP/1.0", b"Connection: keep-alive\r\n", True),
+    ],
+)
+def test_keep_alive_conforme_a_versao(versao, conexao, manter):
+    resposta = versao + b" 200 OK\r\n" + conexao + b"Content-Length: 0\r\n\r\n"
+    (_, _, manter_lido, _), _ = ler(resposta)
+    assert manter_lido is manter
+
+
+def test_charset_do_content_type():
+    resposta = (
+        b"HTTP/1.1 500 Internal Server Error\r\n"
+        b'Content-Type: text/xml; charset="iso-8859-1"\r\n'
+        b"Content-Length: 4\r\n\r\nol\xe1!"
+    )
+    (status, razao, _, texto), _ = ler(resposta)
+    assert (status, razao, texto) == (500, "Internal Server Error", "olá!")
+
+
+def test_resposta_vazia_e_erro_de_leitura():
+    with pytest.raises(asyncio.IncompleteReadError):
+        ler(b"")
+
+
+class ServidorBruto:
+    """Servidor que responde cada requisição com a próxima resposta da lista."""
+
+    def __init__(self, respostas, fechar_ociosa=False):
+        self.respostas = list(respostas)
+        self.fechar_ociosa = fechar_ociosa
+        self.conexoes = 0
+        self.requisicoes = []
+
+    async def atender(self, reader, writer):
+        self.conexoes += 1
+        while self.respostas:
+            cabecalho = await reader.readuntil(b"\r\n\r\n")
+            tamanho = int(cabecalho.lower().split(b"content-length: ")[1].split()[0])
+            self.requisicoes.append(cabecalho + await reader.readexactly(tamanho))
+            writer.write(self.respostas.pop(0))
+            await writer.drain()
+            if self.fechar_ociosa:
+                break
+        writer.close()
+
+
+def enviar(servidor, vezes):
+    """Faz `vezes` POSTs seguidos ao servidor; retorna os textos e o cliente."""
+
+    async def _enviar():
+        tcp = await asyncio.start_server(servidor.atender, "127.0.0.1", 0)
+        porta = tcp.sockets[0].getsockname()[1]
+        cliente = ClienteHTTPAsync()
+        textos = []
+        try:
+            for _ in range(vezes):
+                try:
+                    textos.append(
+                        await cliente.post(
+                            f"http://127.0.0.1:{porta}/SOAP", CORPO, {"A": "1"}
+                        )
+                    )
+                except ErroHTTP as e:
+                    textos.append(e.status)
+                # Deixa o servidor fechar a conexão, se for o caso.
+                await asyncio.sleep(0.05)
+        finally:
+            await cliente.fechar()
+            tcp.close()
+            await tcp.wait_closed()
+        return textos, cliente
+
+    return asyncio.run(_enviar())
+
+
+def test_requisicao_enviada():
+    servidor = ServidorBruto([b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"])
+    enviar(servidor, 1)
+    cabecalho, corpo = servidor.requisicoes[0].split(b"\r\n\r\n", 1)
+    linhas = cabecalho.split(b"\r\n")
+    assert linhas[0] == b"POST /SOAP HTTP/1.1"
+    assert b"A: 1" in linhas
+    assert b"Content-Length: %d" % len(corpo) in linhas
+    assert corpo == b"".join(CORPO)
+    assert "olá".encode() in corpo
+
+
+def test_conexao_keep_alive_e_reusada():
+    respostas = [
+        b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\num",
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n4\r\ndois\r\n0\r\n\r\n",
+        b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n",
+        b"HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\nfim!",
+    ]
+    servidor = ServidorBruto(respostas)
+    textos, cliente = enviar(servidor, 4)
+    assert textos == ["um", "dois", 503, "fim!"]
+    assert servidor.conexoes == 1
+    assert cliente.estatisticas() == {
+        "conexoes_abertas": 1,
+        "conexoes_reutilizadas": 3,
+    }
+
+
+def test_conexao_fechada_pelo_servidor_nao_e_reusada():
+    respostas = [b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"] * 3
+    servidor = ServidorBruto(respostas, fechar_ociosa=True)
+    textos, cliente = enviar(servidor, 3)
+    # Cada POST vai uma vez só, numa conexão nova, sem erro nem reenvio.
+    assert textos == ["ok"] * 3
+    assert len(servidor.requisicoes) == 3
+    assert cliente.estatisticas()["conexoes_abertas"] == 3
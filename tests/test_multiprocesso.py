@@ -0,0 +1,108 @@
+import pytest
+
+from app.services.soap.motor_envio import MotorEnvio
+from app.services.soap.multiprocesso import _fatia, _opcoes_processo
+from app.services.soap.perfis_carga import PerfilConstante, PerfilFracao
+from app.services.soap.pipeline_geracao import FilaGeracao
+from app.services.soap.servidor_simulado import ServidorSimulado
+
+PARAMETROS = {
+    "pro_id": "0207",
+    "usu_codigo": "0001",
+    "payload": "<Agente/>",
+    "obs": "",
+    "transacao": "0",
+    "sistema": "001",
+}
+
+
+@pytest.mark.parametrize("total", [1, 2, 7, 10, 64, 101])
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 8])
+def test_fatias_somam_o_total(total, n):
+    fatias = [_fatia(total, k, n) for k in range(n)]
+    if total >= n:
+        assert sum(fatias) == total
+    # Diferença de no máximo 1, com as sobras nas primeiras fatias.
+    assert max(fatias) - min(fatias) <= 1
+    assert fatias == sorted(fatias, reverse=True)
+
+
+def test_fatia_minima_e_1():
+    assert [_fatia(2, k, 4) for k in range(4)] == [1, 1, 1, 1]
+
+
+def indices(motor_envio):
+    return [indice for indice, _ in motor_envio._gerar_envios()]
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5])
+def test_particoes_cobrem_os_envios_sem_repetir(n):
+    partes = [
+        indices(MotorEnvio("http://x/SOAP", PARAMETROS, 23, particao=(k, n)))
+        for k in range(n)
+    ]
+    for k, parte in enumerate(partes):
+        assert parte == list(range(1 + k, 24, n))
+    assert sorted(sum(partes, [])) == list(range(1, 24))
+
+
+def test_particoes_do_corpus_mantem_a_posicao_do_registro():
+    corpus = [
+        (f"r{posicao}", f"<Agente>{posicao}</Agente>") for posicao in range(1, 11)
+    ]
+    enviados = {}
+    for k in range(3):
+        motor = MotorEnvio(
+            "http://x/SOAP", PARAMETROS, 0, corpus=corpus, particao=(k, 3)
+        )
+        for indice, corpo in motor._gerar_envios():
+            enviados[indice] = b"".join(corpo)
+            assert motor._origens[indice] == f"r{indice}"
+    assert sorted(enviados) == list(range(1, 11))
+    for indice, corpo in enviados.items():
+        assert f"<Agente>{indice}</Agente>".encode() in corpo
+
+
+def test_opcoes_de_cada_processo():
+    corpus = FilaGeracao(lambda posicao: (None, "<a/>"), 10)
+    motor = MotorEnvio(
+        "http://x/SOAP",
+        PARAMETROS,
+        10,
+        concorrencia=10,
+        perfil=PerfilConstante(90),
+        config_conexao={"tamanho_pool": 7},
+        corpus=corpus,
+        processos=3,
+    )
+    opcoes = [_opcoes_processo(motor, k, 3) for k in range(3)]
+    assert [o["concorrencia"] for o in opcoes] == [4, 3, 3]
+    assert [o["config_conexao"]["tamanho_pool"] for o in opcoes] == [3, 2, 2]
+    assert [o["particao"] for o in opcoes] == [(0, 3), (1, 3), (2, 3)]
+    for o in opcoes:
+        assert isinstance(o["perfil"], PerfilFracao)
+        assert o["perfil"].taxa(0) == pytest.approx(30)
+        assert o["corpus"] is not corpus
+    assert [o["corpus"].particao for o in opcoes] == [(0, 3), (1, 3), (2, 3)]
+
+
+def test_processos_enviam_cada_envio_uma_vez():
+    servidor = ServidorSimulado(porta=0, latencia="Fixa", latencia_media_ms=1)
+    servidor.iniciar()
+    try:
+        indices_recebidos = []
+        motor = MotorEnvio(
+            f"http://127.0.0.1:{servidor.porta}/SOAP",
+            PARAMETROS,
+            90,
+            concorrencia=6,
+            processos=3,
+        )
+        resumo = motor.executar(
+            lambda lote: indices_recebidos.extend(r["indice"] for r in lote)
+        )
+    finally:
+        servidor.parar()
+    assert sorted(indices_recebidos) == list(range(1, 91))
+    assert resumo["contagens"]["sucesso"] == 90
+    assert servidor.contagens["requisicoes"] == 90
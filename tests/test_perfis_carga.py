@@ -0,0 +1,111 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from app.services.soap.perfis_carga import (
+    PerfilCarga,
+    PerfilConstante,
+    PerfilFracao,
+    PerfilRampa,
+    criar_perfil,
+    criar_resultado,
+    despachar_agenda,
+    gerar_agenda,
+)
+
+
+def test_carga_fechada_nao_tem_instante_previsto():
+    assert list(gerar_agenda(None, "abc")) == [("a", None), ("b", None), ("c", None)]
+
+
+def test_agenda_constante_espacada_pela_taxa():
+    agenda = list(gerar_agenda(PerfilConstante(50), range(5), inicio=100.0))
+    assert [indice for indice, _ in agenda] == list(range(5))
+    for posicao, (_, previsto) in enumerate(agenda):
+        assert previsto == pytest.approx(100.0 + posicao * 0.02)
+
+
+def test_agenda_segue_a_taxa_do_momento():
+    # Rampa de 10 a 20 req/s em 1 s: cada intervalo é 1 / taxa(decorrido).
+    perfil = PerfilRampa(10, 20, 1)
+    instantes = [previsto for _, previsto in gerar_agenda(perfil, range(30), 0.0)]
+    decorrido = 0.0
+    for previsto in instantes:
+        assert previsto == pytest.approx(decorrido)
+        decorrido += 1.0 / perfil.taxa(decorrido)
+    intervalos = [b - a for a, b in itertools.pairwise(instantes)]
+    assert intervalos[0] == pytest.approx(0.1)
+    assert intervalos[-1] == pytest.approx(0.05)
+
+
+def test_instantes_nao_dependem_de_quando_o_envio_saiu():
+    agenda = gerar_agenda(PerfilConstante(100), range(3), inicio=time.perf_counter())
+    _, primeiro = next(agenda)
+    # O consumidor atrasa: os próximos instantes continuam no plano.
+    time.sleep(0.05)
+    _, segundo = next(agenda)
+    _, terceiro = next(agenda)
+    assert segundo - primeiro == pytest.approx(0.01)
+    assert terceiro - primeiro == pytest.approx(0.02)
+
+
+def test_perfil_fracao_divide_a_taxa():
+    perfil = PerfilFracao(PerfilConstante(100), 0.25)
+    instantes = [previsto for _, previsto in gerar_agenda(perfil, range(3), 0.0)]
+    assert instantes == pytest.approx([0.0, 0.04, 0.08])
+
+
+def test_despachar_espera_o_instante_previsto():
+    inicio = time.perf_counter() + 0.02
+    agenda = gerar_agenda(PerfilConstante(100), range(5), inicio)
+    for _, previsto in despachar_agenda(agenda, threading.Event()):
+        atraso = time.perf_counter() - previsto
+        assert 0 <= atraso < 0.02
+
+
+def test_despachar_para_ao_interromper():
+    interromper = threading.Event()
+    threading.Timer(0.05, interromper.set).start()
+    agenda = gerar_agenda(PerfilConstante(10), range(100))
+    despachados = list(despachar_agenda(agenda, interromper))
+    assert 1 <= len(despachados) < 3
+
+
+def test_latencia_medida_desde_o_instante_previsto():
+    # Previsto para 10,0 s; só saiu em 10,3 s (vagas ocupadas); respondeu em 10,5 s.
+    resultado = criar_resultado(7, 10.0, 10.3, 10.5, texto="ok", tentativas=1)
+    assert resultado["indice"] == 7
+    assert resultado["latencia"] == pytest.approx(0.5)
+    assert resultado["tempo_servico"] == pytest.approx(0.2)
+    assert resultado["atraso"] == pytest.approx(0.3)
+    assert resultado["tentativas"] == 1
+    assert resultado["fases"] == {}
+
+
+def test_carga_fechada_mede_desde_o_envio():
+    resultado = criar_resultado(1, None, 10.3, 10.5, erro="timeout")
+    assert resultado["latencia"] == pytest.approx(0.2)
+    assert resultado["tempo_servico"] == pytest.approx(0.2)
+    assert resultado["atraso"] == 0
+    assert resultado["erro"] == "timeout"
+
+
+def test_perfil_precisa_implementar_taxa():
+    class SemTaxa(PerfilCarga):
+        pass
+
+    with pytest.raises(TypeError):
+        PerfilCarga()
+    with pytest.raises(TypeError):
+        SemTaxa()
+
+
+@pytest.mark.parametrize(
+    "nome, taxa_base, taxa_alvo",
+    [("Constante", 0, 0), ("Rampa", 10, 0), ("Senoide", 10, 20)],
+)
+def test_criar_perfil_invalido(nome, taxa_base, taxa_alvo):
+    with pytest.raises(ValueError):
+        criar_perfil(nome, taxa_base, taxa_alvo, duracao=10)
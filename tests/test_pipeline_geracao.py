@@ -0,0 +1,144 @@
+import statistics
+import threading
+import time
+
+import pytest
+
+from app.services.soap.envelope import ModeloEnvelope
+from app.services.soap.motor_async import MotorAsync
+from app.services.soap.motor_envio import MotorEnvio
+from app.services.soap.pipeline_geracao import FilaGeracao
+from app.services.soap.servidor_simulado import ServidorSimulado
+
+PARAMETROS = {
+    "pro_id": "0207",
+    "usu_codigo": "0001",
+    "payload": "",
+    "obs": "",
+    "transacao": "0",
+    "sistema": "001",
+}
+
+
+def gerar(posicao):
+    return f"agente {posicao}", f"<Agente>{posicao}</Agente>"
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorSimulado(porta=0, latencia="Fixa", latencia_media_ms=5)
+    servidor.iniciar()
+    yield servidor
+    servidor.parar()
+
+
+def test_gera_todas_as_posicoes_em_ordem():
+    fila = FilaGeracao(gerar, 20, capacidade=3)
+    assert list(fila) == [gerar(posicao) for posicao in range(1, 21)]
+    geracao = fila.resumo()["geracao"]
+    assert geracao["gerados"] == 20
+    assert geracao["pico_fila"] <= 3
+
+
+def test_fila_cheia_segura_o_gerador():
+    gerados = []
+
+    def gerar_contando(posicao):
+        gerados.append(posicao)
+        return gerar(posicao)
+
+    fila = FilaGeracao(gerar_contando, 1000, capacidade=5)
+    iterador = iter(fila)
+    next(iterador)
+    time.sleep(0.3)
+    # Um consumido, `capacidade` na fila e um pronto, esperando vaga.
+    assert len(gerados) <= 1 + 5 + 1
+    iterador.close()
+    assert fila.espera_fila_cheia > 0
+
+
+def test_interromper_a_iteracao_para_o_gerador():
+    gerados = []
+
+    def gerar_contando(posicao):
+        gerados.append(posicao)
+        return gerar(posicao)
+
+    fila = FilaGeracao(gerar_contando, 10_000, capacidade=2)
+    for _ in zip(range(3), fila):
+        pass
+    time.sleep(0.3)
+    parados = len(gerados)
+    time.sleep(0.3)
+    assert len(gerados) == parados < 10_000
+
+
+def test_falha_do_gerador_vira_erro_na_posicao():
+    def gerar_com_falha(posicao):
+        if posicao == 4:
+            raise KeyError("cpf")
+        return gerar(posicao)
+
+    recebidos = []
+    with pytest.raises(ValueError, match="Falha ao gerar o envio 4: 'cpf'"):
+        for item in FilaGeracao(gerar_com_falha, 10, capacidade=2):
+            recebidos.append(item)
+    assert recebidos == [gerar(posicao) for posicao in range(1, 4)]
+
+
+def test_dividir_gera_so_a_parte_do_processo():
+    gerados = []
+
+    def gerar_contando(posicao):
+        gerados.append(posicao)
+        return gerar(posicao)
+
+    itens = list(FilaGeracao(gerar_contando, 10).dividir(1, 3))
+    assert gerados == [2, 5, 8]
+    assert [item for item in itens if item != (None, None)] == [
+        gerar(posicao) for posicao in (2, 5, 8)
+    ]
+    assert len(itens) == 10
+
+
+def test_asyncio_nao_bloqueia_esperando_o_gerador(servidor):
+    def gerar_lento(posicao):
+        time.sleep(0.02)
+        return gerar(posicao)
+
+    tempos = []
+    envio = MotorEnvio(
+        f"http://127.0.0.1:{servidor.porta}/SOAP",
+        PARAMETROS,
+        40,
+        concorrencia=5,
+        motor="Asyncio",
+        corpus=FilaGeracao(gerar_lento, 40, capacidade=5),
+    )
+    resumo = envio.executar(
+        lambda lote: tempos.extend(r["tempo_servico"] for r in lote)
+    )
+    assert resumo["contagens"]["sucesso"] == 40
+    # Com o loop preso no gerador, as respostas (5 ms) só eram lidas depois
+    # de cada documento gerado (20 ms).
+    assert statistics.median(tempos) < 0.015
+
+
+def test_asyncio_repassa_erro_da_agenda_bloqueante(servidor):
+    modelo = ModeloEnvelope(PARAMETROS)
+
+    def agenda():
+        for i in range(1, 4):
+            yield (i, modelo.montar(i)), None
+        raise RuntimeError("agenda quebrada")
+
+    resultados = []
+    motor = MotorAsync(2, threading.Event())
+    with pytest.raises(RuntimeError, match="agenda quebrada"):
+        motor.executar(
+            f"http://127.0.0.1:{servidor.porta}/SOAP",
+            agenda(),
+            resultados.extend,
+            agenda_bloqueante=True,
+        )
+    assert sorted(r["indice"] for r in resultados) == [1, 2, 3]